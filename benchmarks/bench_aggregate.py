@@ -0,0 +1,100 @@
+"""Compare run aggregation by appending bytes with the vectorised find_runs().
+
+The changed offsets are found first, so only the aggregation into
+MemoryDelta runs is timed: appending one byte at a time, as
+aggregate_compare() used to, against find_runs() and slicing, with NumPy
+and without. A large reshuffle (many changes in a 64 KiB block, as when the
+inventory is sorted) is the case that matters most.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_aggregate.py
+"""
+
+import random
+import time
+
+from xcxtool.monitor import monitor
+from xcxtool.readers import diff
+
+DATA_SIZES = {"WiiU": 359_984, "DE": 696_832}
+REPEATS = 20
+
+
+def append_runs(offsets: list[int], before: bytes, after: bytes) -> list:
+    deltas = []
+    current_run = None
+    for offset in offsets:
+        if current_run is None:
+            current_run = monitor.MemoryDelta(offset, [before[offset]], [after[offset]])
+        elif offset == current_run.next_offset:
+            current_run.append(before[offset], after[offset])
+        else:
+            deltas.append(current_run)
+            current_run = monitor.MemoryDelta(offset, [before[offset]], [after[offset]])
+    if current_run is not None:
+        deltas.append(current_run)
+    return deltas
+
+
+def sliced_runs(
+    offsets: list[int], before: bytes, after: bytes, intervals, max_gap: int = 0
+) -> list:
+    return [
+        monitor.MemoryDelta(start, list(before[start:stop]), list(after[start:stop]))
+        for start, stop in diff.find_runs(offsets, intervals, max_gap)
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func(*args)
+    return (time.perf_counter() - start) / REPEATS, result
+
+
+def main():
+    rng = random.Random(0)
+    numpy_module = diff.numpy
+    for name, data_size in DATA_SIZES.items():
+        before = rng.randbytes(data_size)
+        intervals = [range(0, data_size)]
+        cases = {}
+        after = bytearray(before)
+        for _ in range(30):
+            after[rng.randrange(data_size)] ^= 0xFF
+        cases["30 scattered changes"] = bytes(after)
+        after = bytearray(before)
+        for offset in range(0x8000, 0x18000):
+            if rng.random() < 0.7:
+                after[offset] ^= 0xFF
+        cases["64 KiB reshuffled"] = bytes(after)
+
+        print(f"{name}: {data_size:,} bytes")
+        for label, after in cases.items():
+            offsets = diff.changed_offsets(before, after, intervals)
+            baseline, expected = timed(append_runs, offsets, before, after)
+            print(f"  {label}: {len(offsets)} changed bytes")
+            print(f"    appending:           {baseline * 1000:8.3f} ms")
+            for engine, module in (("numpy", numpy_module), ("python", None)):
+                if engine == "numpy" and module is None:
+                    continue
+                diff.numpy = module
+                elapsed, found = timed(sliced_runs, offsets, before, after, intervals)
+                assert found == expected
+                print(
+                    f"    find_runs, {engine + ':':7}   {elapsed * 1000:8.3f} ms "
+                    f"({baseline / elapsed:.1f}x)"
+                )
+                elapsed, found = timed(
+                    sliced_runs, offsets, before, after, intervals, 4
+                )
+                print(
+                    f"    find_runs, gap 4:    {elapsed * 1000:8.3f} ms "
+                    f"({len(found)} deltas, {len(expected)} without gaps)"
+                )
+            diff.numpy = numpy_module
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Compare the literal-prefilter anchor scan with a regex scan.
+
+The synthetic "process memory" is a large buffer split into regions, with the
+anchor near the end so both scans read almost all of it. Reads copy out of the
+buffer, as reads from another process do. On Linux, the same image is also
+held by a child process and scanned through /proc, comparing
+ProcMem.pattern_scan_all (regex) with ProcMemReader.find_anchors.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_anchor_scan.py [size in GiB, default 2]
+"""
+
+import os
+import random
+import re
+import subprocess
+import sys
+import textwrap
+import time
+
+from xcxtool.readers.anchors import Anchor, scan_anchor
+from xcxtool.readers.procmem import ProcMem, ProcMemReader
+
+PATTERNS = {"WiiU": b"Nagi.{2804}Lao", "DE": b"Nagi.{4076}Lao"}
+REGION_SIZE = 64 * 1024 * 1024
+BLOCK_SIZE = 1024 * 1024
+
+
+def build_memory(size: int, pattern: bytes) -> bytearray:
+    rng = random.Random(0)
+    block = bytearray(rng.randbytes(BLOCK_SIZE))
+    # Plenty of false starts: the prefix appears often without the suffix
+    for position in range(0, BLOCK_SIZE, 4096):
+        block[position : position + 4] = b"Nagi"
+    memory = bytearray(block * (size // BLOCK_SIZE))
+    anchor = Anchor.from_pattern(pattern)
+    position = size - REGION_SIZE // 2 + 12345
+    memory[position : position + 4] = anchor.prefix
+    memory[position + anchor.suffix_offset : position + len(anchor)] = anchor.suffix
+    return memory
+
+
+def regex_scan(memory: memoryview, regions, pattern: bytes) -> list[int]:
+    """Scan each region with one regex search, as pymem.pattern_scan_all does"""
+    found = []
+    for start, end in regions:
+        data = bytes(memory[start:end])
+        found.extend(start + m.start() for m in re.finditer(pattern, data, re.DOTALL))
+    return found
+
+
+CHILD_SCRIPT = textwrap.dedent(
+    """
+    import ctypes, sys
+    sys.path[:0] = sys.argv[3:]
+    from bench_anchor_scan import build_memory
+    memory = build_memory(int(sys.argv[1]), sys.argv[2].encode("latin-1"))
+    buffer = (ctypes.c_char * len(memory)).from_buffer(memory)
+    print(ctypes.addressof(buffer), flush=True)
+    sys.stdin.read()
+    """
+)
+
+
+def process_scan(size: int, pattern: bytes) -> None:
+    """Scan a child process holding the synthetic memory"""
+    child = subprocess.Popen(
+        [sys.executable, "-c", CHILD_SCRIPT, str(size), pattern.decode("latin-1")]
+        + [os.path.dirname(os.path.abspath(__file__))],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        address = int(child.stdout.readline())
+        process = ProcMem(child.pid)
+        regex_time, expected = timed(
+            process.pattern_scan_all, pattern, return_multiple=True
+        )
+        reader = ProcMemReader.__new__(ProcMemReader)
+        reader.pymem = process
+        elapsed, found = timed(reader.find_anchors, pattern)
+        assert address + size - REGION_SIZE // 2 + 12345 in found
+        assert sorted(found) == sorted(expected)
+        print(f"  process, regex scan:  {regex_time:8.3f} s")
+        print(
+            f"  process, prefilter:   {elapsed:8.3f} s ({regex_time / elapsed:.1f}x)"
+        )
+    finally:
+        child.stdin.close()
+        child.wait()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    size = int(float(sys.argv[1] if len(sys.argv) > 1 else 2) * 1024**3)
+    size -= size % REGION_SIZE
+    regions = [(start, start + REGION_SIZE) for start in range(0, size, REGION_SIZE)]
+    print(f"{size / 1024**3:.1f} GiB in {len(regions)} regions, {os.cpu_count()} CPUs")
+
+    for name, pattern in PATTERNS.items():
+        memory = build_memory(size, pattern)
+        view = memoryview(memory)
+
+        def read_bytes(address: int, length: int) -> bytes:
+            return bytes(view[address : address + length])
+
+        regex_time, expected = timed(regex_scan, view, regions, pattern)
+        anchor = Anchor.from_pattern(pattern)
+        print(f"{name} anchor {pattern!r}")
+        print(f"  regex scan:           {regex_time:8.3f} s")
+        for workers in (1, os.cpu_count() or 1):
+            elapsed, found = timed(
+                scan_anchor, read_bytes, regions, anchor, workers=workers
+            )
+            assert found == expected, (found, expected)
+            print(
+                f"  prefilter, {workers:2} threads: {elapsed:8.3f} s "
+                f"({regex_time / elapsed:.1f}x)"
+            )
+        del view, memory
+        if sys.platform.startswith("linux"):
+            process_scan(size, pattern)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare the two-byte checksum engine with the original per-byte loop.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_checksum.py
+"""
+
+import random
+import timeit
+
+from xcxtool.savefiles import checksum
+
+SIZES = {"WiiU gamedata": 359_984, "DE gamedata": 696_832}
+
+
+def reference_checksum(data: bytes) -> int:
+    hash_ = len(data)
+    for byte in data:
+        hash_ = checksum.CRC_TABLE[(hash_ ^ byte) & 0xFF] ^ (hash_ >> 8)
+    return hash_
+
+
+def best_of(func, *args, repeat: int = 5, number: int = 1) -> float:
+    return min(timeit.repeat(lambda: func(*args), repeat=repeat, number=number)) / number
+
+
+def main():
+    numpy = checksum.numpy
+    builders = {"numpy": numpy, "stdlib": None} if numpy is not None else {"stdlib": None}
+    print("slice table build")
+    for builder, module in builders.items():
+        checksum.numpy = module
+        elapsed = best_of(checksum.slice_table.__wrapped__)
+        print(f"  {builder + ':':15} {elapsed * 1000:9.3f} ms")
+    checksum.numpy = numpy
+    checksum.slice_table()
+
+    rng = random.Random(0)
+    for name, size in SIZES.items():
+        data = rng.randbytes(size)
+        reference = best_of(reference_checksum, data)
+        elapsed = best_of(checksum.calculate_checksum, data)
+        print(f"{name} ({size:,} bytes)")
+        print(f"  reference loop: {reference * 1000:9.3f} ms")
+        print(f"  slicing-by-2:   {elapsed * 1000:9.3f} ms ({reference / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the block-skipping diff with a byte-by-byte comparison.
+
+Save data of both sizes is compared with copies that have a few scattered
+bytes changed, as in a typical monitoring tick, and with a copy where a
+large block has changed. changed_offsets() is timed with NumPy and with the
+pure Python fallback.
+
+Then the scattered changes are compared with many include and exclude ranges,
+checking each changed offset against the range lists as Comparator used to,
+and with the ranges compiled into an interval set and mask.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_diff.py
+"""
+
+import random
+import time
+
+from xcxtool.monitor import monitor
+from xcxtool.readers import diff
+
+DATA_SIZES = {"WiiU": 359_984, "DE": 696_832}
+REPEATS = 20
+
+
+def byte_by_byte(before: bytes, after: bytes, intervals: list[range]) -> list[int]:
+    """The comparison Comparator used to make"""
+    return [
+        offset
+        for offset, (b, a) in enumerate(zip(before, after))
+        if b != a and any(offset in r for r in intervals)
+    ]
+
+
+def timed(func, *args, repeats: int = REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    rng = random.Random(0)
+    numpy_module = diff.numpy
+    for name, data_size in DATA_SIZES.items():
+        before = rng.randbytes(data_size)
+        intervals = [range(0, data_size)]
+        cases = {}
+        for changes in (0, 30, 1000):
+            after = bytearray(before)
+            for _ in range(changes):
+                after[rng.randrange(data_size)] ^= 0xFF
+            cases[f"{changes} scattered changes"] = bytes(after)
+        after = bytearray(before)
+        after[0x8000:0x18000] = rng.randbytes(0x10000)
+        cases["64 KiB changed"] = bytes(after)
+
+        print(f"{name}: {data_size:,} bytes")
+        for label, after in cases.items():
+            baseline, expected = timed(byte_by_byte, before, after, intervals)
+            print(f"  {label}")
+            print(f"    byte by byte:   {baseline * 1000:8.3f} ms")
+            for engine, module in (("numpy", numpy_module), ("python", None)):
+                if engine == "numpy" and module is None:
+                    continue
+                diff.numpy = module
+                elapsed, found = timed(
+                    diff.changed_offsets, before, after, intervals
+                )
+                assert found == expected
+                print(
+                    f"    blocks, {engine + ':':7} {elapsed * 1000:8.3f} ms "
+                    f"({baseline / elapsed:.1f}x)"
+                )
+            diff.numpy = numpy_module
+
+        compare_many_ranges(before, cases)
+
+
+def compare_many_ranges(before: bytes, cases: dict[str, bytes]):
+    data_size = len(before)
+    includes = [range(n, n + 200) for n in range(0, data_size, 256)]
+    excludes = [range(n, n + 8) for n in range(0, data_size, 1024)]
+    intervals = monitor.monitored_intervals(includes, excludes, data_size)
+    mask = diff.offset_mask(intervals, data_size)
+
+    def range_lists(after: bytes) -> list[int]:
+        return [
+            offset
+            for offset in diff.changed_offsets(before, after, [range(data_size)])
+            if any(offset in r for r in includes)
+            and not any(offset in r for r in excludes)
+        ]
+
+    print(f"  {len(includes)} includes, {len(excludes)} excludes")
+    for label, after in list(cases.items())[:3]:
+        baseline, expected = timed(range_lists, after, repeats=1)
+        print(f"  {label}")
+        print(f"    range lists:    {baseline * 1000:8.3f} ms")
+        for name, args in (("intervals", ()), ("mask", (None, mask))):
+            elapsed, found = timed(
+                diff.changed_offsets, before, after, intervals, *args
+            )
+            assert found == expected
+            print(
+                f"    {name + ':':15} {elapsed * 1000:8.3f} ms "
+                f"({baseline / elapsed:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare the bulk keystream transform with the original per-byte loop.
+
+Both the NumPy and the stdlib (big-int XOR) paths are expected to be at
+least 50x faster than the reference loop. Timings vary from run to run, so
+compare the ratios rather than the absolute times.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_encryption.py
+"""
+
+import random
+import timeit
+
+from xcxtool.savefiles import encryption
+
+SIZES = {"WiiU gamedata": 359_984, "DE gamedata": 696_832}
+
+
+def reference_transform(save_data: bytes, key: bytes, key_position: int) -> bytes:
+    decrypted = []
+    for data_index, byte in enumerate(save_data[4:]):
+        byte ^= data_index & 0xFF
+        byte ^= key[key_position] ^ 0xFF
+        decrypted.append(byte)
+        key_position = (key_position + 1) % 512
+    return save_data[0:4] + bytes(decrypted)
+
+
+def best_of(func, *args, repeat: int = 5, number: int = 1) -> float:
+    return min(timeit.repeat(lambda: func(*args), repeat=repeat, number=number)) / number
+
+
+def main():
+    rng = random.Random(0)
+    key = encryption.get_key("big")
+    numpy = encryption.numpy
+    for name, size in SIZES.items():
+        data = rng.randbytes(size)
+        reference = best_of(reference_transform, data, key, 123, repeat=3)
+        print(f"{name} ({size:,} bytes)")
+        print(f"  reference loop: {reference * 1000:9.3f} ms")
+        engines = {"numpy": numpy, "stdlib": None} if numpy is not None else {"stdlib": None}
+        for engine, module in engines.items():
+            encryption.numpy = module
+            elapsed = best_of(encryption.transform, data, key, 123, number=20)
+            print(
+                f"  {engine + ':':15} {elapsed * 1000:9.3f} ms "
+                f"({reference / elapsed:,.0f}x)"
+            )
+        encryption.numpy = numpy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compare unpipelined and pipelined reads over TCP Gecko.
+
+A GeckoServer serves a synthetic save image on localhost, through a proxy
+that adds a round-trip delay to stand in for the network latency to a WiiU.
+Three ways of reading the token ranges used by the backup command are timed:
+one request per range waiting for each reply, every range pipelined without
+coalescing, and a snapshot (coalesced and pipelined). A read of the whole
+save data is timed too.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_gecko.py [latency in ms, default 2]
+"""
+
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+
+from xcxtool.backup.tokens import TOKEN_RANGES
+from xcxtool.readers import gecko_server
+from xcxtool.readers.gecko import DEFAULT_DATA_START, GeckoConnection, GeckoReader
+
+DATA_SIZE = 359_984
+REPEATS = 20
+RANGE_SETS = {
+    "backup tokens": TOKEN_RANGES,
+    # Small fields spread over the save, as a monitor include list might be
+    "scattered fields": [range(o, o + 16) for o in range(0x100, DATA_SIZE, 0x1000)],
+}
+
+
+class LatencyProxy:
+    """Forward one TCP connection, delaying data by latency / 2 each way.
+
+    The delay is applied to data in flight rather than per request, like a
+    real network link, so pipelined requests overlap.
+    """
+
+    def __init__(self, target_port: int, latency: float):
+        self.latency = latency
+        self.target_port = target_port
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        client, _ = self.listener.accept()
+        server = socket.create_connection(("127.0.0.1", self.target_port))
+        for sock in (client, server):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for source, destination in ((client, server), (server, client)):
+            pending = queue.SimpleQueue()
+            threading.Thread(
+                target=self._receive, args=(source, pending), daemon=True
+            ).start()
+            threading.Thread(
+                target=self._send, args=(destination, pending), daemon=True
+            ).start()
+
+    def _receive(self, source: socket.socket, pending: queue.SimpleQueue):
+        while data := source.recv(65536):
+            pending.put((time.perf_counter() + self.latency / 2, data))
+        pending.put((0, b""))
+
+    @staticmethod
+    def _send(destination: socket.socket, pending: queue.SimpleQueue):
+        while True:
+            due, data = pending.get()
+            if not data:
+                destination.close()
+                return
+            time.sleep(max(0.0, due - time.perf_counter()))
+            destination.sendall(data)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(*args)
+    return (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    latency = float(sys.argv[1] if len(sys.argv) > 1 else 2) / 1000
+    image = bytearray(random.Random(0).randbytes(DATA_SIZE))
+    server = gecko_server.GeckoServer(image, DEFAULT_DATA_START, ("127.0.0.1", 0))
+    with server.start():
+        proxy = LatencyProxy(server.port, latency)
+        reader = GeckoReader(
+            GeckoConnection("127.0.0.1", proxy.port), DEFAULT_DATA_START
+        )
+
+        for name, ranges in RANGE_SETS.items():
+            compare(reader, name, list(ranges), latency)
+        elapsed = timed(reader.read_memory, 0, DATA_SIZE)
+        print(f"whole save data: {elapsed * 1000:8.2f} ms")
+        reader.close()
+
+
+def compare(reader: GeckoReader, name: str, ranges: list[range], latency: float):
+    def one_at_a_time():
+        for r in ranges:
+            reader.read_memory(r.start, len(r))
+
+    def pipelined():
+        reader.connection.read_many(
+            [(DEFAULT_DATA_START + r.start, len(r)) for r in ranges]
+        )
+
+    def snapshot():
+        with reader.snapshot(ranges):
+            for r in ranges:
+                reader.view(r.start, len(r))
+
+    print(f"{name}: {len(ranges)} ranges, {latency * 1000:.1f} ms round trip")
+    baseline = timed(one_at_a_time)
+    print(f"  one request per range: {baseline * 1000:8.2f} ms")
+    for method, func in [("pipelined", pipelined), ("snapshot", snapshot)]:
+        elapsed = timed(func)
+        print(
+            f"  {method + ':':22} {elapsed * 1000:8.2f} ms "
+            f"({baseline / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark the monitor pipeline by replaying a synthetic recording.
+
+A recording of save data is generated in which a few bytes change every
+frame, as they do while the game runs, with occasional bursts of larger
+changes. It is played back unthrottled through Comparator.monitor(), and
+each result is named, formatted and converted to JSON as MonitorEmu does, so
+the timings cover the whole pipeline apart from the emulator itself. Each
+case is run with and without double buffering, and the peak memory allocated
+by a single compare is measured with tracemalloc.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_monitor.py [frames, default 50]
+"""
+
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from xcxtool.monitor import monitor
+from xcxtool.readers.replay import ReplayReader, ReplayRecorder
+
+DATA_SIZES = {"WiiU": 359_984, "DE": 696_832}
+
+
+def build_recording(path: str, data_size: int, frames: int) -> None:
+    rng = random.Random(0)
+    data = bytearray(rng.randbytes(data_size))
+    # Counters that tick every frame, like the play time
+    counters = [rng.randrange(data_size - 4) for _ in range(4)]
+    with ReplayRecorder(path, data_size) as recorder:
+        for frame in range(frames):
+            for offset in counters:
+                data[offset] = (data[offset] + 1) & 0xFF
+            for _ in range(rng.randrange(16)):
+                data[rng.randrange(data_size)] = rng.randrange(256)
+            if frame % 50 == 25:
+                start = rng.randrange(data_size - 4096)
+                data[start : start + 4096] = rng.randbytes(4096)
+            recorder.record(data, timestamp=frame * 0.5)
+
+
+def run_monitor(
+    path: str,
+    data_size: int,
+    aggregate: bool,
+    include: list[range] | None = None,
+    double_buffered: bool = False,
+) -> tuple[float, int, int]:
+    reader = ReplayReader(path, speed=None)
+    named_ranges = monitor.NamedRanges(
+        {range(n, n + 0x100): f"range {n:#x}" for n in range(0, data_size, 0x1000)}
+    )
+    start = time.perf_counter()
+    comparator = monitor.Comparator(
+        reader,
+        include,
+        named_ranges=named_ranges,
+        data_size=data_size,
+        double_buffered=double_buffered,
+    )
+    ticks = changes = 0
+    for result in comparator.monitor(aggregate, interval=0):
+        ticks += 1
+        changes += len(result.changes)
+        result.format()
+        json.dumps(result.to_json())
+    elapsed = time.perf_counter() - start
+    reader.close()
+    return elapsed, ticks, changes
+
+
+def peak_allocation(path: str, data_size: int, double_buffered: bool) -> int:
+    """Return the largest peak allocation of one compare() over a few frames"""
+    reader = ReplayReader(path, speed=None)
+    comparator = monitor.Comparator(
+        reader, data_size=data_size, double_buffered=double_buffered
+    )
+    peaks = []
+    tracemalloc.start()
+    for _ in range(10):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        comparator.compare()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    reader.close()
+    return max(peaks)
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as directory:
+        for name, data_size in DATA_SIZES.items():
+            path = os.path.join(directory, f"{name}.rec")
+            build_recording(path, data_size, frames)
+            print(f"{name}: {data_size:,} bytes, {frames} frames")
+            # A few small regions, as watched with --include
+            narrow = [range(n, n + 0x100) for n in range(0x1000, 0x9000, 0x2000)]
+            cases = itertools.product((False, True), (None, narrow), (False, True))
+            for aggregate, include, double_buffered in cases:
+                elapsed, ticks, changes = run_monitor(
+                    path, data_size, aggregate, include, double_buffered
+                )
+                label = "aggregate_compare" if aggregate else "compare"
+                label += " (include)" if include else ""
+                label += " (double)" if double_buffered else ""
+                print(
+                    f"  {label + ':':38} {elapsed:7.3f} s, "
+                    f"{elapsed / ticks * 1000:7.2f} ms/tick, "
+                    f"{ticks / elapsed:7.1f} ticks/s ({changes} changes)"
+                )
+            for double_buffered in (False, True):
+                peak = peak_allocation(path, data_size, double_buffered)
+                label = "double buffered" if double_buffered else "single buffered"
+                print(f"  peak allocation per tick, {label}: {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare indexed NamedRanges lookups with a linear scan of the ranges.
+
+Names are looked up for a tick's worth of changed offsets, using the default
+named ranges from the config and a larger generated set.
+
+Run with xcxtool installed (e.g. in the project virtual environment):
+
+    python benchmarks/bench_named_ranges.py
+"""
+
+import random
+import time
+
+from xcxtool.config.defaults import CONFIG_DEFAULTS
+from xcxtool.monitor.monitor import NamedRanges
+
+REPEATS = 50
+
+
+def linear_get_name(named_ranges: NamedRanges, value: int) -> str:
+    """The lookup NamedRanges used before it was indexed"""
+    for range_, name in named_ranges.ranges:
+        if value in range_:
+            return name
+    return ""
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func(*args)
+    return (time.perf_counter() - start) / REPEATS, result
+
+
+def main():
+    rng = random.Random(0)
+    default = NamedRanges()
+    default.add_from_config(CONFIG_DEFAULTS["named_ranges"])
+    generated = NamedRanges()
+    generated.add_from_config(CONFIG_DEFAULTS["named_ranges"])
+    for n in range(500):
+        start = rng.randrange(0x5E710)
+        generated.add_range(f"field {n}", range(start, start + rng.randrange(1, 64)))
+
+    for label, named in (("default", default), ("generated", generated)):
+        for count in (30, 1000):
+            offsets = sorted(rng.randrange(0x5E710) for _ in range(count))
+            baseline, expected = timed(
+                lambda: [linear_get_name(named, o) for o in offsets]
+            )
+            single, _ = timed(lambda: [named.get_name(o) for o in offsets])
+            batched, names = timed(named.get_names, offsets)
+            assert names == expected
+            print(f"{label} ranges ({len(named.ranges)}), {count} offsets")
+            print(f"  linear scan: {baseline * 1000:8.3f} ms")
+            print(
+                f"  get_name:    {single * 1000:8.3f} ms ({baseline / single:.0f}x)"
+            )
+            print(
+                f"  get_names:   {batched * 1000:8.3f} ms "
+                f"({baseline / batched:.0f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
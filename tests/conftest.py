@@ -0,0 +1,56 @@
+import os
+import struct
+import typing
+
+import pytest
+from plumbum import local
+
+from xcxtool import config
+from xcxtool.savefiles.checksum import fix_checksum
+from xcxtool.savefiles.encryption import encrypt_save_data
+
+
+@pytest.fixture(autouse=True)
+def user_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep the xcxtool cache directory out of the real user cache"""
+    cache_dir = local.path(tmp_path_factory.mktemp("cache"))
+    monkeypatch.setattr(config, "get_cache_dir", lambda: cache_dir)
+    monkeypatch.setattr(config.main, "get_cache_dir", lambda: cache_dir)
+    return cache_dir
+
+
+class SyntheticSave(typing.NamedTuple):
+    plain: bytes
+    encrypted: bytes
+
+
+def _make_save(
+    body: bytes,
+    endian: str = "big",
+    *,
+    checksum: bool = True,
+    key_position: int = 12,
+    path: os.PathLike | None = None,
+    mtime_ns: int | None = None,
+) -> SyntheticSave:
+    fmt = ">4I" if endian == "big" else "<4I"
+    plain = struct.pack(fmt, 0, 1, 0, len(body)) + body
+    if checksum:
+        plain = fix_checksum(plain, endian)
+    encrypted = encrypt_save_data(plain, endian, key_position=key_position)
+    if path is not None:
+        with open(path, "wb") as f:
+            f.write(encrypted)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+    return SyntheticSave(plain, encrypted)
+
+
+@pytest.fixture(scope="session")
+def make_save():
+    """Build synthetic save data from a body, optionally writing it to path.
+
+    The header has a valid data size and, unless checksum=False, checksum.
+    Returns the decrypted and encrypted data.
+    """
+    return _make_save
@@ -0,0 +1,125 @@
+"""Tests for xcxtool.savefiles.checksum"""
+
+import random
+import struct
+
+import pytest
+
+from xcxtool.savefiles import checksum
+from xcxtool.savefiles.checksum import (
+    CRC_TABLE,
+    SaveChecksum,
+    calculate_checksum,
+    fix_checksum,
+    patch_checksum,
+    patch_save_data,
+    verify_checksum,
+)
+
+
+def reference_checksum(data: bytes) -> int:
+    """The original byte-at-a-time implementation of calculate_checksum()"""
+    hash_ = len(data)
+    for byte in data:
+        hash_ = CRC_TABLE[(hash_ ^ byte) & 0xFF] ^ (hash_ >> 8)
+    return hash_
+
+
+@pytest.fixture(scope="module")
+def body() -> bytes:
+    return random.Random(2).randbytes(5_001)
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 1_000, 5_001])
+def test_calculate_checksum_matches_reference(body, length):
+    assert calculate_checksum(body[:length]) == reference_checksum(body[:length])
+
+
+def test_slice_table_stdlib_matches_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    fast = checksum.slice_table()
+    monkeypatch.setattr(checksum, "numpy", None)
+    assert checksum.slice_table.__wrapped__() == fast
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_fix_checksum(body, endian, make_save):
+    save_data = make_save(body, endian, checksum=False).plain
+    assert not verify_checksum(save_data, endian)
+    fixed = fix_checksum(save_data, endian)
+    assert verify_checksum(fixed, endian)
+    assert int.from_bytes(fixed[8:12], endian) == reference_checksum(body)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 5_001])
+def test_save_checksum_chunked_updates(body, chunk_size):
+    hasher = SaveChecksum(len(body))
+    for start in range(0, len(body), chunk_size):
+        hasher.update(body[start : start + chunk_size])
+    assert hasher.digest() == reference_checksum(body)
+
+
+def test_save_checksum_copy(body):
+    hasher = SaveChecksum(len(body), body[:101])
+    copied = hasher.copy()
+    copied.update(body[101:])
+    assert copied.digest() == reference_checksum(body)
+    assert hasher.digest() != copied.digest()
+
+
+def test_verify_checksum_encrypted_data(body):
+    with pytest.raises(ValueError):
+        verify_checksum(struct.pack(">4I", 0, 2, 0, len(body)) + body)
+
+
+@pytest.mark.parametrize("length", [1, 2, 3, 100, 5_001])
+def test_unwind_checksum(body, length):
+    data = body[:length]
+    state = 0x12345678
+    after = checksum._update_checksum(state, data)
+    assert checksum._unwind_checksum(after, data) == state
+
+
+@pytest.mark.parametrize(
+    "patches",
+    [
+        [(4_990, b"\xff\xfe")],
+        [(4_000, b"abc"), (5_000, b"z")],
+        [(10, b"early"), (4_500, b"late")],
+        [(0, b"\x00")],
+        [(100, b"\xff\xff"), (100, b"\x00")],
+        [(4_990, b"late"), (4_988, b"overlap")],
+    ],
+)
+def test_patch_checksum(body, patches):
+    patched = bytearray(body)
+    for offset, new_bytes in patches:
+        patched[offset : offset + len(new_bytes)] = new_bytes
+    old = calculate_checksum(body)
+    assert patch_checksum(old, body, patches) == reference_checksum(patched)
+
+
+def test_patch_checksum_outside_data(body):
+    with pytest.raises(ValueError):
+        patch_checksum(0, body, [(len(body) - 1, b"xx")])
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_patch_save_data(body, endian, make_save):
+    save_data = make_save(body, endian).plain
+    patched = patch_save_data(save_data, [(0x1000, b"\x01\x02\x03")], endian)
+    assert patched[0x1000:0x1003] == b"\x01\x02\x03"
+    assert verify_checksum(patched, endian)
+
+
+def test_patch_save_data_overlapping_patches(body, make_save):
+    save_data = make_save(body).plain
+    patched = patch_save_data(save_data, [(100, b"\xff\xff"), (100, b"\x00")])
+    assert patched[100:102] == b"\x00\xff"
+    assert verify_checksum(patched)
+
+
+def test_patch_save_data_header(body, make_save):
+    save_data = make_save(body).plain
+    with pytest.raises(ValueError):
+        patch_save_data(save_data, [(8, b"\x00")])
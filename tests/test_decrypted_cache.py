@@ -0,0 +1,72 @@
+"""Tests for xcxtool.savefiles.cache"""
+
+import os
+
+from xcxtool.readers.save_files import SaveFileReader
+from xcxtool.savefiles.cache import DecryptedSaveCache, cache_key, get_decrypted_cache
+
+
+def test_cache_key_changes_with_file(tmp_path, make_save):
+    save_file = tmp_path / "gamedata"
+    make_save(b"a" * 100, path=save_file, mtime_ns=1_000_000_000)
+    key = cache_key(save_file)
+    assert key == cache_key(save_file)
+
+    make_save(b"b" * 100, path=save_file, mtime_ns=1_000_000_000)
+    assert cache_key(save_file) != key
+    assert cache_key(tmp_path / "missing") is None
+
+
+def test_cache_round_trip_and_invalidation(tmp_path, make_save):
+    cache = DecryptedSaveCache(tmp_path / "cache", max_size=1_000_000)
+    save_file = tmp_path / "gamedata"
+    plain = make_save(b"a" * 100, path=save_file).plain
+    assert cache.get(save_file) is None
+    cache.put(save_file, plain)
+    assert cache.get(save_file) == plain
+
+    os.utime(save_file, ns=(0, 0))
+    assert cache.get(save_file) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path, make_save):
+    cache = DecryptedSaveCache(tmp_path / "cache", max_size=250)
+    files = [tmp_path / f"gamedata{n}" for n in range(3)]
+    for n, save_file in enumerate(files):
+        plain = make_save(bytes([n]) * 100, path=save_file).plain
+        cache.put(save_file, plain)
+        entry = cache._entry_path(save_file)
+        os.utime(entry, ns=(n * 10**9, n * 10**9))
+    cache.evict()
+    assert cache.get(files[0]) is None
+    assert cache.get(files[1]) is not None
+    assert cache.get(files[2]) is not None
+
+
+def test_save_file_reader_uses_cache(tmp_path, make_save):
+    save_file = tmp_path / "gamedata"
+    plain = make_save(bytes(range(256)) * 4, path=save_file).plain
+    assert SaveFileReader(save_file).data[4:] == plain[4:]
+
+    cached = get_decrypted_cache().get(save_file)
+    assert cached[4:] == plain[4:]
+    reader = SaveFileReader(save_file)
+    assert "data" in reader.__dict__
+    assert reader.read_memory(16, 4) == plain[16:20]
+
+
+def test_save_file_reader_caches_data_it_read(tmp_path, make_save):
+    save_file = tmp_path / "gamedata"
+    old = make_save(b"A" * 100, path=save_file, mtime_ns=1_000_000_000).plain
+    reader = SaveFileReader(save_file)
+    # The file is saved again before the reader decrypts it
+    new = make_save(b"B" * 100, path=save_file, mtime_ns=2_000_000_000).plain
+    assert reader.data[16:] == old[16:]
+
+    assert SaveFileReader(save_file).data[16:] == new[16:]
+    assert get_decrypted_cache().get(save_file)[16:] == new[16:]
+
+
+def test_cache_is_in_test_directory(user_cache_dir):
+    cache = get_decrypted_cache()
+    assert cache.directory.startswith(str(user_cache_dir))
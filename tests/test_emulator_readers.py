@@ -0,0 +1,272 @@
+"""Tests for xcxtool.readers.emulators, using a process stand-in"""
+
+import ctypes
+import os
+import re
+import types
+
+import pytest
+
+from xcxtool.backup import tokens
+from xcxtool.readers.anchors import (
+    Anchor,
+    anchor_cache_key,
+    process_start_time,
+    scan_anchor,
+)
+from xcxtool.readers import emulators
+from xcxtool.readers.emulators import PymemReader, PymemReaderBase
+from xcxtool.readers.save_files import SnapshotMixin, coalesce_ranges
+
+
+class FakeProcess:
+    """Stands in for pymem.Pymem, recording each read"""
+
+    process_handle = None
+
+    def __init__(self, memory: bytearray):
+        self.memory = memory
+        self.reads = []
+        self.scans = 0
+        self.process_id = os.getpid()
+        self.base_address = 0x140000000
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        self.reads.append((address, length))
+        return bytes(self.memory[address : address + length])
+
+    def pattern_scan_all(self, pattern: bytes, return_multiple: bool = False):
+        self.scans += 1
+        matches = [m.start() for m in re.finditer(pattern, self.memory, re.DOTALL)]
+        if return_multiple:
+            return matches
+        return matches[0] if matches else None
+
+
+class FakeReader(PymemReaderBase):
+    byte_order = "big"
+
+    def search(self) -> int:
+        return 0x100
+
+
+class FakePymemReader(PymemReader):
+    def _read_address_into(self, address, target):
+        target[:] = self.pymem.read_bytes(address, len(target))
+
+    def scan_regions(self):
+        self.pymem.scans += 1
+        yield 0, 0x20000
+        yield 0x20000, len(self.pymem.memory)
+
+
+@pytest.fixture
+def process():
+    return FakeProcess(bytearray(i & 0xFF for i in range(0x50000)))
+
+
+def test_coalesce_ranges():
+    ranges = [range(50, 60), range(0, 10), range(5, 20), range(25, 30), range(7, 7)]
+    assert coalesce_ranges(ranges) == [range(0, 20), range(25, 30), range(50, 60)]
+    assert coalesce_ranges(ranges, max_gap=5) == [range(0, 30), range(50, 60)]
+
+
+def test_snapshot_coalesces_reads(process):
+    reader = FakeReader(process)
+    with reader.snapshot([range(0, 16), range(32, 48), range(0x40000, 0x40004)]):
+        process.memory[0x100:0x200] = bytes(0x100)
+        assert reader.read_memory(4, 8) == bytes(range(0x04, 0x0C))
+        assert reader.view(40, 4) == bytes(range(0x28, 0x2C))
+        buffer = bytearray(4)
+        reader.readinto(0x40000, buffer)
+        assert buffer == bytes([0, 1, 2, 3])
+        assert len(process.reads) == 2
+        # Reads outside the snapshot go to the process
+        assert reader.read_memory(100, 2) == b"\x00\x00"
+    assert reader.read_memory(4, 8) == bytes(8)
+
+
+def test_readinto_ranges_reads_into_buffers(process):
+    reader = FakePymemReader.__new__(FakePymemReader)
+    reader.pymem, reader.data_start = process, 0x100
+    buffer = bytearray(0x20)
+    view = memoryview(buffer)
+    reader.readinto_ranges([(0, view[:0x10]), (0x1000, view[0x10:])])
+    assert buffer == bytes(range(0x10)) + bytes(range(0x10))
+    assert process.reads == [(0x100, 0x10), (0x1100, 0x10)]
+
+
+def test_nested_snapshot_reuses_covering_snapshot(process):
+    reader = FakeReader(process)
+    with reader.snapshot(tokens.TOKEN_RANGES):
+        reads = len(process.reads)
+        with reader.snapshot(tokens.PLAYTIME_RANGES):
+            reader.read_memory(0x45E40, 4)
+        assert len(process.reads) == reads == 3
+
+
+def test_anchor_from_pattern():
+    anchor = Anchor.from_pattern(b"Nagi.{2804}Lao")
+    assert anchor == Anchor(b"Nagi", 2804, b"Lao")
+    assert len(anchor) == 2811
+    with pytest.raises(ValueError):
+        Anchor.from_pattern(b"Nagi.*Lao")
+
+
+def test_anchor_cache_key_identifies_process(process):
+    assert process_start_time(os.getpid()) is not None
+    key = anchor_cache_key(process, "PymemReader", b"Nagi")
+    assert key == anchor_cache_key(process, "PymemReader", b"Nagi")
+    assert key != anchor_cache_key(process, "PymemReaderDE", b"Nagi")
+    process.base_address += 0x1000
+    assert key != anchor_cache_key(process, "PymemReader", b"Nagi")
+
+
+def test_cached_anchor_address_skips_scan(process):
+    anchor_address = 0x20000
+    process.memory[anchor_address : anchor_address + 4] = b"Nagi"
+    process.memory[anchor_address + 2808 : anchor_address + 2811] = b"Lao"
+
+    reader = FakePymemReader(process)
+    assert reader.data_start == anchor_address - 0x5D4
+    assert process.scans == 1
+
+    reader = FakePymemReader(process)
+    assert reader.data_start == anchor_address - 0x5D4
+    assert process.scans == 1
+
+    # A stale address is detected and the process searched again
+    process.memory[anchor_address : anchor_address + 4] = b"xxxx"
+    process.memory[0x30000 : 0x30004] = b"Nagi"
+    process.memory[0x30000 + 2808 : 0x30000 + 2811] = b"Lao"
+    reader = FakePymemReader(process)
+    assert reader.data_start == 0x30000 - 0x5D4
+    assert process.scans == 2
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1000, 1 << 20])
+def test_scan_anchor_matches_regex(chunk_size):
+    memory = bytearray(b"\x00" * 20000)
+    anchor = Anchor(b"Nagi", 20, b"Lao")
+    for position in (0, 61, 999, 5000, 19900):
+        memory[position : position + 4] = b"Nagi"
+        memory[position + 24 : position + 27] = b"Lao"
+    # A prefix without its suffix, and a match spanning two regions
+    memory[3000:3004] = b"Nagi"
+    memory[9990:9994] = b"Nagi"
+    memory[10014:10017] = b"Lao"
+
+    def read_bytes(address, length):
+        return bytes(memory[address : address + length])
+
+    regions = [(0, 9995), (9995, len(memory))]
+    expected = [
+        start + match.start()
+        for start, end in regions
+        for match in re.finditer(rb"Nagi.{20}Lao", memory[start:end], re.DOTALL)
+    ]
+    assert expected == [0, 61, 999, 5000, 19900]
+    found = scan_anchor(read_bytes, regions, anchor, chunk_size=chunk_size, workers=3)
+    assert found == expected
+    first = scan_anchor(
+        read_bytes, regions, anchor, first_only=True, chunk_size=chunk_size
+    )
+    assert first == [0]
+
+
+def test_scan_anchor_skips_unreadable_chunks():
+    def read_bytes(address, length):
+        if address < 100:
+            raise OSError("unreadable")
+        return b"Nagi-Lao" if address == 100 else b""
+
+    anchor = Anchor(b"Nagi", 1, b"Lao")
+    assert scan_anchor(read_bytes, [(0, 100), (100, 108)], anchor) == [100]
+
+
+class FakePymemMemory:
+    """Stands in for pymem.memory, as used to read a process on Windows.
+
+    regions are (start, end, state, protect) tuples, as reported by
+    virtual_query(); reads from addresses in unreadable fail.
+    """
+
+    def __init__(self, memory: bytearray, regions: list, unreadable: range):
+        self.memory = memory
+        self.regions = regions
+        self.unreadable = unreadable
+
+    def read_ctype(self, handle, address, ctype):
+        size = ctypes.sizeof(ctype)
+        if address < self.unreadable.stop and address + size > self.unreadable.start:
+            # ERROR_PARTIAL_COPY
+            raise emulators.pymem.exception.WinAPIError(299)
+        ctypes.memmove(ctype, bytes(self.memory[address : address + size]), size)
+        return ctype
+
+    def virtual_query(self, handle, address):
+        for start, end, state, protect in self.regions:
+            if start <= address < end:
+                return types.SimpleNamespace(
+                    BaseAddress=start,
+                    RegionSize=end - start,
+                    state=state,
+                    protect=protect,
+                )
+        # Everything else is free, up to the end of the address space
+        return types.SimpleNamespace(
+            BaseAddress=address, RegionSize=2**48, state=0x10000, protect=0x01
+        )
+
+
+@pytest.fixture
+def windows_memory(process, monkeypatch):
+    pytest.importorskip("pymem")
+    structure = emulators.pymem.ressources.structure
+    commit = structure.MEMORY_STATE.MEM_COMMIT
+    read_write = structure.MEMORY_PROTECTION.PAGE_READWRITE
+    regions = [
+        (0, 0x10000, commit, read_write),
+        (0x10000, 0x20000, commit, structure.MEMORY_PROTECTION.PAGE_NOACCESS),
+        (0x20000, 0x30000, structure.MEMORY_STATE.MEM_RESERVE, read_write),
+        # Reported as readable, but reads fail (e.g. freed since the query)
+        (0x30000, 0x40000, commit, read_write),
+        (0x40000, 0x50000, commit, read_write),
+    ]
+    fake = FakePymemMemory(process.memory, regions, range(0x30000, 0x40000))
+    monkeypatch.setattr(emulators.pymem, "memory", fake)
+    return fake
+
+
+def test_scan_regions_uses_committed_readable_memory(process, windows_memory):
+    reader = FakeReader(process)
+    assert list(reader.scan_regions()) == [
+        (0, 0x10000),
+        (0x30000, 0x40000),
+        (0x40000, 0x50000),
+    ]
+
+
+def test_find_anchors_skips_unreadable_memory(process, windows_memory):
+    for address in (0x8000, 0x38000, 0x48000):
+        process.memory[address : address + 4] = b"Nagi"
+        process.memory[address + 2808 : address + 2811] = b"Lao"
+    reader = FakeReader(process)
+    assert reader.find_anchors(b"Nagi.{2804}Lao") == [0x8000, 0x48000]
+
+
+def test_read_address_into_raises_memory_read_error(process, windows_memory):
+    reader = FakeReader(process)
+    buffer = bytearray(16)
+    reader.readinto(0x10, buffer)
+    assert buffer == bytes(range(0x10, 0x20))
+    with pytest.raises(emulators.pymem.exception.MemoryReadError):
+        reader.readinto(0x38000, buffer)
+
+
+def test_snapshot_mixin_requires_read_blocks():
+    class NoBlocks(SnapshotMixin):
+        pass
+
+    with pytest.raises(TypeError):
+        NoBlocks()
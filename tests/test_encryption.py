@@ -0,0 +1,145 @@
+"""Tests for xcxtool.savefiles.encryption"""
+
+import random
+
+import pytest
+
+from xcxtool.savefiles import encryption
+from xcxtool.savefiles.encryption import (
+    decrypt_range,
+    decrypt_save_data,
+    decrypt_save_data_into,
+    decrypt_stream,
+    encrypt_save_data,
+    encrypt_save_data_into,
+    get_key,
+    save_keystream,
+    transform,
+    transform_into,
+    transform_with_keystream,
+)
+
+
+def reference_transform(save_data: bytes, key: bytes, key_position: int) -> bytes:
+    """The original byte-at-a-time implementation of transform()"""
+    decrypted = []
+    for data_index, byte in enumerate(save_data[4:]):
+        byte ^= data_index & 0xFF
+        byte ^= key[key_position] ^ 0xFF
+        decrypted.append(byte)
+        key_position = (key_position + 1) % 512
+    return save_data[0:4] + bytes(decrypted)
+
+
+@pytest.fixture(params=["numpy", "stdlib"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(encryption, "numpy", None)
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def plain_data() -> bytes:
+    rng = random.Random(1)
+    return rng.randbytes(4) + b"\x00\x00\x00\x01" + rng.randbytes(10_000)
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+@pytest.mark.parametrize("key_position", [0, 1, 255, 511])
+@pytest.mark.parametrize("length", [4, 5, 516, 1_000])
+def test_transform_matches_reference(engine, plain_data, endian, key_position, length):
+    data = plain_data[:length]
+    key = get_key(endian)
+    assert transform(data, key, key_position) == reference_transform(
+        data, key, key_position
+    )
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_round_trip(engine, plain_data, endian):
+    encrypted = encrypt_save_data(plain_data, endian, key_position=-1)
+    assert encrypted != plain_data
+    assert decrypt_save_data(encrypted, endian)[4:] == plain_data[4:]
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+@pytest.mark.parametrize(
+    "offset, length", [(0, 16), (2, 10), (4, 1), (0x45E40, 4), (9_990, 100)]
+)
+def test_decrypt_range_matches_full_decryption(engine, plain_data, endian, offset, length):
+    encrypted = encrypt_save_data(plain_data, endian, key_position=300)
+    decrypted = decrypt_save_data(encrypted, endian)
+    expected = decrypted[offset : offset + length]
+    assert decrypt_range(encrypted, offset, length, endian) == expected
+
+
+def test_decrypt_range_of_decrypted_data(plain_data):
+    assert decrypt_range(plain_data, 100, 8) == plain_data[100:108]
+
+
+def test_decrypt_range_negative_offset(plain_data):
+    with pytest.raises(ValueError):
+        decrypt_range(plain_data, -1, 8)
+
+
+@pytest.mark.parametrize("length", [3, 4, 516, 10_008])
+def test_transform_into_matches_transform(engine, plain_data, length):
+    data = plain_data[:length]
+    key = get_key("big")
+    out = bytearray(length)
+    transform_into(data, out, key, 42)
+    assert out == transform(data, key, 42)
+
+
+def test_transform_into_chunk_boundaries(plain_data, monkeypatch):
+    monkeypatch.setattr(encryption, "numpy", None)
+    monkeypatch.setattr(encryption, "_INTO_CHUNK_SIZE", 1024)
+    encryption._keystream_chunk_int.cache_clear()
+    key = get_key("little")
+    out = bytearray(len(plain_data))
+    transform_into(plain_data, out, key, 7)
+    encryption._keystream_chunk_int.cache_clear()
+    assert out == transform(plain_data, key, 7)
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_decrypt_in_place(engine, plain_data, endian):
+    buffer = bytearray(encrypt_save_data(plain_data, endian, key_position=-1))
+    decrypt_save_data_into(buffer, buffer, endian)
+    assert buffer[4:] == plain_data[4:]
+
+
+def test_encrypt_into_memoryview(engine, plain_data):
+    buffer = bytearray(len(plain_data) + 8)
+    encrypt_save_data_into(plain_data, memoryview(buffer)[:-8], "big", 99)
+    assert encryption.get_initial_key_position(buffer) == 99
+    assert decrypt_save_data(bytes(buffer[:-8]))[4:] == plain_data[4:]
+
+
+def test_transform_into_small_buffer(plain_data):
+    with pytest.raises(ValueError):
+        transform_into(plain_data, bytearray(10), get_key(), 0)
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_transform_with_saved_keystream(engine, plain_data, endian):
+    first = encrypt_save_data(plain_data, endian, key_position=77)
+    second = encrypt_save_data(plain_data[::-1], endian, key_position=77)
+    block = save_keystream(first, endian)
+    assert transform_with_keystream(second, block)[4:] == plain_data[::-1][4:]
+
+
+def test_transform_with_keystream_wrong_length(plain_data):
+    with pytest.raises(ValueError):
+        transform_with_keystream(plain_data, b"\x00" * 10)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 512, 4_096])
+def test_decrypt_stream(engine, plain_data, chunk_size):
+    encrypted = encrypt_save_data(plain_data, "little", key_position=-1)
+    chunks = (
+        encrypted[i : i + chunk_size] for i in range(0, len(encrypted), chunk_size)
+    )
+    assert b"".join(decrypt_stream(chunks, "little"))[4:] == plain_data[4:]
@@ -0,0 +1,29 @@
+"""Tests for the fnav command in xcxtool.probes.main"""
+
+import types
+
+from xcxtool.probes import data, main
+from xcxtool.readers.save_files import MappedSaveFileReader
+
+
+def test_fnav_closes_save_file(tmp_path, make_save, monkeypatch):
+    save_file = tmp_path / "gamedata"
+    body = bytearray(300_000)
+    layout = data.OFFSET_SLICES_WIIU["fnav_layout"]
+    # A basic probe (type 1) at every site; offsets include the 16 byte header
+    body[layout.start - 16 : layout.stop - 16] = b"\x01" * (layout.stop - layout.start)
+    make_save(bytes(body), path=save_file)
+    readers = []
+
+    class RecordingReader(MappedSaveFileReader):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            readers.append(self)
+
+    monkeypatch.setattr(main, "MappedSaveFileReader", RecordingReader)
+    app = main.FrontierNavTool("fnav")
+    app.parent = types.SimpleNamespace(edition="wiiu", save_location=None)
+    app.include_layout = app.print = True
+    assert app.main(save_file) == 0
+    assert len(readers) == 1
+    assert readers[0]._map.closed
@@ -0,0 +1,88 @@
+"""Tests for the TCP Gecko reader, against the stand-in server"""
+
+import pytest
+
+from xcxtool.readers.gecko import GeckoConnection, GeckoReader, connect_gecko
+from xcxtool.readers.gecko_server import GeckoServer, GeckoServerApp
+
+DATA_START = 0x10000000
+
+
+@pytest.fixture
+def image():
+    image = bytearray(i * 11 & 0xFF for i in range(0x5000))
+    # A run of zeros, sent with the zero-block status
+    image[0x1000:0x2000] = bytes(0x1000)
+    return image
+
+
+@pytest.fixture
+def server(image):
+    with GeckoServer(image, DATA_START, ("127.0.0.1", 0)).start() as server:
+        yield server
+
+
+@pytest.fixture
+def reader(server):
+    reader = GeckoReader(GeckoConnection("127.0.0.1", server.port), DATA_START)
+    yield reader
+    reader.close()
+
+
+def test_server_encodes_zero_blocks(server, image):
+    reply = server.encode_read(DATA_START + 0x1000, DATA_START + 0x2010)
+    assert reply[:4] == bytes([0xB0] * 4)
+    assert reply[4] == 0xBD
+    assert reply[5:] == image[0x2000:0x2010]
+
+
+@pytest.mark.parametrize(
+    "offset, length",
+    [(0, 16), (0x3FF, 2), (0x800, 0x1900), (0x4FF0, 0x20), (0, 0x5000)],
+)
+def test_read_memory(reader, image, offset, length):
+    expected = bytes(image[offset : offset + length])
+    expected += bytes(length - len(expected))
+    assert reader.read_memory(offset, length) == expected
+    buffer = bytearray(length)
+    assert reader.readinto(offset, buffer) == length
+    assert buffer == expected
+
+
+def test_pipelined_reads(reader, image):
+    ranges = [(DATA_START + n * 0x50, 0x20) for n in range(200)]
+    results = reader.connection.read_many(ranges)
+    assert results == [bytes(image[n * 0x50 : n * 0x50 + 0x20]) for n in range(200)]
+
+
+def test_snapshot_is_consistent(reader, image):
+    original = bytes(image)
+    with reader.snapshot([range(0x10, 0x20), range(0x100, 0x110)]):
+        image[0x10:0x20] = bytes(16)
+        assert reader.read_memory(0x10, 16) == original[0x10:0x20]
+        assert reader.view(0x100, 0x10) == original[0x100:0x110]
+    assert reader.read_memory(0x10, 16) == bytes(16)
+
+
+def test_readinto_ranges(reader, image):
+    buffer = bytearray(0x3000)
+    view = memoryview(buffer)
+    reader.readinto_ranges([(0x10, view[0x10:0x20]), (0x2000, view[0x2000:0x2800])])
+    assert buffer[0x10:0x20] == image[0x10:0x20]
+    assert buffer[0x2000:0x2800] == image[0x2000:0x2800]
+    assert buffer[:0x10] == bytes(0x10)
+
+
+def test_connect_gecko(server):
+    reader = connect_gecko(f"127.0.0.1:{server.port}", DATA_START)
+    assert reader is not None
+    reader.close()
+    assert connect_gecko("127.0.0.1:1", DATA_START) is None
+
+
+def test_server_app_rejects_invalid_save_file(tmp_path, caplog):
+    save_file = tmp_path / "gamedata"
+    save_file.write_bytes(b"\xff" * 64)
+    _, retcode = GeckoServerApp.run(["gecko_server", str(save_file)], exit=False)
+    assert retcode == 1
+    assert "Could not detect byte order" in caplog.text
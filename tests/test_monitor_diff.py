@@ -0,0 +1,125 @@
+"""Tests for the block-skipping diff used by Comparator and recordings"""
+
+import random
+
+import pytest
+
+from xcxtool.monitor import monitor
+from xcxtool.readers import diff
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(diff, "numpy", None)
+    return request.param
+
+
+def reference(before: bytes, after: bytes, intervals: list[range]) -> list[int]:
+    return [
+        offset
+        for interval in intervals
+        for offset in interval
+        if before[offset] != after[offset]
+    ]
+
+
+@pytest.mark.parametrize("use_mask", [False, True])
+@pytest.mark.parametrize("changes", [0, 1, 30, 2000])
+@pytest.mark.parametrize("block_size", [None, 1, 7, 64, 4096])
+def test_changed_offsets(engine, changes, block_size, use_mask):
+    rng = random.Random(changes)
+    size = 10_007
+    before = rng.randbytes(size)
+    after = bytearray(before)
+    for _ in range(changes):
+        after[rng.randrange(size)] ^= 0x5A
+    after = bytes(after)
+    intervals = [range(0, 10), range(100, 5000), range(5001, size - 3)]
+    mask = diff.offset_mask(intervals, size) if use_mask else None
+    found = diff.changed_offsets(before, after, intervals, block_size, mask)
+    assert found == reference(before, after, intervals)
+
+
+def test_offset_mask_matches_ranges():
+    includes = [range(10, 50), range(40, 80), range(200, 300)]
+    excludes = [range(20, 25), range(70, 250)]
+    comparator = monitor.Comparator(
+        None, includes, excludes, bytes(256), data_size=256
+    )
+    assert comparator.mask == diff.offset_mask(comparator.intervals, 256)
+    for offset in range(256):
+        expected = any(offset in r for r in includes) and not any(
+            offset in r for r in excludes
+        )
+        assert comparator.mask[offset] == expected, offset
+
+
+def test_changed_offsets_edges(engine):
+    before = bytes(1000)
+    after = bytearray(before)
+    after[0] = after[63] = after[64] = after[999] = 1
+    assert diff.changed_offsets(before, bytes(after), [range(1000)], 64) == [
+        0,
+        63,
+        64,
+        999,
+    ]
+    assert diff.changed_offsets(before, bytes(after), [range(1, 999)], 64) == [
+        63,
+        64,
+    ]
+
+
+def test_compare_results_unchanged(engine):
+    before = bytearray(4096)
+    after = bytearray(before)
+    after[10:13] = b"abc"
+    after[3000] = 0xFF
+    named = monitor.NamedRanges({range(0, 100): "start"})
+    comparator = monitor.Comparator(
+        None, None, None, bytes(before), named, data_size=4096
+    )
+    result = comparator.aggregate_compare(bytes(after))
+    assert result.changes == [
+        monitor.MemoryDelta(10, [0, 0, 0], list(b"abc"), "start"),
+        monitor.MemoryDelta(3000, [0], [0xFF], ""),
+    ]
+
+
+@pytest.mark.parametrize(
+    "offsets, max_gap, expected",
+    [
+        ([], 0, []),
+        ([5], 0, [(5, 6)]),
+        ([1, 2, 3, 7, 8], 0, [(1, 4), (7, 9)]),
+        ([1, 2, 3, 7, 8], 3, [(1, 9)]),
+        ([1, 2, 3, 7, 8], 2, [(1, 4), (7, 9)]),
+        # Runs don't cross from one interval into the next
+        ([98, 99, 110, 111], 20, [(98, 100), (110, 112)]),
+        ([0, 150, 199], 100, [(0, 1), (150, 200)]),
+    ],
+)
+def test_find_runs(engine, offsets, max_gap, expected):
+    intervals = [range(0, 100), range(110, 200)]
+    assert diff.find_runs(offsets, intervals, max_gap) == expected
+
+
+def test_aggregate_compare_with_gap(engine):
+    before = bytes(4096)
+    after = bytearray(before)
+    after[100] = after[102] = after[110] = 1
+    comparator = monitor.Comparator(
+        None, [range(0, 4096)], [range(105, 108)], before, data_size=4096
+    )
+    result = comparator.aggregate_compare(bytes(after), max_gap=1)
+    assert result.changes == [
+        monitor.MemoryDelta(100, [0, 0, 0], [1, 0, 1]),
+        monitor.MemoryDelta(110, [0], [1]),
+    ]
+    comparator.previous = before
+    result = comparator.aggregate_compare(bytes(after), max_gap=8)
+    # The excluded range splits the intervals, so the runs stay apart
+    assert [d.offset for d in result.changes] == [100, 110]
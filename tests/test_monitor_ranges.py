@@ -1,2 +1,167 @@
 """Tests for the range combining/consolidating function"""
+import random
+import tracemalloc
+
+import pytest
+
 from xcxtool.monitor import *
+from xcxtool.monitor.monitor import Comparator, MemoryDelta, monitored_intervals
+from xcxtool.readers import diff
+from xcxtool.readers.save_files import SnapshotMixin
+
+
+class ChangingReader(SnapshotMixin):
+    """Reads from a bytearray that the test changes between reads"""
+
+    byte_order = "little"
+    data_start = 0
+    snapshot_max_gap = 0x10
+
+    def __init__(self, data: bytearray):
+        self.data = data
+        self.block_reads: list[list[range]] = []
+
+    def read_memory(self, offset: int, length: int) -> bytes:
+        if (snapshot := self._snapshot_view(offset, length)) is not None:
+            return snapshot.tobytes()
+        return bytes(self.data[offset : offset + length])
+
+    def _read_blocks(self, blocks: list[range]) -> list[bytes]:
+        self.block_reads.append(blocks)
+        return [bytes(self.data[b.start : b.stop]) for b in blocks]
+
+
+@pytest.mark.parametrize(
+    "includes, excludes, expected",
+    [
+        ([range(0, 100)], [], [range(0, 100)]),
+        ([range(0, 100)], [range(10, 20)], [range(0, 10), range(20, 100)]),
+        (
+            [range(50, 60), range(0, 10), range(5, 20)],
+            [],
+            [range(0, 20), range(50, 60)],
+        ),
+        ([range(0, 10)], [range(0, 10)], []),
+        ([range(0, 100)], [range(90, 200), range(0, 5)], [range(5, 90)]),
+        (
+            [range(0, 50)],
+            [range(10, 20), range(15, 30), range(40, 41)],
+            [range(0, 10), range(30, 40), range(41, 50)],
+        ),
+        ([range(0, 1000)], [], [range(0, 128)]),
+    ],
+)
+def test_monitored_intervals(includes, excludes, expected):
+    assert monitored_intervals(includes, excludes, 128) == expected
+
+
+def test_read_ranges_is_one_snapshot():
+    reader = ChangingReader(bytearray(range(256)))
+    ranges = [range(0, 4), range(8, 12), range(100, 104)]
+    assert reader.read_ranges(ranges) == [bytes(r) for r in ranges]
+    assert reader.block_reads == [[range(0, 12), range(100, 104)]]
+
+
+def test_comparator_only_reads_monitored_intervals():
+    data = bytearray(256)
+    reader = ChangingReader(data)
+    comparator = Comparator(
+        reader,
+        [range(0x10, 0x20), range(0x80, 0x90)],
+        [range(0x14, 0x18)],
+        data_size=256,
+    )
+    data[:] = bytes([1]) * 256
+    result = comparator.compare()
+    assert [d.offset for d in result.changes] == [
+        *range(0x10, 0x14),
+        *range(0x18, 0x20),
+        *range(0x80, 0x90),
+    ]
+    read = [r for blocks in reader.block_reads for r in blocks]
+    assert all(r.start >= 0x10 and r.stop <= 0x90 for r in read)
+    assert sum(len(r) for r in reader.block_reads[-1]) == 0x20
+
+
+def test_comparator_matches_byte_by_byte_compare():
+    rng = random.Random(1)
+    size = 4096
+    includes = [range(0, 1000), range(2000, 4000), range(3500, 4096)]
+    excludes = [range(100, 200), range(3900, 3950)]
+    data = bytearray(rng.randbytes(size))
+    comparator = Comparator(ChangingReader(data), includes, excludes, data_size=size)
+    for _ in range(5):
+        before = bytes(data)
+        for _ in range(50):
+            data[rng.randrange(size)] = rng.randrange(256)
+        expected = [
+            MemoryDelta(offset, [before[offset]], [data[offset]])
+            for offset in range(size)
+            if before[offset] != data[offset]
+            and any(offset in r for r in includes)
+            and not any(offset in r for r in excludes)
+        ]
+        assert comparator.compare().changes == expected
+
+
+def test_double_buffered_comparator_matches():
+    rng = random.Random(2)
+    size = 4096
+    includes = [range(0, 1000), range(2000, 4096)]
+    data = bytearray(rng.randbytes(size))
+    single = Comparator(ChangingReader(data), includes, data_size=size)
+    reader = ChangingReader(data)
+    double = Comparator(reader, includes, data_size=size, double_buffered=True)
+    buffers = []
+    for _ in range(6):
+        for _ in range(20):
+            data[rng.randrange(size)] = rng.randrange(256)
+        assert double.compare().changes == single.compare().changes
+        buffers.append(id(double.previous))
+        assert double.aggregate_compare().changes == single.aggregate_compare().changes
+        buffers.append(id(double.previous))
+    # The same two buffers are reused in turn
+    assert len(set(buffers)) == 2
+    assert buffers[0::2] == [buffers[0]] * 6
+    assert buffers[1] != buffers[0]
+
+
+def test_double_buffered_comparator_with_initial_data():
+    data = bytearray(256)
+    comparator = Comparator(
+        ChangingReader(data),
+        initial_data=bytes([1]) * 256,
+        data_size=256,
+        double_buffered=True,
+    )
+    assert len(comparator.compare().changes) == 256
+    with pytest.raises(ValueError):
+        Comparator(None, initial_data=bytes(10), data_size=256, double_buffered=True)
+
+
+class BufferReader(ChangingReader):
+    """Reads straight into the caller's buffers, as process readers do"""
+
+    def _read_blocks_into(self, targets):
+        source = memoryview(self.data)
+        for offset, buffer in targets:
+            buffer[:] = source[offset : offset + len(buffer)]
+
+
+def test_double_buffered_compare_allocation_is_bounded():
+    rng = random.Random(3)
+    size = 696_832
+    data = bytearray(rng.randbytes(size))
+    comparator = Comparator(BufferReader(data), data_size=size, double_buffered=True)
+    comparator.compare()
+    for _ in range(30):
+        data[rng.randrange(size)] ^= 0xFF
+    tracemalloc.start()
+    try:
+        result = comparator.compare()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(result.changes) == 30
+    # Only the slices being compared are copied, not the whole data
+    assert peak < 2 * diff.DIFF_COMPARE_SIZE + 32 * 1024
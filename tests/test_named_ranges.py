@@ -0,0 +1,60 @@
+"""Tests for looking up offsets in NamedRanges"""
+
+import random
+
+from xcxtool.config.defaults import CONFIG_DEFAULTS
+from xcxtool.monitor.monitor import NamedRanges
+
+
+def linear_get_name(named_ranges: NamedRanges, value: int) -> str:
+    """The lookup NamedRanges used before it was indexed"""
+    for range_, name in named_ranges.ranges:
+        if value in range_:
+            return name
+    return ""
+
+
+def test_shortest_range_wins():
+    named = NamedRanges({range(0, 100): "outer", range(10, 20): "inner"})
+    named.add_range("middle", range(5, 50))
+    assert named.get_name(0) == "outer"
+    assert named.get_name(5) == "middle"
+    assert named.get_name(10) == "inner"
+    assert named.get_name(19) == "inner"
+    assert named.get_name(20) == "middle"
+    assert named.get_name(50) == "outer"
+    assert named.get_name(100) == ""
+    assert named.get_name(-1) == ""
+
+
+def test_ties_go_to_the_first_range_added():
+    named = NamedRanges()
+    named.add_range("first", range(0, 10))
+    named.add_range("second", range(5, 15))
+    assert named.get_names([4, 5, 9, 10]) == ["first", "first", "first", "second"]
+
+
+def test_index_is_rebuilt_after_adding():
+    named = NamedRanges({range(0, 100): "outer"})
+    assert named.get_name(10) == "outer"
+    named.add_from_config({"inner": (8, 12)})
+    assert named.get_name(10) == "inner"
+
+
+def test_default_config_ranges():
+    named = NamedRanges()
+    named.add_from_config(CONFIG_DEFAULTS["named_ranges"])
+    offsets = list(range(-1, 0x60000, 7))
+    expected = [linear_get_name(named, offset) for offset in offsets]
+    assert named.get_names(offsets) == expected
+    assert [named.get_name(offset) for offset in offsets] == expected
+
+
+def test_random_ranges():
+    rng = random.Random(0)
+    named = NamedRanges()
+    for n in range(200):
+        start = rng.randrange(1000)
+        named.add_range(f"range {n}", range(start, start + rng.randrange(0, 300)))
+    offsets = range(-10, 1400)
+    assert named.get_names(offsets) == [linear_get_name(named, o) for o in offsets]
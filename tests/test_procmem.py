@@ -0,0 +1,136 @@
+"""Tests for xcxtool.readers.procmem, reading a child process"""
+
+import errno
+import logging
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from xcxtool.app import LOGGER_NAME
+from xcxtool.readers.emulators import ProcessNotFound
+from xcxtool.readers.procmem import ProcMem, ProcMemReader, find_process
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="/proc is only available on Linux"
+)
+
+PROCESS_NAME = "xcxtool-test-emulator"
+IMAGE_SIZE = 0x60000
+ANCHOR_OFFSET = 0x5D4
+
+# The child process holds a synthetic save image in memory and prints its
+# address, then waits until its stdin is closed.
+CHILD_SCRIPT = textwrap.dedent(
+    f"""
+    import ctypes, sys
+    image = bytearray(i * 7 & 0xFF for i in range({IMAGE_SIZE}))
+    image[{ANCHOR_OFFSET}:{ANCHOR_OFFSET} + 4] = b"Nagi"
+    image[{ANCHOR_OFFSET} + 2808:{ANCHOR_OFFSET} + 2811] = b"Lao"
+    buffer = (ctypes.c_char * len(image)).from_buffer(image)
+    print(ctypes.addressof(buffer), flush=True)
+    sys.stdin.read()
+    """
+)
+
+
+def expected_image() -> bytearray:
+    image = bytearray(i * 7 & 0xFF for i in range(IMAGE_SIZE))
+    image[ANCHOR_OFFSET : ANCHOR_OFFSET + 4] = b"Nagi"
+    image[ANCHOR_OFFSET + 2808 : ANCHOR_OFFSET + 2811] = b"Lao"
+    return image
+
+
+@pytest.fixture(scope="module")
+def emulator():
+    child = subprocess.Popen(
+        [PROCESS_NAME, "-c", CHILD_SCRIPT],
+        executable=sys.executable,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        address = int(child.stdout.readline())
+        process = ProcMem(child.pid)
+        try:
+            process.read_bytes(address, 4)
+        except OSError as e:
+            pytest.skip(f"Can't read child process memory: {e}")
+        yield process, address
+        process.close_process()
+    finally:
+        child.stdin.close()
+        child.wait()
+
+
+def test_find_process(emulator):
+    process, _ = emulator
+    assert find_process(PROCESS_NAME) == process.process_id
+    assert find_process(PROCESS_NAME + ".exe") == process.process_id
+    with pytest.raises(ProcessNotFound):
+        find_process("no-such-process-xcxtool")
+
+
+def test_read_bytes_and_read_many(emulator):
+    process, address = emulator
+    image = expected_image()
+    assert process.read_bytes(address, 64) == image[:64]
+    ranges = [(address + 100, 10), (address + 0x40000, 20), (address, 1)]
+    assert process.read_many(ranges) == [
+        image[100:110],
+        image[0x40000:0x40014],
+        image[:1],
+    ]
+
+
+def test_read_many_into(emulator):
+    process, address = emulator
+    image = expected_image()
+    buffer = bytearray(40)
+    view = memoryview(buffer)
+    process.read_many_into([(address + 0x100, view[:8]), (address + 0x5000, view[8:])])
+    assert buffer == image[0x100:0x108] + image[0x5000:0x5020]
+
+
+def test_read_bytes_falls_back_to_proc_mem(emulator):
+    process, address = emulator
+    fallback = ProcMem(process.process_id)
+    fallback._use_vm_readv = False
+    try:
+        assert fallback.read_bytes(address + 0x100, 32) == expected_image()[0x100:0x120]
+    finally:
+        fallback.close_process()
+
+
+def test_proc_mem_reader_finds_save_data(emulator):
+    process, address = emulator
+    image = expected_image()
+    reader = ProcMemReader(process)
+    assert reader.data_start == address
+    assert reader.read_memory(0x1000, 16) == image[0x1000:0x1010]
+    buffer = bytearray(32)
+    reader.readinto(0x2000, buffer)
+    assert buffer == image[0x2000:0x2020]
+    with reader.snapshot([range(0, 8), range(0x50000, 0x50008)]):
+        assert reader.read_memory(0x50000, 8) == image[0x50000:0x50008]
+
+
+def test_proc_mem_reader_reports_permission_denied(emulator, monkeypatch, caplog):
+    process, _ = emulator
+    denied = ProcMem(process.process_id)
+    denied.check_access()
+
+    def refuse(*args):
+        raise OSError(errno.EPERM, "Operation not permitted")
+
+    monkeypatch.setattr(denied, "_vm_readv", refuse)
+    monkeypatch.setattr(denied, "_pread", refuse)
+    with pytest.raises(PermissionError, match="ptrace_scope"):
+        denied.check_access()
+    with caplog.at_level(logging.ERROR, LOGGER_NAME):
+        with pytest.raises(ValueError, match="Not allowed to read the memory"):
+            ProcMemReader(denied)
+    messages = [r.getMessage() for r in caplog.records]
+    assert "Anchor pattern not found" not in messages
+    assert any("CAP_SYS_PTRACE" in message for message in messages)
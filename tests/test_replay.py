@@ -0,0 +1,118 @@
+"""Tests for recording and replaying monitored memory"""
+
+import pytest
+
+from xcxtool.monitor import monitor
+from xcxtool.readers.replay import ReplayReader, ReplayRecorder, changed_runs
+
+DATA_SIZE = 0x400
+
+
+def make_frames(count: int) -> list[bytes]:
+    frames = [bytes(range(256)) * (DATA_SIZE // 256)]
+    for n in range(1, count):
+        frame = bytearray(frames[-1])
+        frame[n * 7 % DATA_SIZE] ^= 0xFF
+        frame[0x300 + n] = n
+        frames.append(bytes(frame))
+    return frames
+
+
+@pytest.fixture(params=["session.rec", "session.rec.gz"])
+def recording(tmp_path, request):
+    path = tmp_path / request.param
+    with ReplayRecorder(path, DATA_SIZE, "big", 0x1234, keyframe_interval=4) as rec:
+        for n, frame in enumerate(make_frames(10)):
+            rec.record(frame, timestamp=n * 0.5)
+    return path
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_changed_runs():
+    before = bytes(200)
+    after = bytearray(before)
+    after[3] = after[5] = after[150] = 1
+    assert changed_runs(before, bytes(after)) == [(3, b"\x01\x00\x01"), (150, b"\x01")]
+    assert changed_runs(before, bytes(after), max_gap=0) == [
+        (3, b"\x01"),
+        (5, b"\x01"),
+        (150, b"\x01"),
+    ]
+    assert changed_runs(before, before) == []
+
+
+def test_unthrottled_replay(recording):
+    reader = ReplayReader(recording, speed=None)
+    assert (reader.byte_order, reader.data_start) == ("big", 0x1234)
+    assert reader.data_size == DATA_SIZE
+    for frame in make_frames(10):
+        assert reader.read_memory(0, DATA_SIZE) == frame
+    with pytest.raises(EOFError):
+        reader.read_memory(0, 1)
+    reader.close()
+
+
+def test_timed_replay(recording):
+    clock = FakeClock()
+    frames = make_frames(10)
+    reader = ReplayReader(recording, speed=2.0, clock=clock)
+    assert reader.read_memory(0, DATA_SIZE) == frames[0]
+    # Frames are 0.5 s apart, played at twice real time
+    clock.now += 0.1
+    assert reader.read_memory(0, DATA_SIZE) == frames[0]
+    clock.now += 0.5
+    assert reader.read_memory(0, DATA_SIZE) == frames[2]
+    clock.now += 10
+    assert reader.read_memory(0, DATA_SIZE) == frames[9]
+    with pytest.raises(EOFError):
+        reader.read_memory(0, DATA_SIZE)
+
+
+def test_snapshot_holds_frame(recording):
+    frames = make_frames(10)
+    reader = ReplayReader(recording, speed=None)
+    with reader.snapshot([range(0, 16)]):
+        assert reader.read_memory(0, 16) == frames[0][:16]
+        assert reader.view(0x300, 4) == frames[0][0x300:0x304]
+    buffer = bytearray(8)
+    assert reader.readinto(0x300, buffer) == 8
+    assert buffer == frames[1][0x300:0x308]
+
+
+def test_readinto_ranges_reads_one_frame(recording):
+    frames = make_frames(10)
+    reader = ReplayReader(recording, speed=None)
+    buffer = bytearray(DATA_SIZE)
+    view = memoryview(buffer)
+    reader.readinto_ranges([(0, view[:0x10]), (0x300, view[0x300:0x310])])
+    reader.readinto_ranges([(0x300, view[0x300:0x310])])
+    assert buffer[:0x10] == frames[0][:0x10]
+    assert buffer[0x300:0x310] == frames[1][0x300:0x310]
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "gamedata"
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        ReplayReader(path)
+
+
+def test_record_and_monitor_replay(tmp_path, recording):
+    source = ReplayReader(recording, speed=None)
+    path = tmp_path / "copy.rec"
+    with ReplayRecorder(path, DATA_SIZE) as recorder:
+        comparator = monitor.Comparator(source, data_size=DATA_SIZE, recorder=recorder)
+        original = list(comparator.monitor(interval=0))
+    assert len(original) == 9
+
+    comparator = monitor.Comparator(ReplayReader(path, speed=None), data_size=DATA_SIZE)
+    replayed = list(comparator.monitor(interval=0))
+    assert [r.changes for r in replayed] == [r.changes for r in original]
+    assert replayed[0].changes[0] == monitor.MemoryDelta(7, [7], [0xF8])
@@ -0,0 +1,167 @@
+"""Tests for the batch decrypt and encrypt commands in xcxtool.savefiles.main"""
+
+import logging
+
+import pytest
+
+from xcxtool.app import LOGGER_NAME
+from xcxtool.savefiles.encryption import KEYSTREAM_PERIOD, decrypt_save_data
+from xcxtool.savefiles.main import (
+    DecryptSave,
+    EncryptSave,
+    decrypt_file,
+    encrypt_file,
+    expand_targets,
+    run_in_pool,
+)
+
+
+@pytest.fixture
+def save_folder(tmp_path, make_save):
+    for name in ("gamedata", "systemdata"):
+        make_save(name.encode() * 50, path=tmp_path / name)
+    (tmp_path / "gamedata_decrypted").write_bytes(b"")
+    (tmp_path / "notes").mkdir()
+    return tmp_path
+
+
+def names(files) -> list[str]:
+    return [file.name for file in files]
+
+
+def test_expand_targets(save_folder):
+    assert names(expand_targets((str(save_folder),), ("_decrypted",))) == [
+        "gamedata",
+        "systemdata",
+    ]
+    # Named files are always included, and files are only listed once
+    targets = (str(save_folder / "gamedata_decrypted"), str(save_folder / "*data"))
+    assert names(expand_targets(targets, ("_decrypted",))) == [
+        "gamedata_decrypted",
+        "gamedata",
+        "systemdata",
+    ]
+
+
+def test_expand_targets_warns_for_unmatched_targets(save_folder, caplog):
+    targets = (
+        str(save_folder / "gamedata"),
+        str(save_folder / "missing*"),
+        str(save_folder / "notes"),
+    )
+    with caplog.at_level(logging.WARNING, LOGGER_NAME):
+        assert names(expand_targets(targets)) == ["gamedata"]
+    warnings = [r.getMessage() for r in caplog.records]
+    assert warnings == [
+        f"No files found matching {save_folder / 'missing*'}",
+        f"No files found matching {save_folder / 'notes'}",
+    ]
+
+
+def test_expand_targets_match_suffixes(save_folder):
+    targets = (str(save_folder), str(save_folder / "game*"))
+    assert names(expand_targets(targets, (), ("_decrypted",))) == [
+        "gamedata_decrypted"
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_in_pool_isolates_errors(tmp_path, make_save, jobs):
+    good = tmp_path / "gamedata"
+    make_save(b"gamedata" * 50, path=good)
+    bad = tmp_path / "garbage"
+    bad.write_bytes(b"\xff" * 64)
+    results = dict(run_in_pool(decrypt_file, [bad, good], jobs))
+    assert isinstance(results[bad], ValueError)
+    assert results[good].output == str(tmp_path / "gamedata_decrypted")
+    assert (tmp_path / "gamedata_decrypted").exists()
+
+
+def test_batch_exit_code(tmp_path, make_save):
+    good = tmp_path / "gamedata"
+    make_save(b"gamedata" * 50, path=good)
+    _, retcode = DecryptSave.run(["decrypt", "-j", "1", str(good)], exit=False)
+    assert retcode == 0
+
+    (tmp_path / "garbage").write_bytes(b"\xff" * 64)
+    targets = [str(good), str(tmp_path / "garbage")]
+    _, retcode = DecryptSave.run(["decrypt", "-j", "2", *targets], exit=False)
+    assert retcode == 1
+    assert (tmp_path / "gamedata_decrypted").exists()
+
+    missing = str(tmp_path / "missing*")
+    _, retcode = EncryptSave.run(["encrypt", missing], exit=False)
+    assert retcode == 1
+
+
+def test_files_in_the_wrong_state_are_skipped(tmp_path, make_save, caplog):
+    save = make_save(b"gamedata" * 50, path=tmp_path / "gamedata")
+    (tmp_path / "gamedata_decrypted").write_bytes(save.plain)
+
+    result = encrypt_file(str(tmp_path / "gamedata"))
+    assert result.output is None
+    assert result.messages[0][0] == logging.WARNING
+    assert not (tmp_path / "gamedata_encrypted").exists()
+
+    result = decrypt_file(str(tmp_path / "gamedata_decrypted"))
+    assert result.output is None
+    assert result.messages[0][0] == logging.WARNING
+    assert not (tmp_path / "gamedata_decrypted_decrypted").exists()
+
+    with caplog.at_level(logging.WARNING, LOGGER_NAME):
+        _, retcode = EncryptSave.run(
+            ["encrypt", str(tmp_path / "gamedata"), str(tmp_path)], exit=False
+        )
+    assert retcode == 0
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
+    encrypted = (tmp_path / "gamedata_decrypted_encrypted").read_bytes()
+    assert decrypt_save_data(encrypted)[4:] == save.plain[4:]
+    assert not (tmp_path / "gamedata_encrypted").exists()
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_decrypt_file_dump_key_and_decrypt_with_key(tmp_path, make_save, endian):
+    gamedata = tmp_path / "gamedata"
+    plain = make_save(b"gamedata" * 50, endian, key_position=321, path=gamedata).plain
+    result = decrypt_file(str(gamedata), dump_key=True)
+    decrypted = tmp_path / "gamedata_decrypted"
+    key_file = tmp_path / "gamedata_key"
+    assert result.output == str(decrypted)
+    assert decrypted.read_bytes()[4:] == plain[4:]
+    assert len(key_file.read_bytes()) == KEYSTREAM_PERIOD
+    assert gamedata.stat().st_mtime == decrypted.stat().st_mtime
+
+    # The dumped key decrypts the file without detecting the key again
+    decrypted.unlink()
+    decrypt_file(str(gamedata), keystream=key_file.read_bytes())
+    assert decrypted.read_bytes()[4:] == plain[4:]
+
+
+def test_decrypt_file_key_does_not_match(tmp_path, make_save):
+    gamedata = tmp_path / "gamedata"
+    make_save(b"gamedata" * 50, key_position=321, path=gamedata)
+    other = tmp_path / "other"
+    make_save(b"other" * 80, key_position=20, path=other)
+    decrypt_file(str(other), dump_key=True)
+    with pytest.raises(ValueError, match="Key does not match save data"):
+        decrypt_file(str(gamedata), keystream=(tmp_path / "other_key").read_bytes())
+    assert not (tmp_path / "gamedata_decrypted").exists()
+
+
+def test_decrypt_command_with_key(tmp_path, make_save):
+    gamedata = tmp_path / "gamedata"
+    plain = make_save(b"gamedata" * 50, path=gamedata).plain
+    _, retcode = DecryptSave.run(["decrypt", "--dump-key", str(gamedata)], exit=False)
+    assert retcode == 0
+    (tmp_path / "gamedata_decrypted").unlink()
+
+    key = str(tmp_path / "gamedata_key")
+    _, retcode = DecryptSave.run(["decrypt", "-k", key, str(gamedata)], exit=False)
+    assert retcode == 0
+    assert (tmp_path / "gamedata_decrypted").read_bytes()[4:] == plain[4:]
+
+    (tmp_path / "short_key").write_bytes(b"\x00" * 10)
+    short_key = str(tmp_path / "short_key")
+    args = ["decrypt", "-k", short_key, str(gamedata)]
+    _, retcode = DecryptSave.run(args, exit=False)
+    assert retcode == 1
@@ -0,0 +1,75 @@
+"""Tests for the save file readers in xcxtool.readers.save_files"""
+
+import pytest
+
+from xcxtool.readers.save_files import MappedSaveFileReader, SaveFileReader
+
+
+@pytest.fixture(params=["big", "little"])
+def save_file(tmp_path, request, make_save):
+    body = bytes(i * 13 & 0xFF for i in range(10_000))
+    path = tmp_path / "gamedata"
+    plain, _ = make_save(
+        body, request.param, checksum=False, key_position=321, path=path
+    )
+    return path, plain
+
+
+@pytest.mark.parametrize(
+    "offset, length",
+    [(0, 16), (4, 8), (16, 100), (1000, 1), (1020, 10), (0, 10_016), (9_990, 100)],
+)
+def test_mapped_reader_matches_save_file_reader(save_file, offset, length):
+    path, plain = save_file
+    with MappedSaveFileReader(path, page_size=1024, max_pages=2) as mapped:
+        result = mapped.read_memory(offset, length)
+        assert result == SaveFileReader(path).read_memory(offset, length)
+        assert result[max(0, 4 - offset) :] == plain[max(offset, 4) : offset + length]
+
+
+def test_mapped_reader_page_cache_is_bounded(save_file):
+    path, plain = save_file
+    with MappedSaveFileReader(path, page_size=512, max_pages=3) as reader:
+        for offset in range(16, len(plain), 700):
+            assert reader.read_memory(offset, 8) == plain[offset : offset + 8]
+            assert len(reader._pages) <= 3
+        assert reader.read_memory(10_100, 8) == b""
+
+
+def test_mapped_reader_rejects_invalid_file(tmp_path):
+    path = tmp_path / "gamedata"
+    path.write_bytes(b"\xff" * 64)
+    with pytest.raises(ValueError):
+        MappedSaveFileReader(path)
+
+
+@pytest.mark.parametrize("materialise", [False, True])
+def test_save_file_reader_view_and_readinto(save_file, materialise):
+    path, plain = save_file
+    reader = SaveFileReader(path)
+    if materialise:
+        assert reader.data[4:] == plain[4:]
+    view = reader.view(100, 50)
+    assert isinstance(view, memoryview)
+    assert view == plain[100:150]
+    buffer = bytearray(60)
+    assert reader.readinto(200, memoryview(buffer)[10:]) == 50
+    assert buffer[10:] == plain[200:250]
+
+
+def test_save_file_reader_view_shares_decrypted_data(save_file):
+    path, plain = save_file
+    reader = SaveFileReader(path)
+    reader.data
+    assert reader.view(16, 16).obj is reader.data
+
+
+@pytest.mark.parametrize("offset, length", [(20, 8), (1000, 100), (10_000, 100)])
+def test_mapped_reader_view_and_readinto(save_file, offset, length):
+    path, plain = save_file
+    with MappedSaveFileReader(path, page_size=512, max_pages=2) as reader:
+        expected = plain[offset : offset + length]
+        assert reader.view(offset, length) == expected
+        buffer = bytearray(length)
+        assert reader.readinto(offset, buffer) == len(expected)
+        assert buffer[: len(expected)] == expected
@@ -0,0 +1,50 @@
+"""Tests for xcxtool.savefiles.save_set.SaveSet"""
+
+import pytest
+
+from xcxtool.savefiles import save_set as save_set_module
+from xcxtool.savefiles.save_set import SaveSet
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_save_set_decodes_all_files(tmp_path, endian, make_save):
+    gamedata = make_save(b"gamedata" * 100, endian, path=tmp_path / "gamedata").plain
+    make_save(b"backup" * 100, endian, checksum=False, path=tmp_path / "gamedata_")
+    make_save(b"system" * 10, endian, path=tmp_path / "systemdata")
+    (tmp_path / "gamedata_decrypted").write_bytes(gamedata)
+
+    save_set = SaveSet(tmp_path)
+    try:
+        assert save_set.byte_order == endian
+        assert sorted(save_set) == ["gamedata", "gamedata_", "systemdata"]
+        assert save_set["gamedata"].data[4:] == gamedata[4:]
+        assert save_set["gamedata"].valid
+        assert not save_set["gamedata_"].checksum_ok
+        assert save_set.reader().read_memory(16, 8) == b"gamedata"
+    finally:
+        save_set.close()
+
+
+def test_save_set_without_save_data(tmp_path):
+    (tmp_path / "gamedata").write_bytes(b"not a save file")
+    with pytest.raises(ValueError):
+        SaveSet(tmp_path)
+
+
+def test_save_set_validates_on_access(tmp_path, monkeypatch, make_save):
+    make_save(b"gamedata" * 100, path=tmp_path / "gamedata")
+    calls = []
+    monkeypatch.setattr(
+        save_set_module,
+        "verify_checksum",
+        lambda data, byte_order: calls.append(len(data)) or True,
+    )
+    save_set = SaveSet(tmp_path)
+    try:
+        assert save_set["gamedata"].data
+        assert calls == []
+        assert save_set["gamedata"].valid
+        assert save_set["gamedata"].checksum_ok
+        assert len(calls) == 1
+    finally:
+        save_set.close()
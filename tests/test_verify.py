@@ -0,0 +1,127 @@
+"""Tests for xcxtool.backup.verify"""
+
+import json
+import os
+import zipfile
+
+import pytest
+
+from xcxtool.backup import verify
+from xcxtool.backup.verify import (
+    GAMEDATA_MEMBER,
+    VerifyBackups,
+    find_archives,
+    verify_archive,
+)
+
+
+GAMEDATA_BODY = bytes(i * 7 & 0xFF for i in range(200_000))
+
+
+def write_archive(path, gamedata: bytes | None):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("st/game/systemdata", b"\x00" * 16)
+        if gamedata is not None:
+            zf.writestr(GAMEDATA_MEMBER, gamedata)
+    return path
+
+
+@pytest.mark.parametrize("endian", ["big", "little"])
+def test_verify_archive_ok(tmp_path, endian, make_save):
+    gamedata = make_save(GAMEDATA_BODY, endian).encrypted
+    archive = write_archive(tmp_path / "backup.zip", gamedata)
+    result = verify_archive(str(archive))
+    assert result["status"] == "ok"
+    assert result["byte_order"] == endian
+    assert result["size_ok"] and result["checksum_ok"]
+
+
+def test_verify_archive_corrupt_data(tmp_path, make_save):
+    gamedata = bytearray(make_save(GAMEDATA_BODY, "big").encrypted)
+    gamedata[150_000] ^= 0x01
+    archive = write_archive(tmp_path / "backup.zip", bytes(gamedata))
+    result = verify_archive(str(archive))
+    assert result["status"] == "corrupt"
+    assert result["size_ok"] and not result["checksum_ok"]
+
+
+def test_verify_archive_truncated_data(tmp_path, make_save):
+    gamedata = make_save(GAMEDATA_BODY, "big").encrypted[:-10]
+    archive = write_archive(tmp_path / "backup.zip", gamedata)
+    result = verify_archive(str(archive))
+    assert result["status"] == "corrupt"
+    assert not result["size_ok"]
+
+
+@pytest.mark.parametrize("length", [0, 8, 15])
+def test_verify_archive_truncated_header(tmp_path, make_save, length):
+    gamedata = make_save(GAMEDATA_BODY, "big").encrypted[:length]
+    archive = write_archive(tmp_path / "backup.zip", gamedata)
+    result = verify_archive(str(archive))
+    assert result["status"] == "corrupt"
+    assert result["error"] == "truncated header"
+
+
+def test_verify_archive_damaged_or_missing(tmp_path):
+    bad_zip = tmp_path / "bad.zip"
+    bad_zip.write_bytes(b"not a zip file")
+    assert verify_archive(str(bad_zip))["status"] == "corrupt"
+
+    no_gamedata = write_archive(tmp_path / "empty.zip", None)
+    assert verify_archive(str(no_gamedata))["status"] == "error"
+
+
+def test_verify_archive_damaged_deflate_stream(tmp_path, make_save):
+    gamedata = make_save(GAMEDATA_BODY, "big").encrypted
+    archive = write_archive(tmp_path / "backup.zip", gamedata)
+    with zipfile.ZipFile(archive) as zf:
+        info = zf.getinfo(GAMEDATA_MEMBER)
+    raw = bytearray(archive.read_bytes())
+    # Local file header is 30 bytes, then the name; no extra field is written
+    data_start = info.header_offset + 30 + len(info.filename)
+    # Block type 0b11 is reserved, so inflating fails straight away
+    raw[data_start : data_start + 4] = b"\xff" * 4
+    archive.write_bytes(bytes(raw))
+    result = verify_archive(str(archive))
+    assert result["status"] == "corrupt"
+    assert "decompressing" in result["error"]
+
+
+def run_verify(*args: str) -> int:
+    _, retcode = VerifyBackups.run(["verify", *args], exit=False)
+    return retcode
+
+
+def test_verify_cache(tmp_path, monkeypatch, user_cache_dir, make_save):
+    good = write_archive(tmp_path / "good.zip", make_save(GAMEDATA_BODY).encrypted)
+    missing = write_archive(tmp_path / "missing.zip", None)
+    report = tmp_path / "report.json"
+    cache_file = user_cache_dir / verify.CACHE_FILE_NAME
+    assert run_verify("-j", "1", "-r", str(report), str(good), str(missing)) == 1
+    cached = json.loads(cache_file.read())
+    # Errors are checked again next time
+    assert list(cached) == [str(good)]
+
+    checked = []
+    original = verify.verify_archive
+    monkeypatch.setattr(
+        verify, "verify_archive", lambda a: checked.append(a) or original(a)
+    )
+    gamedata = make_save(GAMEDATA_BODY, "little").encrypted
+    other = write_archive(tmp_path / "other.zip", gamedata)
+    assert run_verify("-j", "1", "-r", str(report), str(other)) == 0
+    assert run_verify("-j", "1", "-r", str(report), str(good)) == 0
+    assert [os.path.basename(a) for a in checked] == ["other.zip"]
+
+    # --no-cache checks everything again, and keeps other archives' results
+    assert run_verify("--no-cache", "-j", "1", "-r", str(report), str(good)) == 0
+    assert [os.path.basename(a) for a in checked] == ["other.zip", "good.zip"]
+    assert sorted(json.loads(cache_file.read())) == [str(good), str(other)]
+
+
+def test_find_archives(tmp_path):
+    write_archive(tmp_path / "b.zip", None)
+    write_archive(tmp_path / "a.zip", None)
+    (tmp_path / "notes.txt").write_text("")
+    found = find_archives((str(tmp_path), str(tmp_path / "a.zip")))
+    assert [f.name for f in found] == ["a.zip", "b.zip"]
@@ -99,8 +99,9 @@ class BackupSave(XCXToolApplication):
         field_values.update(tokens.get_datetime())
         field_values.update(tokens.get_mtime(self.gamedata))
 
-        field_values.update(tokens.get_character_data(gamedata_reader))
-        field_values.update(tokens.get_playtime(gamedata_reader))
+        with gamedata_reader.snapshot(tokens.TOKEN_RANGES):
+            field_values.update(tokens.get_character_data(gamedata_reader))
+            field_values.update(tokens.get_playtime(gamedata_reader))
         return field_values
 
     def do_backup(self, backup_name: str, backup_dir: LocalPath, save_dir: LocalPath):
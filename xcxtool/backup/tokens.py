@@ -27,6 +27,11 @@ class_map = {
     15: "Blast Fencer",
     16: "Galactic Knight",
 }
+# Save data read by get_character_data() and get_playtime()
+CHARACTER_RANGES = (range(88, 88 + 1404), range(0x39178, 0x39178 + 8))
+PLAYTIME_RANGES = (range(0x45d64, 0x45d64 + 4), range(0x45e40, 0x45e40 + 4))
+TOKEN_RANGES = CHARACTER_RANGES + PLAYTIME_RANGES
+
 division_map = {
     0: "none",
     1: "Pathfinders",
@@ -54,7 +59,12 @@ def get_mtime(file: LocalPath) -> dict[str, datetime.datetime]:
 
 
 def get_character_data(reader: SaveDataReader) -> dict:
-    buffer = reader.read_memory(88, 1404)
+    with reader.snapshot(CHARACTER_RANGES):
+        buffer = reader.read_memory(88, 1404)
+        blade_level, division = struct.unpack_from(
+            ">2I",
+            reader.read_memory(0x39178, 8),
+        )
 
     def unpack_value(fmt: str, offset: int):
         val = struct.unpack_from(fmt, buffer, offset)
@@ -62,11 +72,6 @@ def get_character_data(reader: SaveDataReader) -> dict:
             return val[0]
         return val
 
-    blade_level, division = struct.unpack_from(
-        ">2I",
-        reader.read_memory(0x39178, 8),
-    )
-
     return {
         "name": _get_name(buffer),
         "level": unpack_value("B", 0x7a),
@@ -80,9 +85,10 @@ def get_character_data(reader: SaveDataReader) -> dict:
 
 
 def get_playtime(reader: SaveDataReader) -> dict[str, str | datetime.datetime]:
-    playtime_buffer = reader.read_memory(0x45e40, 4)
+    with reader.snapshot(PLAYTIME_RANGES):
+        playtime_buffer = reader.read_memory(0x45e40, 4)
+        savetime_buffer = reader.read_memory(0x45d64, 4)
     playtime = game_timer.unpack_game_timer(playtime_buffer)
-    savetime_buffer = reader.read_memory(0x45d64, 4)
     savetime = game_timer.unpack_save_timestamp(savetime_buffer)
     return {
         "play_time": f"{playtime.hours:03d}-{playtime.minutes:02d}-{playtime.seconds:02d}",
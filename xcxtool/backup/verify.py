@@ -0,0 +1,197 @@
+"""Check backup archives for corrupt save data"""
+
+import itertools
+import json
+import os
+import struct
+import sys
+import zipfile
+import zlib
+
+from plumbum import cli, local, LocalPath
+
+from .. import config
+from ..app import XCXToolApplication
+from ..savefiles.checksum import STRUCT_BYTE_ORDER, SaveChecksum
+from ..savefiles.encryption import decrypt_stream, detect_byte_order
+from ..savefiles.main import expand_targets, run_in_pool
+
+GAMEDATA_MEMBER = "st/game/gamedata"
+CACHE_FILE_NAME = "verify.json"
+CHUNK_SIZE = 64 * 1024
+
+
+class VerifyBackups(XCXToolApplication):
+    """Verify the save data in backup archives"""
+
+    DESCRIPTION_MORE = """The gamedata file in each archive is decrypted as it
+    is read from the archive, and its data size and checksum are checked.
+    ARCHIVES can be zip files, directories containing zip files or glob
+    patterns, and defaults to the configured backup directory.
+
+    Results are cached by archive modification time and size, so only new or
+    changed archives are checked when the command is run again. Archives that
+    couldn't be checked ("error") are checked again every time. A JSON report
+    of all results is written to stdout, or to the file given with --report.
+    """
+
+    report: LocalPath = cli.SwitchAttr(
+        ["-r", "--report"],
+        argtype=local.path,
+        help="Write the JSON report to this file instead of stdout",
+    )
+    no_cache: bool = cli.Flag(
+        ["--no-cache"], help="Check every archive, ignoring cached results"
+    )
+    jobs: int = cli.SwitchAttr(
+        ["-j", "--jobs"],
+        argtype=int,
+        default=os.cpu_count() or 1,
+        help="Number of archives to check in parallel. Defaults to the number of CPUs",
+    )
+
+    def main(self, *archives: str):
+        if not archives:
+            archives = (config.get("backup.backup_directory"),)
+        files = find_archives(archives)
+        if not files:
+            self.error("No backup archives found")
+            return 2
+
+        cache_file = config.get_cache_dir() / CACHE_FILE_NAME
+        cache = load_cache(cache_file)
+        results = {}
+        to_check = []
+        for file in files:
+            cached = None if self.no_cache else cache.get(str(file))
+            stat = file.stat()
+            unchanged = (
+                cached
+                and cached["status"] != "error"
+                and (cached["mtime"], cached["size"]) == (stat.st_mtime, stat.st_size)
+            )
+            if unchanged:
+                results[str(file)] = cached
+            else:
+                to_check.append(file)
+        self.info(f"{len(results)} cached results, checking {len(to_check)} archives")
+
+        checked = run_in_pool(verify_archive, to_check, self.jobs)
+        for n, (file, result) in enumerate(checked, 1):
+            if isinstance(result, Exception):
+                result = _result(file, "error", error=str(result))
+            results[str(file)] = result
+            self.info(f"[{n}/{len(to_check)}] {file.name}: {result['status']}")
+
+        # Errors may be transient (e.g. the archive was still being written),
+        # so they are not kept
+        cache.update(
+            (name, result)
+            for name, result in results.items()
+            if result["status"] != "error"
+        )
+        save_cache(cache_file, cache)
+
+        report = [results[str(file)] for file in files]
+        self.write_report(report)
+        bad = [r for r in report if r["status"] != "ok"]
+        for result in bad:
+            self.warning(f"[red]{result['status']}[/red]: {result['archive']}")
+        self.success(f"{len(report) - len(bad)} of {len(report)} archives OK")
+        return 1 if bad else 0
+
+    def write_report(self, report: list[dict]) -> None:
+        if self.report is None:
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+            return
+        with open(self.report, "w") as f:
+            json.dump(report, f, indent=2)
+        self.success(f"Report written to {self.report}")
+
+
+def find_archives(targets: tuple[str, ...]) -> list[LocalPath]:
+    """Expand zip files, directories of zip files and globs to a list of zips"""
+    files = []
+    for target in targets:
+        path = local.path(target)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.zip")))
+        else:
+            files.extend(expand_targets((target,)))
+    return [f for f in dict.fromkeys(files) if f.suffix.lower() == ".zip"]
+
+
+def verify_archive(archive: str) -> dict:
+    """Check the gamedata in a backup archive without extracting it.
+
+    Returns a dictionary describing the result. The status is "ok" if the data
+    size and checksum are correct, "corrupt" if they are not (or the archive
+    itself is damaged) and "error" if there is no gamedata to check.
+    """
+    path = local.path(archive)
+    try:
+        with zipfile.ZipFile(path) as zf:
+            try:
+                info = zf.getinfo(GAMEDATA_MEMBER)
+            except KeyError:
+                return _result(path, "error", error="gamedata not found in archive")
+            with zf.open(info) as member:
+                return _verify_stream(path, member, info.file_size)
+    except (zipfile.BadZipFile, zlib.error, EOFError, OSError) as e:
+        return _result(path, "corrupt", error=str(e))
+
+
+def _verify_stream(path: LocalPath, stream, file_size: int) -> dict:
+    header = stream.read(16)
+    if len(header) < 16:
+        return _result(path, "corrupt", error="truncated header")
+    byte_order = detect_byte_order(header)
+    if byte_order is None:
+        return _result(path, "corrupt", error="could not detect byte order")
+
+    chunks = iter(lambda: stream.read(CHUNK_SIZE), b"")
+    decrypted = decrypt_stream(itertools.chain([header], chunks), byte_order)
+    plain_header = b""
+    while len(plain_header) < 16:
+        plain_header += next(decrypted)
+    _, marker, expected_checksum, data_size = struct.unpack_from(
+        f"{STRUCT_BYTE_ORDER[byte_order]}4I", plain_header
+    )
+
+    checksum = SaveChecksum(file_size - 16, memoryview(plain_header)[16:])
+    for chunk in decrypted:
+        checksum.update(chunk)
+    size_ok = marker == 1 and data_size == file_size - 16
+    checksum_ok = marker == 1 and checksum.digest() == expected_checksum
+    return _result(
+        path,
+        "ok" if size_ok and checksum_ok else "corrupt",
+        byte_order=byte_order,
+        size_ok=size_ok,
+        checksum_ok=checksum_ok,
+    )
+
+
+def _result(path: LocalPath, status: str, **details) -> dict:
+    stat = path.stat()
+    return {
+        "archive": str(path),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "status": status,
+        **details,
+    }
+
+
+def load_cache(cache_file: LocalPath) -> dict[str, dict]:
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache_file: LocalPath, cache: dict[str, dict]) -> None:
+    with open(cache_file, "w") as f:
+        json.dump(cache, f)
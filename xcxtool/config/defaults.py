@@ -54,6 +54,10 @@ CONFIG_DEFAULTS = {
         },
 
     },
+    "cache": {
+        "enabled": True,
+        "max_size_mb": 64,
+    },
     "compare": {
         "include": [
             [0x10, 0x5e710],
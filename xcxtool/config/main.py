@@ -13,12 +13,13 @@ else:
     # noinspection PyPackageRequirements,SpellCheckingInspection
     import tomli as tomllib
 
+import platformdirs
 from plumbum import local, LocalPath
 
 from xcxtool.config.defaults import CONFIG_DEFAULTS
 
 
-__all__ = ["load_config", "get", "get_preferred", "get_section"]
+__all__ = ["load_config", "get", "get_cache_dir", "get_preferred", "get_section"]
 
 _config = {}
 _log = logging.getLogger(LOGGER_NAME)
@@ -97,3 +98,10 @@ def get_section(section: str) -> dict[str, Any] | None:
         return _config[section]
     except KeyError:
         return CONFIG_DEFAULTS.get(section)
+
+
+def get_cache_dir() -> LocalPath:
+    """Get the user cache directory for xcxtool, creating it if necessary"""
+    cache_dir = local.path(platformdirs.user_cache_dir("xcxtool", appauthor=False))
+    cache_dir.mkdir()
+    return cache_dir
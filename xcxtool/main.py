@@ -5,6 +5,7 @@ from plumbum import cli, local, LocalPath
 from . import __version__, __doc__ as description
 from . import config
 from .app import XCXToolApplication, DEBUG, INFO, WARNING
+from .savefiles.save_set import SaveSet
 
 
 class XCXToolsCLI(XCXToolApplication):
@@ -13,6 +14,7 @@ class XCXToolsCLI(XCXToolApplication):
     VERSION = __version__
 
     save_location: LocalPath = None
+    _save_sets: dict[LocalPath, SaveSet]
 
     config_path: LocalPath = cli.SwitchAttr(
         ["--config", "-c"],
@@ -32,6 +34,10 @@ class XCXToolsCLI(XCXToolApplication):
         help="Specify save data is original (WiiU) or Definitive Edition (Switch)",
     )
 
+    def __init__(self, executable):
+        super().__init__(executable)
+        self._save_sets = {}
+
     @cli.switch(["v", "verbose"], excludes=["quiet", "debug"])
     def verbose(self):
         """Display more informational output"""
@@ -68,8 +74,25 @@ class XCXToolsCLI(XCXToolApplication):
         else:
             self.warning("Could not find saved data (systemdata not found)")
 
+    def get_save_set(self, folder: LocalPath) -> SaveSet:
+        """Get the (shared) SaveSet for a save folder, loading it if necessary.
+
+        Raises ValueError if the folder does not contain save data.
+        """
+        folder = local.path(folder)
+        if folder not in self._save_sets:
+            self.debug(f"Loading save data from {folder}")
+            self._save_sets[folder] = SaveSet(folder)
+        return self._save_sets[folder]
+
+    def cleanup(self, retcode):
+        for save_set in self._save_sets.values():
+            save_set.close()
+        super().cleanup(retcode)
+
 
 XCXToolsCLI.subcommand("backup", "xcxtool.backup.BackupSave")
+XCXToolsCLI.subcommand("verify", "xcxtool.backup.verify.VerifyBackups")
 XCXToolsCLI.subcommand("decrypt", "xcxtool.savefiles.main.DecryptSave")
 XCXToolsCLI.subcommand("encrypt", "xcxtool.savefiles.main.EncryptSave")
 XCXToolsCLI.subcommand("fnav", "xcxtool.probes.FrontierNavTool")
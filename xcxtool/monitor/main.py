@@ -20,6 +20,8 @@ from xcxtool import config
 from xcxtool.app import XCXToolApplication, LOGGER_NAME
 from xcxtool.monitor import monitor
 from xcxtool.readers.emulators import connect_emulator
+from xcxtool.readers.gecko import DEFAULT_DATA_START, connect_gecko
+from xcxtool.readers.replay import ReplayReader, ReplayRecorder
 from xcxtool.readers.save_files import SaveDataReader, SaveFileReader
 
 _log = logging.getLogger(LOGGER_NAME)
@@ -74,6 +76,13 @@ class CompareSavedata(XCXToolApplication):
     merge_changes: bool = cli.Flag(
         ["-m", "--merge-results"], help="Merge changes in consecutive memory offsets"
     )
+    merge_gap: int = cli.SwitchAttr(
+        ["-g", "--merge-gap"],
+        int,
+        default=0,
+        requires=["--merge-results"],
+        help="Also merge changes separated by up to this many unchanged bytes",
+    )
 
     def main(self):
         if self.parent is None:
@@ -105,7 +114,7 @@ class CompareSavedata(XCXToolApplication):
             data_size=len(before_data),
         )
         if self.merge_changes:
-            changes = comparator.aggregate_compare()
+            changes = comparator.aggregate_compare(max_gap=self.merge_gap)
         else:
             changes = comparator.compare()
         self.out(changes.format(), highlight=True)
@@ -129,7 +138,9 @@ class CompareSavedata(XCXToolApplication):
 
     def get_before_data(self) -> bytes | None:
         if self.before_file is None and self.save_directory is not None:
-            self.before_file = self.save_directory.join("gamedata_")
+            self.success(f"Before: {self.save_directory.join('gamedata_')}")
+            before = self._read_from_save_set("gamedata_")
+            return None if before is None else before.data
         self.success(f"Before: {self.before_file}")
         try:
             before = SaveFileReader(self.before_file)
@@ -143,7 +154,8 @@ class CompareSavedata(XCXToolApplication):
 
     def get_after(self) -> SaveDataReader | None:
         if self.after_file is None and self.save_directory is not None:
-            self.after_file = self.save_directory.join("gamedata")
+            self.success(f"After: {self.save_directory.join('gamedata')}")
+            return self._read_from_save_set("gamedata")
         self.success(f"After: {self.after_file}")
         try:
             return SaveFileReader(self.after_file)
@@ -153,6 +165,16 @@ class CompareSavedata(XCXToolApplication):
             self.error(f"Could not find savedata {self.after_file}")
         return None
 
+    def _read_from_save_set(self, name: str) -> SaveFileReader | None:
+        """Get a file from the save directory, shared with other subcommands"""
+        try:
+            return self.parent.get_save_set(self.save_directory).reader(name)
+        except ValueError:
+            self.error(f"Could not decrypt save data in {self.save_directory}")
+        except KeyError:
+            self.error(f"Could not find savedata {self.save_directory.join(name)}")
+        return None
+
 
 def ranges_from_config(config_key):
     return [range(*pair) for pair in config.get(config_key)]
@@ -171,6 +193,44 @@ class MonitorEmu(XCXToolApplication):
         group="Monitoring options",
         help="Set this if connecting to a Switch emulator running the Definitive Edition of the game",
     )
+    gecko: str = cli.SwitchAttr(
+        names=["--gecko"],
+        argtype=str,
+        excludes=["--de"],
+        group="Monitoring options",
+        help="Monitor a WiiU running TCP Gecko at HOST[:PORT] instead of an emulator",
+    )
+    gecko_address: int = cli.SwitchAttr(
+        names=["--gecko-address"],
+        argtype=lambda value: int(value, 0),
+        default=DEFAULT_DATA_START,
+        requires=["--gecko"],
+        group="Monitoring options",
+        help="Address of the save data in WiiU memory",
+    )
+    replay: LocalPath = cli.SwitchAttr(
+        names=["--replay"],
+        argtype=cli.ExistingFile,
+        excludes=["--gecko", "--record-memory"],
+        group="Monitoring options",
+        help="Play back a recording made with --record-memory instead of reading "
+        "an emulator",
+    )
+    replay_speed: float = cli.SwitchAttr(
+        names=["--replay-speed"],
+        argtype=float,
+        default=1.0,
+        requires=["--replay"],
+        group="Monitoring options",
+        help="Playback speed of --replay, relative to real time. With 0, every "
+        "comparison moves on to the next frame of the recording",
+    )
+    record_memory: LocalPath = cli.SwitchAttr(
+        names=["--record-memory"],
+        argtype=local.path,
+        group="Output options",
+        help="Record the monitored memory to this file, for playback with --replay",
+    )
     data_size: int = cli.SwitchAttr(
         names=["--data-size"],
         argtype=int,
@@ -203,6 +263,14 @@ class MonitorEmu(XCXToolApplication):
         group="Output options",
         help="Merge changes in consecutive memory offsets",
     )
+    merge_gap: int = cli.SwitchAttr(
+        names=["-g", "--merge-gap"],
+        argtype=int,
+        default=0,
+        requires=["--merge-results"],
+        group="Output options",
+        help="Also merge changes separated by up to this many unchanged bytes",
+    )
     write_json: LocalPath = cli.SwitchAttr(
         names=["-j", "--write"],
         argtype=local.path,
@@ -241,9 +309,18 @@ class MonitorEmu(XCXToolApplication):
     def main(self, process_name: str = None):
         if process_name is None:
             config.get("xcxtool.cemu_process_name")
-        if self.definitive_edition:
-            self.success(f"Connecting to {process_name}, this may take some time")
-        reader = connect_emulator(process_name, self.definitive_edition)
+        if self.replay:
+            try:
+                reader = ReplayReader(self.replay, self.replay_speed or None)
+            except ValueError as e:
+                self.error(e)
+                return 1
+        elif self.gecko:
+            reader = connect_gecko(self.gecko, self.gecko_address)
+        else:
+            if self.definitive_edition:
+                self.success(f"Connecting to {process_name}, this may take some time")
+            reader = connect_emulator(process_name, self.definitive_edition)
         if reader is None:
             exit(1)
         self.get_include_and_exclude()
@@ -251,16 +328,25 @@ class MonitorEmu(XCXToolApplication):
         named_ranges.add_from_config(config.get_section("named_ranges"))
         if self.data_size:
             data_size = self.data_size
+        elif self.replay:
+            data_size = reader.data_size
         elif self.definitive_edition:
             data_size = 696_832
         else:
             data_size = 359_984
+        recorder = None
+        if self.record_memory:
+            recorder = ReplayRecorder(
+                self.record_memory, data_size, reader.byte_order, reader.data_start
+            )
         self.comp = monitor.Comparator(
             reader,
             include=self.include,
             exclude=self.exclude,
             named_ranges=named_ranges,
             data_size=data_size,
+            recorder=recorder,
+            double_buffered=True,
         )
         try:
             with self.do_recording():
@@ -278,6 +364,9 @@ class MonitorEmu(XCXToolApplication):
             return 1
         finally:
             reader.close()
+            if recorder is not None:
+                recorder.close()
+                self.success(f"Memory recorded to {self.record_memory}")
 
         if self.recording is not None:
             json_file = self.recording.with_suffix(".json")
@@ -292,7 +381,9 @@ class MonitorEmu(XCXToolApplication):
 
         changes = {}
         monitor_start = datetime.datetime.now()
-        monitor_gen = self.comp.monitor(aggregate_runs, self.monitoring_interval)
+        monitor_gen = self.comp.monitor(
+            aggregate_runs, self.monitoring_interval, self.merge_gap
+        )
         self.success(f"Started monitor at {monitor_start}")
         try:
             for changeset in monitor_gen:
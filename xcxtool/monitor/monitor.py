@@ -1,14 +1,28 @@
-"""Un-integrated tools for watching memory"""
+"""Un-integrated tools for watching memory
 
+Changed bytes are found with xcxtool.readers.diff, which skips unchanged data
+with block comparisons and only scans the blocks that differ.
+
+The include and exclude ranges are compiled once into a byte mask of the
+monitored offsets, which the byte scan ANDs with the changed bytes, so the
+cost of a comparison doesn't depend on how many ranges are configured.
+"""
+
+import bisect
+import collections
 import dataclasses
 import datetime
+import functools
+import heapq
 import json
 from os import PathLike
-from typing import Any, Sequence, Generator
+from typing import Any, Sequence, Generator, Iterable
 
 from pythrottle.throttle import Throttle
 
-from xcxtool.readers.save_files import SaveDataReader
+from xcxtool.readers.diff import changed_offsets, find_runs, offset_mask
+from xcxtool.readers.replay import ReplayRecorder
+from xcxtool.readers.save_files import SaveDataReader, coalesce_ranges
 from xcxtool.data import locations
 
 
@@ -94,7 +108,13 @@ class CompareResult:
 
 
 class NamedRanges:
-    """Class for storing and retrieving ranges by name"""
+    """Class for storing and retrieving ranges by name
+
+    Where ranges overlap, an offset is named after the shortest range that
+    contains it, or the one added first if there is a tie. Lookups use an
+    index of the segments between range boundaries, each with the name that
+    wins in it, built when the ranges are first looked up after a change.
+    """
 
     def __init__(self, initial_ranges: dict[range, str] = None):
         if initial_ranges is None:
@@ -102,6 +122,8 @@ class NamedRanges:
         range_list = list(initial_ranges.items())
         range_list.sort(key=lambda t: len(t[0]))
         self.ranges = range_list
+        self._boundaries: list[int] | None = None
+        self._segment_names: list[str] = []
 
     def add_from_config(self, config: dict[str, Sequence[int]]) -> None:
         """Add ranges from a config dict
@@ -114,18 +136,27 @@ class NamedRanges:
         ]
         self.ranges.extend(new_ranges)
         self.ranges.sort(key=lambda t: len(t[0]))
+        self._boundaries = None
 
     def add_range(self, name: str, range_: range) -> None:
         """Add a new named range to the mapping"""
         self.ranges.append((range_, name))
         self.ranges.sort(key=lambda t: len(t[0]))
+        self._boundaries = None
 
     def get_name(self, value: int) -> str:
         """Get the name of the range containing value"""
-        for range_, name in self.ranges:
-            if value in range_:
-                return name
-        return ""
+        if self._boundaries is None:
+            self._build_index()
+        return self._segment_names[bisect.bisect_right(self._boundaries, value)]
+
+    def get_names(self, values: Iterable[int]) -> list[str]:
+        """Get the name of the range containing each of values"""
+        if self._boundaries is None:
+            self._build_index()
+        boundaries, names = self._boundaries, self._segment_names
+        bisect_right = bisect.bisect_right
+        return [names[bisect_right(boundaries, value)] for value in values]
 
     def get_range(self, name: str) -> range:
         """Get the range defined by name"""
@@ -134,8 +165,44 @@ class NamedRanges:
                 return range_
         return range(0)
 
+    def _build_index(self) -> None:
+        """Work out the winning name between each pair of range boundaries.
+
+        The boundaries are swept in order, keeping a heap of the ranges that
+        are open, ordered by priority (their position in self.ranges).
+        Segment n is the values from boundaries[n - 1] up to boundaries[n].
+        """
+        ranges = [(r, name) for r, name in self.ranges if r]
+        events = sorted(
+            {r.start for r, _ in ranges} | {r.stop for r, _ in ranges}
+        )
+        starts: dict[int, list[int]] = collections.defaultdict(list)
+        for priority, (r, _) in enumerate(ranges):
+            starts[r.start].append(priority)
+        names = [""]
+        open_ranges: list[int] = []
+        for boundary in events:
+            for priority in starts.get(boundary, ()):
+                heapq.heappush(open_ranges, priority)
+            # Ranges that have ended are only removed once they reach the top
+            while open_ranges and ranges[open_ranges[0]][0].stop <= boundary:
+                heapq.heappop(open_ranges)
+            names.append(ranges[open_ranges[0]][1] if open_ranges else "")
+        self._boundaries = events
+        self._segment_names = names
+
 
 class Comparator:
+    """Find changes in save data between reads.
+
+    Only the bytes in the include ranges and outside the exclude ranges are
+    read and compared: the rest of the data keeps its initial value.
+
+    If double_buffered is True, data is read into two preallocated buffers
+    in turn, with the reader's readinto_ranges(), so steady-state monitoring
+    doesn't allocate a new copy of the data for every read. self.previous is
+    then one of the buffers, and is overwritten by the read after next.
+    """
 
     def __init__(
         self,
@@ -146,16 +213,25 @@ class Comparator:
         named_ranges: NamedRanges = NamedRanges(),
         *,
         data_size: int = 359_984,
+        recorder: ReplayRecorder = None,
+        double_buffered: bool = False,
     ):
         self.reader = reader
         self.data_size = data_size
+        self.recorder = recorder
         self.includes = include if include else [range(0, self.data_size)]
         self.excludes = exclude if exclude else []
+        self.intervals = monitored_intervals(
+            self.includes, self.excludes, self.data_size
+        )
+        self.mask = offset_mask(self.intervals, self.data_size)
         self.named_ranges = named_ranges
-        if initial_data is not None:
-            self.previous = initial_data
-        else:
-            self.previous = reader.read_memory(0, self.data_size)
+        self.previous = initial_data
+        self._buffers: tuple[bytearray, bytearray] | None = None
+        if double_buffered:
+            self._init_buffers(initial_data)
+        elif initial_data is None:
+            self.previous = self._read()
 
     def compare(self, other: bytes = None) -> CompareResult:
         now = datetime.datetime.now()
@@ -167,16 +243,24 @@ class Comparator:
             mem = other
         else:
             mem = self._read()
-        deltas = []
-        for offset, (before, after) in enumerate(zip(self.previous, mem)):
-            if before != after and self._valid_offset(offset):
-                region_name = self.named_ranges.get_name(offset)
-                deltas.append(MemoryDelta(offset, [before], [after], region_name))
+        changes = self._changed_bytes(mem)
+        names = self.named_ranges.get_names(offset for offset, _, _ in changes)
+        deltas = [
+            MemoryDelta(offset, [before], [after], name)
+            for (offset, before, after), name in zip(changes, names)
+        ]
         self.previous = mem
         return CompareResult(now, deltas)
 
-    def aggregate_compare(self, other: bytes = None) -> CompareResult:
-        """WIP"""
+    def aggregate_compare(
+        self, other: bytes = None, max_gap: int = 0
+    ) -> CompareResult:
+        """Compare with the previous data, merging changes into runs.
+
+        Changed bytes separated by max_gap or fewer unchanged bytes are
+        merged into one delta, which includes the unchanged bytes between
+        them. Runs don't extend across offsets that aren't monitored.
+        """
         if other is not None:
             if len(other) != len(self.previous):
                 raise ValueError(
@@ -185,52 +269,122 @@ class Comparator:
             new_mem = other
         else:
             new_mem = self._read()
-        deltas = []
-        current_run = None
         now = datetime.datetime.now()
-
-        for offset, (before, after) in enumerate(zip(self.previous, new_mem)):
-            if not self._valid_offset(offset) or before == after:
-                continue
-            name = self.named_ranges.get_name(offset)
-            if current_run is None:
-                current_run = MemoryDelta(offset, [before], [after], name)
-            elif offset == current_run.next_offset:
-                current_run.append(before, after)
-            else:
-                deltas.append(current_run)
-                current_run = MemoryDelta(offset, [before], [after], name)
-
-        if current_run is not None:
-            deltas.append(current_run)
-
+        previous = self.previous
+        offsets = changed_offsets(
+            previous, new_mem, self.intervals, mask=self.mask
+        )
+        runs = find_runs(offsets, self.intervals, max_gap)
+        names = self.named_ranges.get_names(start for start, _ in runs)
+        deltas = [
+            MemoryDelta(
+                start, list(previous[start:stop]), list(new_mem[start:stop]), name
+            )
+            for (start, stop), name in zip(runs, names)
+        ]
         self.previous = new_mem
         return CompareResult(now, deltas)
 
     def monitor(
-        self, aggregate_runs: bool = False, interval: float = 0.5
+        self, aggregate_runs: bool = False, interval: float = 0.5, max_gap: int = 0
     ) -> Generator[CompareResult, None, None]:
         """Continuously monitor changes by driving this generator.
 
-        Yields CompareResults
+        Yields CompareResults. Stops when the reader raises EOFError, as a
+        ReplayReader does at the end of a recording. max_gap is passed to
+        aggregate_compare() if aggregate_runs is True.
         """
         if aggregate_runs:
-            compare_func = self.aggregate_compare
+            compare_func = functools.partial(self.aggregate_compare, max_gap=max_gap)
         else:
             compare_func = self.compare
         throttler = Throttle(interval=interval)
         for _ in throttler.loop():
-            yield compare_func()
+            try:
+                result = compare_func()
+            except EOFError:
+                return
+            yield result
+
+    def _init_buffers(self, initial_data: bytes | None) -> None:
+        self._buffers = (bytearray(self.data_size), bytearray(self.data_size))
+        # The (offset, buffer) targets for reading each buffer's intervals
+        self._targets = tuple(
+            [(r.start, memoryview(buffer)[r.start : r.stop]) for r in self.intervals]
+            for buffer in self._buffers
+        )
+        if initial_data is None:
+            self.reader.readinto_ranges(self._targets[0])
+            if self.recorder is not None:
+                self.recorder.record(self._buffers[0])
+        elif len(initial_data) != self.data_size:
+            raise ValueError(
+                f"Initial data ({len(initial_data)} bytes) must be data_size "
+                f"({self.data_size} bytes)"
+            )
+        else:
+            self._buffers[0][:] = initial_data
+        # Data outside the monitored intervals is never read again, so both
+        # buffers need the same copy of it
+        self._buffers[1][:] = self._buffers[0]
+        self.previous = self._buffers[0]
+
+    def _read(self) -> bytes | bytearray:
+        """Read the monitored intervals, keeping the previous data elsewhere"""
+        if self._buffers is not None:
+            index = 1 if self.previous is self._buffers[0] else 0
+            self.reader.readinto_ranges(self._targets[index])
+            data = self._buffers[index]
+        else:
+            if self.previous is None:
+                data = bytearray(self.data_size)
+            else:
+                data = bytearray(self.previous)
+            for interval, interval_data in zip(
+                self.intervals, self.reader.read_ranges(self.intervals)
+            ):
+                data[interval.start : interval.start + len(interval_data)] = (
+                    interval_data
+                )
+            data = bytes(data)
+        if self.recorder is not None:
+            self.recorder.record(data)
+        return data
+
+    def _changed_bytes(self, new_data: bytes) -> list[tuple[int, int, int]]:
+        """Return (offset, before, after) for each monitored byte that changed"""
+        previous = self.previous
+        return [
+            (offset, previous[offset], new_data[offset])
+            for offset in changed_offsets(
+                previous, new_data, self.intervals, mask=self.mask
+            )
+        ]
 
-    def _read(self) -> bytes:
-        return self.reader.read_memory(0, self.data_size)
 
-    def _valid_offset(self, offset: int) -> bool:
-        if not any(offset in r for r in self.includes):
-            return False
-        if any(offset in r for r in self.excludes):
-            return False
-        return True
+def monitored_intervals(
+    includes: Sequence[range], excludes: Sequence[range], data_size: int
+) -> list[range]:
+    """Return the sorted, disjoint ranges of offsets that are monitored.
+
+    These are the offsets below data_size that are in an include range and
+    not in an exclude range.
+    """
+    excluded = coalesce_ranges(excludes)
+    intervals = []
+    for include in coalesce_ranges(includes):
+        start, stop = include.start, min(include.stop, data_size)
+        for exclude in excluded:
+            if exclude.stop <= start:
+                continue
+            if exclude.start >= stop:
+                break
+            if exclude.start > start:
+                intervals.append(range(start, exclude.start))
+            start = max(start, exclude.stop)
+        if start < stop:
+            intervals.append(range(start, stop))
+    return intervals
 
 
 def process_locations_from_monitor_json(
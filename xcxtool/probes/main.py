@@ -10,7 +10,11 @@ from plumbum import cli, local, LocalPath
 from xcxtool import config
 from xcxtool.app import XCXToolApplication, LOGGER_NAME
 from xcxtool.probes import data
-from xcxtool.savefiles.encryption import decrypt_save_data, detect_byte_order
+from xcxtool.readers.save_files import (
+    MappedSaveFileReader,
+    SaveDataReader,
+    SaveFileReader,
+)
 
 _log = logging.getLogger(LOGGER_NAME)
 
@@ -76,15 +80,21 @@ class FrontierNavTool(XCXToolApplication):
             slices = data.OFFSET_SLICES_WIIU
             byteorder = "big"
 
-        savedata = self.get_save_data(target)
-        if savedata is None:
+        reader = self.get_save_reader(target)
+        if reader is None:
             return 2
-        self.inventory = get_probe_inventory(
-            savedata[slices["probe_inventory"]], self.parent.edition
-        )
-        self.sites = get_installed_probes(savedata[slices["fnav_layout"]])
-        # noinspection PyTypeChecker
-        self.spots = get_sightseeing_spots(savedata[slices["locations"]], byteorder)
+        # Closes the save file, which is otherwise locked on Windows
+        with reader:
+            self.inventory = get_probe_inventory(
+                read_slice(reader, slices["probe_inventory"]), self.parent.edition
+            )
+            self.sites = get_installed_probes(
+                read_slice(reader, slices["fnav_layout"])
+            )
+            # noinspection PyTypeChecker
+            self.spots = get_sightseeing_spots(
+                read_slice(reader, slices["locations"]), byteorder
+            )
 
         if not any(
             (
@@ -112,20 +122,22 @@ class FrontierNavTool(XCXToolApplication):
         """Exclude probe types from Xenoprobes inventory, e.g. "-x M1,R1\" """
         self._exclude = split_exclude(exclude_set)
 
-    def get_save_data(self, target: LocalPath | None) -> bytes | None:
-        """Get save data.
+    def get_save_reader(
+        self, target: LocalPath | None
+    ) -> SaveFileReader | MappedSaveFileReader | None:
+        """Get a reader for save data.
 
-        If a save file is specified on the command line, get that. Otherwise,
+        If a save file is specified on the command line, read that. Otherwise,
         look for a save file in the configured MLC path.
         """
-        self.debug("FrontierNavTool.get_save_data()")
+        self.debug("FrontierNavTool.get_save_reader()")
         self.debug(f"{target=}")
         if target is not None:
             self.debug("Getting savedata from target")
-            return get_save_data_from_file(target)
+            return MappedSaveFileReader(target)
         if self.parent.save_location is not None:
             self.debug(f"Getting save data from {self.parent.save_location}")
-            return get_save_data_from_file(self.parent.save_location.join("gamedata"))
+            return SaveFileReader(self.parent.save_location.join("gamedata"))
         self.error(
             "No save data found, please specify a gamedata file, or configure emulator"
             "settings.",
@@ -240,13 +252,12 @@ class FrontierNavTool(XCXToolApplication):
 
 def get_save_data_from_file(file_path: LocalPath) -> bytes:
     """Helper function to get save data"""
+    return SaveFileReader(file_path).data
+
 
-    # noinspection PyTypeChecker
-    raw_data: bytes = file_path.read(mode="rb")
-    byte_order = detect_byte_order(raw_data)
-    if byte_order is None:
-        raise ValueError("Could not detect byte order of save file")
-    return decrypt_save_data(raw_data, byte_order)
+def read_slice(reader: SaveDataReader, offsets: slice) -> bytes:
+    """Read the save data covered by a slice of offsets"""
+    return reader.read_memory(offsets.start, offsets.stop - offsets.start)
 
 
 def get_save_data_from_backup_folder() -> bytes:
@@ -0,0 +1,254 @@
+"""Finding save data in emulator memory by anchor patterns.
+
+Anchors are byte patterns of the form ``b"prefix.{N}suffix"``: two literal
+byte strings a fixed distance apart. Instead of running the pattern as a
+regex, scan_anchor() looks for the literal prefix with bytes.find() and only
+checks for the suffix where the prefix is found. Memory is read in chunks
+that overlap by the length of the anchor, and the chunks are read and
+searched in a thread pool, so reading one chunk overlaps searching another.
+
+Once an anchor has been found, its address is cached (keyed by the process
+and where its main module is loaded), so reconnecting to the same emulator
+process only has to check the anchor is still there instead of scanning the
+whole address space again.
+"""
+
+import collections
+import concurrent.futures
+import ctypes
+import json
+import logging
+import os
+import re
+import sys
+import typing
+
+from xcxtool import config
+from xcxtool.app import LOGGER_NAME
+
+__all__ = [
+    "Anchor",
+    "AnchorCache",
+    "anchor_cache_key",
+    "get_anchor_cache",
+    "process_start_time",
+    "scan_anchor",
+]
+
+_log = logging.getLogger(LOGGER_NAME)
+
+CACHE_FILE_NAME = "anchors.json"
+MAX_CACHE_ENTRIES = 32
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+
+_ANCHOR_RE = re.compile(rb"([^.\\\[\](){}*+?|^$]+)\.\{(\d+)\}([^.\\\[\](){}*+?|^$]+)")
+
+
+class ReadBytes(typing.Protocol):
+    def __call__(self, address: int, length: int) -> bytes: ...
+
+
+class Anchor(typing.NamedTuple):
+    """Two literal byte strings a fixed distance apart"""
+
+    prefix: bytes
+    gap: int
+    suffix: bytes
+
+    @classmethod
+    def from_pattern(cls, pattern: bytes) -> "Anchor":
+        """Parse a pattern such as b"Nagi.{2804}Lao".
+
+        Raises ValueError if the pattern is not of that form.
+        """
+        match = _ANCHOR_RE.fullmatch(pattern)
+        if match is None:
+            raise ValueError(f"Not a fixed-distance anchor pattern: {pattern!r}")
+        prefix, gap, suffix = match.groups()
+        return cls(prefix, int(gap), suffix)
+
+    @property
+    def suffix_offset(self) -> int:
+        """Offset of the suffix from the start of the anchor"""
+        return len(self.prefix) + self.gap
+
+    def __len__(self) -> int:
+        return self.suffix_offset + len(self.suffix)
+
+    def check(self, read_bytes: ReadBytes, address: int) -> bool:
+        """Return True if the anchor is at address.
+
+        Only the prefix and suffix are read. Read errors count as a mismatch.
+        """
+        try:
+            return (
+                read_bytes(address, len(self.prefix)) == self.prefix
+                and read_bytes(address + self.suffix_offset, len(self.suffix))
+                == self.suffix
+            )
+        except Exception:
+            return False
+
+    def find_all(
+        self, data: bytes | bytearray, limit: int | None = None, end: int | None = None
+    ) -> typing.Iterator[int]:
+        """Yield the offset of each anchor in data[:end] that starts before limit"""
+        end = len(data) if end is None else end
+        limit = end if limit is None else limit
+        prefix, suffix = self.prefix, self.suffix
+        suffix_offset, suffix_length = self.suffix_offset, len(self.suffix)
+        search_end = min(limit + len(prefix) - 1, end)
+        position = data.find(prefix, 0, search_end)
+        while position != -1:
+            suffix_start = position + suffix_offset
+            if (
+                suffix_start + suffix_length <= end
+                and data[suffix_start : suffix_start + suffix_length] == suffix
+            ):
+                yield position
+            position = data.find(prefix, position + 1, search_end)
+
+
+class AnchorCache:
+    """Addresses of save data found in emulator processes, stored as JSON"""
+
+    def __init__(self, cache_file: str | os.PathLike):
+        self.cache_file = os.fspath(cache_file)
+
+    def _load(self) -> dict[str, int]:
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> int | None:
+        return self._load().get(key)
+
+    def put(self, key: str, address: int) -> None:
+        entries = self._load()
+        entries.pop(key, None)
+        entries[key] = address
+        # Entries are in insertion order, so the oldest are dropped first
+        while len(entries) > MAX_CACHE_ENTRIES:
+            del entries[next(iter(entries))]
+        try:
+            with open(self.cache_file, "w") as f:
+                json.dump(entries, f)
+        except OSError as e:
+            _log.debug(f"Could not write anchor cache: {e}")
+
+    def remove(self, key: str) -> None:
+        entries = self._load()
+        if entries.pop(key, None) is not None:
+            try:
+                with open(self.cache_file, "w") as f:
+                    json.dump(entries, f)
+            except OSError as e:
+                _log.debug(f"Could not write anchor cache: {e}")
+
+
+def scan_anchor(
+    read_bytes: ReadBytes,
+    regions: typing.Iterable[tuple[int, int]],
+    anchor: Anchor,
+    first_only: bool = False,
+    workers: int | None = None,
+    chunk_size: int = SCAN_CHUNK_SIZE,
+    read_errors: tuple[type[Exception], ...] = (OSError,),
+) -> list[int]:
+    """Return the addresses of anchor in the (start, end) memory regions.
+
+    Addresses are returned in region order. If first_only is True, scanning
+    stops at the first match. Chunks that can't be read (read_bytes raises
+    one of read_errors) are skipped. Anchors are not matched across regions.
+
+    read_bytes may return a buffer longer than requested, so that callers can
+    reuse one buffer per thread; only the requested length is searched.
+    """
+    chunks = (
+        (start, min(start + chunk_size, end), end)
+        for region_start, end in regions
+        for start in range(region_start, end, chunk_size)
+    )
+    overlap = len(anchor) - 1
+
+    def scan_chunk(chunk: tuple[int, int, int]) -> list[int]:
+        start, stop, region_end = chunk
+        length = min(stop + overlap, region_end) - start
+        try:
+            data = read_bytes(start, length)
+        except read_errors:
+            return []
+        return [start + offset for offset in anchor.find_all(data, stop - start, length)]
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    found = []
+    pool = concurrent.futures.ThreadPoolExecutor(workers)
+    try:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(scan_chunk, chunk))
+            # Keep a bounded number of chunks in memory, collecting in order
+            while len(pending) > workers * 2 or (pending and pending[0].done()):
+                found.extend(pending.popleft().result())
+                if first_only and found:
+                    return found[:1]
+        while pending:
+            found.extend(pending.popleft().result())
+            if first_only and found:
+                return found[:1]
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return found
+
+
+def get_anchor_cache() -> AnchorCache | None:
+    """Return the anchor cache, or None if caching is disabled"""
+    if not config.get("cache.enabled"):
+        return None
+    return AnchorCache(config.get_cache_dir() / CACHE_FILE_NAME)
+
+
+def anchor_cache_key(process, *identifiers: typing.Any) -> str | None:
+    """Return a cache key identifying a process instance and search.
+
+    process should have process_id, process_handle and base_address
+    attributes, like pymem.Pymem. identifiers distinguish different searches
+    in the same process. Returns None if the process can't be identified.
+    """
+    try:
+        process_id = process.process_id
+        base_address = process.base_address
+    except Exception:
+        return None
+    start_time = process_start_time(process_id, getattr(process, "process_handle", None))
+    if start_time is None:
+        return None
+    parts = [process_id, start_time, f"{base_address:#x}"]
+    parts.extend(i.hex() if isinstance(i, bytes) else str(i) for i in identifiers)
+    return ":".join(str(part) for part in parts)
+
+
+def process_start_time(process_id: int, process_handle: int | None = None) -> int | None:
+    """Return the start time of a process in platform-specific units.
+
+    The value is only meant to tell a process apart from a later one that
+    reuses its id. Returns None if the start time can't be found.
+    """
+    if sys.platform == "win32":
+        if process_handle is None:
+            return None
+        times = [ctypes.c_ulonglong() for _ in range(4)]
+        ok = ctypes.windll.kernel32.GetProcessTimes(
+            process_handle, *(ctypes.byref(t) for t in times)
+        )
+        return times[0].value if ok else None
+    try:
+        with open(f"/proc/{process_id}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The process name is in parentheses and may contain spaces
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    return int(fields[19])
@@ -0,0 +1,175 @@
+"""Finding the bytes that differ between two copies of save data.
+
+Data is compared a block at a time, halving the span searched until the
+differing blocks are found, and only those blocks are scanned byte by byte,
+using NumPy if it is installed. A typical tick changes a few dozen bytes, so
+almost all of the data is skipped by the block comparisons. Changed offsets
+can then be grouped into runs with find_runs().
+"""
+
+import bisect
+import math
+from typing import Sequence
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ["changed_offsets", "find_runs", "offset_mask"]
+
+# Size of the blocks scanned byte by byte for changes. NumPy scans large
+# blocks faster than more block comparisons can rule them out.
+DIFF_BLOCK_SIZE = 4096
+DIFF_BLOCK_SIZE_NO_NUMPY = 64
+# Largest span compared in one go. Comparing slices copies them, so this
+# bounds the memory a comparison allocates.
+DIFF_COMPARE_SIZE = 64 * 1024
+
+
+def offset_mask(intervals: Sequence[range], data_size: int) -> bytearray:
+    """Return a mask with a 1 for each offset in intervals, 0 elsewhere"""
+    mask = bytearray(data_size)
+    for interval in intervals:
+        mask[interval.start : interval.stop] = b"\x01" * len(interval)
+    return mask
+
+
+def changed_offsets(
+    before: bytes,
+    after: bytes,
+    intervals: Sequence[range],
+    block_size: int | None = None,
+    mask: bytearray | None = None,
+) -> list[int]:
+    """Return the offsets in intervals where before and after differ, in order.
+
+    mask, if given, must be offset_mask(intervals). Blocks are then searched
+    for across all the intervals at once, and the changes found in them are
+    filtered by the mask, instead of each interval being searched in turn.
+    """
+    if not intervals:
+        return []
+    if block_size is None:
+        block_size = DIFF_BLOCK_SIZE if numpy is not None else DIFF_BLOCK_SIZE_NO_NUMPY
+    blocks = []
+    if mask is None:
+        for interval in intervals:
+            _find_changed_blocks(
+                before, after, interval.start, interval.stop, block_size, blocks
+            )
+    else:
+        start, stop = intervals[0].start, intervals[-1].stop
+        _find_changed_blocks(before, after, start, stop, block_size, blocks)
+    if not blocks:
+        return []
+    if numpy is not None:
+        before_array = numpy.frombuffer(before, numpy.uint8)
+        after_array = numpy.frombuffer(after, numpy.uint8)
+        mask_array = None if mask is None else numpy.frombuffer(mask, numpy.bool_)
+        offsets = []
+        for start, stop in blocks:
+            changed = before_array[start:stop] != after_array[start:stop]
+            if mask_array is not None:
+                changed &= mask_array[start:stop]
+            offsets.extend((numpy.flatnonzero(changed) + start).tolist())
+        return offsets
+    if mask is None:
+        return [
+            offset
+            for start, stop in blocks
+            for offset in range(start, stop)
+            if before[offset] != after[offset]
+        ]
+    return [
+        offset
+        for start, stop in blocks
+        for offset in range(start, stop)
+        if before[offset] != after[offset] and mask[offset]
+    ]
+
+
+def _find_changed_blocks(
+    before: bytes,
+    after: bytes,
+    start: int,
+    stop: int,
+    block_size: int,
+    blocks: list[tuple[int, int]],
+) -> None:
+    """Add the (start, stop) of each block that differs to blocks.
+
+    The span is halved until it is a single block, so unchanged data is
+    skipped with a few comparisons however large it is. Adjacent blocks are
+    merged. Spans larger than DIFF_COMPARE_SIZE are split into pieces of that
+    size first, rather than compared (and copied) whole.
+    """
+    if stop - start > DIFF_COMPARE_SIZE:
+        piece = max(DIFF_COMPARE_SIZE - DIFF_COMPARE_SIZE % block_size, block_size)
+        for piece_start in range(start, stop, piece):
+            _find_changed_blocks(
+                before,
+                after,
+                piece_start,
+                min(piece_start + piece, stop),
+                block_size,
+                blocks,
+            )
+        return
+    if before[start:stop] == after[start:stop]:
+        return
+    if stop - start <= block_size:
+        if blocks and blocks[-1][1] == start:
+            # Scan adjacent blocks together
+            blocks[-1] = (blocks[-1][0], stop)
+        else:
+            blocks.append((start, stop))
+        return
+    middle = start + (stop - start) // 2
+    middle -= middle % block_size
+    if middle <= start:
+        middle = start + block_size
+    _find_changed_blocks(before, after, start, middle, block_size, blocks)
+    _find_changed_blocks(before, after, middle, stop, block_size, blocks)
+
+
+def find_runs(
+    offsets: Sequence[int], intervals: Sequence[range], max_gap: int = 0
+) -> list[tuple[int, int]]:
+    """Split sorted offsets into (start, stop) runs.
+
+    A new run starts wherever there are more than max_gap offsets missing
+    since the last one, or the offsets move into a different one of the
+    (sorted, disjoint) intervals.
+    """
+    if not offsets:
+        return []
+    if numpy is not None:
+        offset_array = numpy.asarray(offsets, dtype=numpy.int64)
+        interval_starts = numpy.fromiter(
+            (r.start for r in intervals), numpy.int64, len(intervals)
+        )
+        interval_ids = numpy.searchsorted(interval_starts, offset_array, "right")
+        breaks = numpy.flatnonzero(
+            (numpy.diff(offset_array) > max_gap + 1) | (numpy.diff(interval_ids) != 0)
+        )
+        starts = offset_array[numpy.concatenate(([0], breaks + 1))]
+        stops = offset_array[numpy.concatenate((breaks, [len(offsets) - 1]))] + 1
+        return list(zip(starts.tolist(), stops.tolist()))
+    interval_starts = [r.start for r in intervals]
+
+    def next_interval_start(offset: int) -> float:
+        n = bisect.bisect_right(interval_starts, offset)
+        return interval_starts[n] if n < len(interval_starts) else math.inf
+
+    runs = []
+    start = previous = offsets[0]
+    boundary = next_interval_start(start)
+    for offset in offsets[1:]:
+        if offset - previous > max_gap + 1 or offset >= boundary:
+            runs.append((start, previous + 1))
+            start = offset
+            boundary = next_interval_start(offset)
+        previous = offset
+    runs.append((start, previous + 1))
+    return runs
@@ -1,30 +1,196 @@
 """Abstraction for reading XCX memory.
 
-Initial implementation uses Pymem to access Cemu's memory. It may be possible
-to use TCP Gecko to read the game running on a real WiiU in the future.
+Initial implementation uses Pymem to access Cemu's memory. On Linux, the same
+readers work with xcxtool.readers.procmem, which reads memory through /proc.
+It may be possible to use TCP Gecko to read the game running on a real WiiU in
+the future.
 """
 
 import abc
+import ctypes
+import sys
+import threading
+import typing
 
-import pymem
+try:
+    import pymem
+    import pymem.exception
+    import pymem.memory
+    import pymem.ressources.structure
+except ImportError:
+    pymem = None
 
 from xcxtool.app import SUCCESS
-from xcxtool.readers.save_files import _log
+from xcxtool.readers.anchors import (
+    Anchor,
+    anchor_cache_key,
+    get_anchor_cache,
+    scan_anchor,
+)
+from xcxtool.readers.save_files import SnapshotMixin, _log
 
 
-class PymemReaderBase(abc.ABC):
+class ProcessNotFound(Exception):
+    """No running process matches the requested name"""
 
-    def __init__(self, reader: pymem.Pymem):
+
+class PymemReaderBase(SnapshotMixin, abc.ABC):
+
+    # Exceptions raised by the process backend when memory can't be read
+    read_errors: tuple[type[Exception], ...] = (
+        (pymem.exception.MemoryReadError,) if pymem is not None else ()
+    )
+
+    # Ranges closer together than this are read in one go by snapshot()
+    snapshot_max_gap = 0x1000
+
+    def __init__(self, reader: "pymem.Pymem"):
         self.pymem = reader
-        self.data_start = self.search()
+        self.data_start = self.find_data_start()
 
     def close(self):
         self.pymem.close_process()
 
     def read_memory(self, offset: int, length: int) -> bytes:
         """Read `length` byts from address `offset` in process memory"""
+        if (snapshot := self._snapshot_view(offset, length)) is not None:
+            return snapshot.tobytes()
         return self.pymem.read_bytes(self.data_start + offset, length)
 
+    def view(self, offset: int, length: int) -> memoryview:
+        if (snapshot := self._snapshot_view(offset, length)) is not None:
+            return snapshot
+        buffer = bytearray(length)
+        self.readinto(offset, buffer)
+        return memoryview(buffer).toreadonly()
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        """Read process memory directly into a writable buffer"""
+        target = memoryview(buffer).cast("B")
+        if (snapshot := self._snapshot_view(offset, len(target))) is not None:
+            target[:] = snapshot
+            return len(target)
+        self._read_address_into(self.data_start + offset, target)
+        return len(target)
+
+    def _read_address_into(self, address: int, target: memoryview) -> None:
+        """Read len(target) bytes of process memory at address into target.
+
+        Raises MemoryReadError, as Pymem.read_bytes() does, if the memory
+        can't be read.
+        """
+        ctype = (ctypes.c_char * len(target)).from_buffer(target)
+        try:
+            pymem.memory.read_ctype(self.pymem.process_handle, address, ctype)
+        except pymem.exception.WinAPIError as e:
+            raise pymem.exception.MemoryReadError(
+                address, len(target), e.error_code
+            ) from e
+
+    def _read_blocks(self, blocks: list[range]) -> list[bytes]:
+        """Read each block of save data from the process"""
+        return [
+            self.pymem.read_bytes(self.data_start + block.start, len(block))
+            for block in blocks
+        ]
+
+    def _read_blocks_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        for offset, buffer in targets:
+            self._read_address_into(
+                self.data_start + offset, memoryview(buffer).cast("B")
+            )
+
+    def find_data_start(self) -> int:
+        """Return the address of save data, using the anchor cache if possible.
+
+        An address cached for this process is used if validate() confirms it,
+        otherwise the whole process is searched and the result cached.
+        """
+        cache = get_anchor_cache()
+        key = None
+        if cache is not None:
+            key = anchor_cache_key(self.pymem, *self.cache_identifiers())
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None and self.validate(cached):
+                _log.debug(f"Using cached save data address {cached:#018x}")
+                return cached
+        data_start = self.search()
+        if key is not None:
+            cache.put(key, data_start)
+        return data_start
+
+    def cache_identifiers(self) -> tuple:
+        """Values distinguishing this search from others in the same process"""
+        return (type(self).__name__,)
+
+    def validate(self, data_start: int) -> bool:
+        """Return True if data_start is still the address of the save data.
+
+        This should be much cheaper than search(). The default never accepts
+        a cached address.
+        """
+        return False
+
+    def find_anchors(self, pattern: bytes, first_only: bool = False) -> list[int]:
+        """Return the addresses of pattern in process memory.
+
+        Fixed-distance anchors such as b"Nagi.{2804}Lao" are found with
+        scan_anchor(). Other patterns use the backend's regex scan.
+        """
+        try:
+            anchor = Anchor.from_pattern(pattern)
+        except ValueError:
+            found = self.pymem.pattern_scan_all(pattern, return_multiple=not first_only)
+            if first_only:
+                return [] if found is None else [found]
+            return found
+        # Each scanning thread reads into its own reusable buffer
+        buffers = threading.local()
+
+        def read_bytes(address: int, length: int) -> bytearray:
+            buffer = getattr(buffers, "buffer", None)
+            if buffer is None or len(buffer) < length:
+                buffer = buffers.buffer = bytearray(length)
+            self._read_address_into(address, memoryview(buffer)[:length])
+            return buffer
+
+        return scan_anchor(
+            read_bytes,
+            self.scan_regions(),
+            anchor,
+            first_only=first_only,
+            read_errors=self.read_errors,
+        )
+
+    def scan_regions(self) -> typing.Iterator[tuple[int, int]]:
+        """Yield the (start, end) addresses of memory to search for save data
+
+        This uses the same rules as pymem.pattern.pattern_scan_all: committed
+        memory that can be read.
+        """
+        structure = pymem.ressources.structure
+        allowed_protections = {
+            structure.MEMORY_PROTECTION.PAGE_EXECUTE,
+            structure.MEMORY_PROTECTION.PAGE_EXECUTE_READ,
+            structure.MEMORY_PROTECTION.PAGE_EXECUTE_READWRITE,
+            structure.MEMORY_PROTECTION.PAGE_READWRITE,
+            structure.MEMORY_PROTECTION.PAGE_READONLY,
+        }
+        user_space_limit = 0x7FFFFFFF0000 if sys.maxsize > 2**32 else 0x7FFF0000
+        address = 0
+        while address < user_space_limit:
+            mbi = pymem.memory.virtual_query(self.pymem.process_handle, address)
+            next_region = mbi.BaseAddress + mbi.RegionSize
+            if (
+                mbi.state == structure.MEMORY_STATE.MEM_COMMIT
+                and mbi.protect in allowed_protections
+            ):
+                yield address, next_region
+            address = next_region
+
     @abc.abstractmethod
     def search(self) -> int:
         """Return a memory address of save data in process memory.
@@ -41,7 +207,7 @@ class PymemReader(PymemReaderBase):
 
     def __init__(
         self,
-        reader: pymem.Pymem,
+        reader: "pymem.Pymem",
         anchor_pattern: bytes = b"Nagi.{2804}Lao",
         anchor_offset: int = -0x5D4,
     ):
@@ -50,14 +216,21 @@ class PymemReader(PymemReaderBase):
         super().__init__(reader)
 
     def search(self) -> int:
-        anchor_addr = self.pymem.pattern_scan_all(self.anchor_pattern)
-        if anchor_addr is None:
+        found = self.find_anchors(self.anchor_pattern, first_only=True)
+        if not found:
             _log.error("Anchor pattern not found")
             raise ValueError("Save data not found")
-        return anchor_addr + self.anchor_offset
+        return found[0] + self.anchor_offset
 
-    def read_memory(self, offset: int, length: int) -> bytes:
-        return self.pymem.read_bytes(self.data_start + offset, length)
+    def cache_identifiers(self) -> tuple:
+        return type(self).__name__, self.anchor_pattern, self.anchor_offset
+
+    def validate(self, data_start: int) -> bool:
+        try:
+            anchor = Anchor.from_pattern(self.anchor_pattern)
+        except ValueError:
+            return False
+        return anchor.check(self.pymem.read_bytes, data_start - self.anchor_offset)
 
 
 class PymemReaderDE(PymemReaderBase):
@@ -67,7 +240,7 @@ class PymemReaderDE(PymemReaderBase):
 
     def __init__(
         self,
-        reader: pymem.Pymem,
+        reader: "pymem.Pymem",
         anchor_pattern: bytes = b"Nagi.{4076}Lao",
         anchor_to_start: int = -2128,
         next_pattern=b"rW\x03\x00",
@@ -80,9 +253,7 @@ class PymemReaderDE(PymemReaderBase):
         super().__init__(reader)
 
     def search(self) -> int:
-        candidate_addresses = self.pymem.pattern_scan_all(
-            self.anchor_pattern, return_multiple=True
-        )
+        candidate_addresses = self.find_anchors(self.anchor_pattern)
         anchor_address = None
         for address in candidate_addresses:
             if (
@@ -98,12 +269,63 @@ class PymemReaderDE(PymemReaderBase):
             raise ValueError("Save data not found")
         return anchor_address + self.anchor_offset
 
+    def cache_identifiers(self) -> tuple:
+        return (
+            type(self).__name__,
+            self.anchor_pattern,
+            self.anchor_offset,
+            self.next_pattern,
+            self.anchor_to_next,
+        )
+
+    def validate(self, data_start: int) -> bool:
+        try:
+            anchor = Anchor.from_pattern(self.anchor_pattern)
+        except ValueError:
+            return False
+        anchor_address = data_start - self.anchor_offset
+        if not anchor.check(self.pymem.read_bytes, anchor_address):
+            return False
+        try:
+            next_bytes = self.pymem.read_bytes(
+                anchor_address + self.anchor_to_next, len(self.next_pattern)
+            )
+        except self.read_errors:
+            return False
+        return next_bytes == self.next_pattern
+
+
+def open_process(
+    process_name: str, definitive_edition: bool = False
+) -> tuple[typing.Any, type[PymemReaderBase]]:
+    """Open an emulator process with the memory backend for this platform.
+
+    Returns the process and the reader class to use with it. Pymem is used on
+    Windows, and /proc elsewhere. Raises ProcessNotFound if no process called
+    process_name is running.
+    """
+    if sys.platform != "win32":
+        from xcxtool.readers import procmem
 
-def connect_cemu(process_name: str = "cemu.exe") -> PymemReader | None:
+        if definitive_edition:
+            return procmem.ProcMem(process_name), procmem.ProcMemReaderDE
+        return procmem.ProcMem(process_name), procmem.ProcMemReader
+
+    if pymem is None:
+        raise ProcessNotFound("Pymem is required to read emulator memory on Windows")
+    try:
+        process = pymem.Pymem(process_name)
+    except pymem.exception.ProcessNotFound as e:
+        raise ProcessNotFound(f"Could not find process {process_name}") from e
+    return process, PymemReaderDE if definitive_edition else PymemReader
+
+
+def connect_cemu(process_name: str = "cemu.exe") -> PymemReaderBase | None:
     """Connect to a Cemu process"""
     try:
-        reader = PymemReader(pymem.Pymem(process_name))
-    except pymem.exception.ProcessNotFound:
+        process, reader_class = open_process(process_name)
+        reader = reader_class(process)
+    except ProcessNotFound:
         _log.warning(
             f"Could not find {process_name} process, dynamic file names not available"
         )
@@ -119,15 +341,11 @@ def connect_cemu(process_name: str = "cemu.exe") -> PymemReader | None:
 def connect_emulator(process_name: str, definitive_edition: bool = False) -> PymemReaderBase | None:
     """Connect to emulator running the WiiU or Switch version"""
     try:
-        connection = pymem.Pymem(process_name)
-    except pymem.exception.ProcessNotFound:
+        connection, reader_class = open_process(process_name, definitive_edition)
+    except ProcessNotFound:
         _log.error(f"Could not find {process_name} process ")
         return None
     _log.log(SUCCESS, f"Found {process_name} at {connection.base_address:#018x}")
-    if definitive_edition:
-        reader_class = PymemReaderDE
-    else:
-        reader_class = PymemReader
     try:
         reader = reader_class(connection)
     except ValueError:
@@ -0,0 +1,160 @@
+"""Read XCX memory from a WiiU running TCP Gecko.
+
+TCP Gecko listens on port 7331. A memory read is the command byte 0x04
+followed by the big-endian start and end addresses. The reply is sent in
+blocks of up to 0x400 bytes, each preceded by a status byte: 0xbd if the
+block data follows, or 0xb0 if the block is all zeros and nothing follows.
+
+Requests are pipelined: every request in a batch is sent before any reply is
+read, so reading many ranges costs one network round trip instead of one per
+range. Adjacent and nearby ranges are coalesced into a single request.
+"""
+
+import logging
+import socket
+import struct
+import typing
+
+from xcxtool.app import LOGGER_NAME, SUCCESS
+from xcxtool.readers.save_files import SnapshotMixin
+
+__all__ = ["GeckoConnection", "GeckoReader", "connect_gecko"]
+
+_log = logging.getLogger(LOGGER_NAME)
+
+GECKO_PORT = 7331
+COMMAND_READ_MEMORY = 0x04
+STATUS_ZEROS = 0xB0
+STATUS_DATA = 0xBD
+BLOCK_SIZE = 0x400
+# Ranges closer together than this are fetched with one request
+COALESCE_GAP = 0x400
+# Requests sent before their replies are read
+PIPELINE_DEPTH = 64
+# Default address of the save data, as served by gecko_server. Pass the
+# address found on the console when monitoring real hardware.
+DEFAULT_DATA_START = 0x10000000
+
+
+class GeckoConnection:
+    """A persistent connection to TCP Gecko"""
+
+    def __init__(self, host: str, port: int = GECKO_PORT, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._stream = self._socket.makefile("rb")
+
+    def __enter__(self) -> "GeckoConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stream.close()
+        self._socket.close()
+
+    def read(self, address: int, length: int) -> bytes:
+        return self.read_many([(address, length)])[0]
+
+    def read_many(self, ranges: typing.Sequence[tuple[int, int]]) -> list[bytes]:
+        """Read several (address, length) ranges with pipelined requests"""
+        buffers = [bytearray(length) for _, length in ranges]
+        self.read_many_into(
+            [(address, buffer) for (address, _), buffer in zip(ranges, buffers)]
+        )
+        return [bytes(buffer) for buffer in buffers]
+
+    def read_many_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        """Read memory at each address into the paired buffer"""
+        for n in range(0, len(targets), PIPELINE_DEPTH):
+            batch = targets[n : n + PIPELINE_DEPTH]
+            self._socket.sendall(
+                b"".join(
+                    struct.pack(
+                        ">BII", COMMAND_READ_MEMORY, address, address + len(buffer)
+                    )
+                    for address, buffer in batch
+                    if len(buffer)
+                )
+            )
+            for _, buffer in batch:
+                self._receive_into(memoryview(buffer).cast("B"))
+
+    def _receive_into(self, target: memoryview) -> None:
+        for start in range(0, len(target), BLOCK_SIZE):
+            block = target[start : start + BLOCK_SIZE]
+            status = self._stream.read(1)
+            if status == bytes([STATUS_ZEROS]):
+                block[:] = bytes(len(block))
+            elif status == bytes([STATUS_DATA]):
+                if self._stream.readinto(block) != len(block):
+                    raise ConnectionError("TCP Gecko connection closed mid-read")
+            elif not status:
+                raise ConnectionError("TCP Gecko connection closed")
+            else:
+                raise ConnectionError(f"Unexpected TCP Gecko status {status[0]:#04x}")
+
+
+class GeckoReader(SnapshotMixin):
+    """Read save data from WiiU memory over TCP Gecko.
+
+    data_start is the address of the save data in console memory. Inside a
+    snapshot() context, every range is fetched in one pipelined round trip.
+    """
+
+    byte_order = "big"
+    snapshot_max_gap = COALESCE_GAP
+
+    def __init__(self, connection: GeckoConnection, data_start: int):
+        self.connection = connection
+        self.data_start = data_start
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def read_memory(self, offset: int, length: int) -> bytes:
+        if (snapshot := self._snapshot_view(offset, length)) is not None:
+            return snapshot.tobytes()
+        return self.connection.read(self.data_start + offset, length)
+
+    def view(self, offset: int, length: int) -> memoryview:
+        if (snapshot := self._snapshot_view(offset, length)) is not None:
+            return snapshot
+        return memoryview(self.read_memory(offset, length))
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        target = memoryview(buffer).cast("B")
+        if (snapshot := self._snapshot_view(offset, len(target))) is not None:
+            target[:] = snapshot
+        else:
+            self.connection.read_many_into([(self.data_start + offset, target)])
+        return len(target)
+
+    def _read_blocks(self, blocks: list[range]) -> list[bytes]:
+        return self.connection.read_many(
+            [(self.data_start + block.start, len(block)) for block in blocks]
+        )
+
+    def _read_blocks_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        self.connection.read_many_into(
+            [(self.data_start + offset, buffer) for offset, buffer in targets]
+        )
+
+
+def connect_gecko(address: str, data_start: int) -> GeckoReader | None:
+    """Connect to TCP Gecko at "host" or "host:port" """
+    host, _, port = address.partition(":")
+    try:
+        connection = GeckoConnection(host, int(port) if port else GECKO_PORT)
+    except OSError as e:
+        _log.error(f"Could not connect to TCP Gecko at {address}: {e}")
+        return None
+    _log.log(SUCCESS, f"Connected to TCP Gecko at {address}")
+    return GeckoReader(connection, data_start)
@@ -0,0 +1,149 @@
+"""A stand-in TCP Gecko server that serves a save data image.
+
+This implements just the memory read command of TCP Gecko, so GeckoReader,
+monitor and their benchmarks can be run without a WiiU. The image can be
+changed while the server is running to simulate the game changing memory.
+
+Run it from the command line to serve a gamedata file:
+
+    python -m xcxtool.readers.gecko_server path/to/gamedata
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+
+from plumbum import cli
+
+from xcxtool.app import XCXToolApplication
+from xcxtool.readers.gecko import (
+    BLOCK_SIZE,
+    COMMAND_READ_MEMORY,
+    DEFAULT_DATA_START,
+    GECKO_PORT,
+    STATUS_DATA,
+    STATUS_ZEROS,
+)
+from xcxtool.savefiles.encryption import decrypt_save_data, detect_byte_order
+
+__all__ = ["GeckoServer", "GeckoServerApp"]
+
+
+class _GeckoHandler(socketserver.StreamRequestHandler):
+    server: "GeckoServer"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        while command := self.rfile.read(1):
+            if command[0] != COMMAND_READ_MEMORY:
+                return
+            request = self.rfile.read(8)
+            if len(request) != 8:
+                return
+            start, end = struct.unpack(">II", request)
+            self.wfile.write(self.server.encode_read(start, end))
+
+
+class GeckoServer(socketserver.ThreadingTCPServer):
+    """Serve image at data_start over the TCP Gecko memory read protocol"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        image: bytes | bytearray,
+        data_start: int = DEFAULT_DATA_START,
+        address: tuple[str, int] = ("127.0.0.1", GECKO_PORT),
+    ):
+        self.image = image
+        self.data_start = data_start
+        self._thread: threading.Thread | None = None
+        super().__init__(address, _GeckoHandler)
+
+    def __enter__(self) -> "GeckoServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+        self.server_close()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "GeckoServer":
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def encode_read(self, start: int, end: int) -> bytes:
+        """Encode the reply to a read of [start, end)
+
+        Memory outside the image reads as zeros.
+        """
+        reply = bytearray()
+        zero_block = bytes(BLOCK_SIZE)
+        for block_start in range(start, end, BLOCK_SIZE):
+            block_end = min(block_start + BLOCK_SIZE, end)
+            block = self._read_image(block_start, block_end)
+            if block == zero_block[: len(block)]:
+                reply.append(STATUS_ZEROS)
+            else:
+                reply.append(STATUS_DATA)
+                reply += block
+        return bytes(reply)
+
+    def _read_image(self, start: int, end: int) -> bytes:
+        offset = start - self.data_start
+        data = bytes(self.image[max(offset, 0) : max(end - self.data_start, 0)])
+        padding_before = min(max(-offset, 0), end - start)
+        data = bytes(padding_before) + data
+        return data + bytes(end - start - len(data))
+
+
+class GeckoServerApp(XCXToolApplication):
+    """Serve a save file over a stand-in TCP Gecko server"""
+
+    host: str = cli.SwitchAttr(
+        ["--host"], default="127.0.0.1", help="Address to listen on"
+    )
+    port: int = cli.SwitchAttr(
+        ["-p", "--port"], int, default=GECKO_PORT, help="Port to listen on"
+    )
+    data_start: int = cli.SwitchAttr(
+        ["-a", "--address"],
+        lambda value: int(value, 0),
+        default=DEFAULT_DATA_START,
+        help="Address to serve the save data at",
+    )
+
+    def main(self, save_file: cli.ExistingFile):
+        # noinspection PyTypeChecker
+        raw_data: bytes = save_file.read(None, "rb")
+        byte_order = detect_byte_order(raw_data)
+        if byte_order is None:
+            self.error("Could not detect byte order of save file")
+            return 1
+        image = bytearray(decrypt_save_data(raw_data, byte_order))
+        with GeckoServer(image, self.data_start, (self.host, self.port)) as server:
+            self.success(
+                f"Serving [green]{save_file}[/green] at {self.data_start:#010x} "
+                f"on {self.host}:{server.port}"
+            )
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+
+if __name__ == "__main__":
+    GeckoServerApp.run()
@@ -0,0 +1,349 @@
+"""Reading emulator memory on Linux through /proc.
+
+ProcMem provides the parts of the pymem.Pymem interface used by the readers
+in xcxtool.readers.emulators, so the same search and read logic works for
+Cemu, Yuzu and Ryujinx running on Linux. Memory is read with
+process_vm_readv(2), which can read many ranges in one system call, falling
+back to reading /proc/<pid>/mem if it isn't available.
+
+Reading another process's memory requires ptrace access to it: either run
+xcxtool as the same user with kernel.yama.ptrace_scope = 0, or give python the
+CAP_SYS_PTRACE capability.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import typing
+
+from xcxtool.readers.emulators import PymemReader, PymemReaderDE, ProcessNotFound
+from xcxtool.readers.save_files import _log
+
+__all__ = [
+    "MemoryRegion",
+    "ProcMem",
+    "ProcMemReader",
+    "ProcMemReaderDE",
+    "ProcessNotFound",
+    "find_process",
+]
+
+# Regions are scanned in chunks of this size
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+# Chunks overlap by this much so matches spanning two chunks are found
+SCAN_OVERLAP = 64 * 1024
+# Maximum number of iovecs in one process_vm_readv call
+IOV_MAX = 1024
+
+
+class MemoryRegion(typing.NamedTuple):
+    """A mapping from /proc/<pid>/maps"""
+
+    start: int
+    end: int
+    perms: str
+    offset: int
+    inode: int
+    path: str
+
+    @property
+    def readable(self) -> bool:
+        return self.perms.startswith("r")
+
+    @property
+    def anonymous(self) -> bool:
+        """True for mappings not backed by a regular file.
+
+        Emulators map guest memory either anonymously or from shared memory
+        objects, so these are the regions searched for save data.
+        """
+        return (
+            self.inode == 0
+            or self.path.startswith(("/memfd:", "/dev/shm/", "/SYSV"))
+        ) and self.path not in ("[vvar]", "[vsyscall]", "[vdso]")
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+def _load_process_vm_readv():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        function = libc.process_vm_readv
+    except (OSError, AttributeError):
+        return None
+    function.restype = ctypes.c_ssize_t
+    function.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_IOVec),
+        ctypes.c_ulong,
+        ctypes.POINTER(_IOVec),
+        ctypes.c_ulong,
+        ctypes.c_ulong,
+    ]
+    return function
+
+
+_process_vm_readv = _load_process_vm_readv()
+
+
+class ProcMem:
+    """Access the memory of a Linux process, in the style of pymem.Pymem"""
+
+    process_handle = None
+
+    def __init__(self, process: str | int):
+        if isinstance(process, int):
+            self.process_id = process
+        else:
+            self.process_id = find_process(process)
+        if not os.path.exists(f"/proc/{self.process_id}"):
+            raise ProcessNotFound(f"No process with id {self.process_id}")
+        self._mem_fd: int | None = None
+        self._use_vm_readv = _process_vm_readv is not None
+
+    def close_process(self) -> None:
+        if self._mem_fd is not None:
+            os.close(self._mem_fd)
+            self._mem_fd = None
+
+    @property
+    def base_address(self) -> int:
+        """Address the main executable is loaded at"""
+        try:
+            exe = os.readlink(f"/proc/{self.process_id}/exe")
+        except OSError:
+            exe = None
+        regions = self.regions()
+        for region in regions:
+            if region.path == exe:
+                return region.start
+        return regions[0].start
+
+    def check_access(self) -> None:
+        """Raise PermissionError if the process's memory can't be read at all.
+
+        When ptrace access is refused every read fails, which would otherwise
+        look like a search that found nothing.
+        """
+        try:
+            region = next((r for r in self.regions() if r.readable), None)
+            if region is not None:
+                self.read_bytes(region.start, 1)
+        except PermissionError as e:
+            raise PermissionError(
+                e.errno,
+                f"Not allowed to read the memory of process {self.process_id}. "
+                "Run xcxtool as the same user with kernel.yama.ptrace_scope = 0, "
+                "or give python the CAP_SYS_PTRACE capability",
+            ) from e
+        except OSError:
+            # Other errors only affect that region, the search skips it
+            pass
+
+    def regions(self) -> list[MemoryRegion]:
+        """Return the memory mappings of the process"""
+        regions = []
+        with open(f"/proc/{self.process_id}/maps") as f:
+            for line in f:
+                fields = line.split(maxsplit=5)
+                start, _, end = fields[0].partition("-")
+                regions.append(
+                    MemoryRegion(
+                        int(start, 16),
+                        int(end, 16),
+                        fields[1],
+                        int(fields[2], 16),
+                        int(fields[4]),
+                        fields[5].strip() if len(fields) > 5 else "",
+                    )
+                )
+        return regions
+
+    def read_bytes(self, address: int, length: int) -> bytes:
+        buffer = bytearray(length)
+        self.read_into(address, buffer)
+        return bytes(buffer)
+
+    def read_into(self, address: int, buffer: bytearray | memoryview) -> int:
+        """Read len(buffer) bytes from address into buffer"""
+        target = memoryview(buffer).cast("B")
+        if self._use_vm_readv:
+            self._vm_readv([(address, target)])
+        else:
+            self._pread(address, target)
+        return len(target)
+
+    def read_many(self, ranges: typing.Sequence[tuple[int, int]]) -> list[bytes]:
+        """Read several (address, length) ranges, with one system call if possible"""
+        buffers = [bytearray(length) for _, length in ranges]
+        self.read_many_into(
+            [(address, buffer) for (address, _), buffer in zip(ranges, buffers)]
+        )
+        return [bytes(buffer) for buffer in buffers]
+
+    def read_many_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        """Read memory at each address into the paired buffer"""
+        targets = [
+            (address, memoryview(buffer).cast("B")) for address, buffer in targets
+        ]
+        if self._use_vm_readv:
+            for n in range(0, len(targets), IOV_MAX):
+                self._vm_readv(targets[n : n + IOV_MAX])
+        else:
+            for address, target in targets:
+                self._pread(address, target)
+
+    def pattern_scan_all(
+        self, pattern: bytes, return_multiple: bool = False
+    ) -> int | list[int] | None:
+        """Search readable anonymous memory for a regex pattern.
+
+        Returns the address of the first match (or None), or a list of every
+        match if return_multiple is True, as pymem.Pymem.pattern_scan_all does.
+        """
+        regex = re.compile(pattern, re.DOTALL)
+        found = []
+        for region in self.regions():
+            if not (region.readable and region.anonymous):
+                continue
+            for address in self._scan_region(regex, region):
+                if not return_multiple:
+                    return address
+                found.append(address)
+        return found if return_multiple else None
+
+    def _scan_region(
+        self, regex: re.Pattern, region: MemoryRegion
+    ) -> typing.Iterator[int]:
+        for chunk_start in range(region.start, region.end, SCAN_CHUNK_SIZE):
+            chunk_end = min(chunk_start + SCAN_CHUNK_SIZE, region.end)
+            read_end = min(chunk_end + SCAN_OVERLAP, region.end)
+            try:
+                data = self.read_bytes(chunk_start, read_end - chunk_start)
+            except OSError as e:
+                _log.debug(f"Skipping unreadable region {region.start:#x}: {e}")
+                return
+            for match in regex.finditer(data):
+                if match.start() >= chunk_end - chunk_start:
+                    break
+                yield chunk_start + match.start()
+
+    def _vm_readv(self, targets: list[tuple[int, memoryview]]) -> None:
+        count = len(targets)
+        local_iov = (_IOVec * count)()
+        remote_iov = (_IOVec * count)()
+        # Keep the ctypes views alive until the call returns
+        views = []
+        expected = 0
+        for n, (address, target) in enumerate(targets):
+            view = (ctypes.c_char * len(target)).from_buffer(target)
+            views.append(view)
+            local_iov[n] = _IOVec(ctypes.addressof(view), len(target))
+            remote_iov[n] = _IOVec(address, len(target))
+            expected += len(target)
+        result = _process_vm_readv(
+            self.process_id, local_iov, count, remote_iov, count, 0
+        )
+        if result == -1:
+            errno = ctypes.get_errno()
+            if errno == 38:  # ENOSYS
+                self._use_vm_readv = False
+                for address, target in targets:
+                    self._pread(address, target)
+                return
+            raise OSError(errno, os.strerror(errno))
+        if result != expected:
+            raise OSError(
+                f"Partial read of process memory ({result} of {expected} bytes)"
+            )
+
+    def _pread(self, address: int, target: memoryview) -> None:
+        if self._mem_fd is None:
+            self._mem_fd = os.open(f"/proc/{self.process_id}/mem", os.O_RDONLY)
+        read = os.preadv(self._mem_fd, [target], address)
+        if read != len(target):
+            raise OSError(
+                f"Partial read of process memory ({read} of {len(target)} bytes)"
+            )
+
+
+class _ProcMemReaderMixin:
+    """Read through ProcMem's vectored reads instead of the Pymem API"""
+
+    pymem: ProcMem
+    data_start: int
+    read_errors = (OSError,)
+
+    def find_data_start(self) -> int:
+        try:
+            self.pymem.check_access()
+        except PermissionError as e:
+            _log.error(e.strerror)
+            raise ValueError(e.strerror) from e
+        return super().find_data_start()
+
+    def _read_address_into(self, address: int, target: memoryview) -> None:
+        self.pymem.read_into(address, target)
+
+    def scan_regions(self) -> typing.Iterator[tuple[int, int]]:
+        for region in self.pymem.regions():
+            if region.readable and region.anonymous:
+                yield region.start, region.end
+
+    def _read_blocks(self, blocks: list[range]) -> list[bytes]:
+        return self.pymem.read_many(
+            [(self.data_start + block.start, len(block)) for block in blocks]
+        )
+
+    def _read_blocks_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        self.pymem.read_many_into(
+            [(self.data_start + offset, buffer) for offset, buffer in targets]
+        )
+
+
+class ProcMemReader(_ProcMemReaderMixin, PymemReader):
+    """Read WiiU save data from Cemu running on Linux"""
+
+
+class ProcMemReaderDE(_ProcMemReaderMixin, PymemReaderDE):
+    """Read Definitive Edition save data from an emulator running on Linux"""
+
+
+def find_process(process_name: str) -> int:
+    """Return the id of a running process by name.
+
+    Names are compared case-insensitively with the process name and the
+    file name of its executable, ignoring any ".exe" suffix.
+    """
+    wanted = _normalise_name(process_name)
+    own_pid = os.getpid()
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit() or int(entry.name) == own_pid:
+            continue
+        names = []
+        try:
+            with open(f"/proc/{entry.name}/comm") as f:
+                names.append(f.read().strip())
+            with open(f"/proc/{entry.name}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0]
+            names.append(os.path.basename(os.fsdecode(argv0)))
+        except OSError:
+            continue
+        if any(_normalise_name(name) == wanted for name in names if name):
+            return int(entry.name)
+    raise ProcessNotFound(f"Could not find process {process_name}")
+
+
+def _normalise_name(name: str) -> str:
+    name = name.lower()
+    return name[:-4] if name.endswith(".exe") else name
@@ -0,0 +1,260 @@
+"""Record save data read during a monitoring session, and play it back.
+
+A recording is a header followed by frames. Each frame holds the time it was
+recorded, relative to the first frame, and either the whole of the save data
+(a keyframe) or the runs of bytes that changed since the previous frame:
+
+    header:   magic, format version, byte order, data_start, data size
+    frame:    timestamp (seconds), frame type, run count
+    run:      offset, length, data
+
+Keyframes only hold one run covering the whole data. Recordings whose name
+ends in ".gz" are gzip compressed.
+
+ReplayReader plays a recording back as a SaveDataReader, so the monitor can
+be run, profiled and benchmarked without an emulator.
+"""
+
+import contextlib
+import gzip
+import os
+import struct
+import time
+import typing
+
+from xcxtool.readers.diff import changed_offsets, find_runs
+
+__all__ = ["ReplayReader", "ReplayRecorder"]
+
+MAGIC = b"XCXREPLY"
+FORMAT_VERSION = 1
+KEYFRAME = 0
+DELTA = 1
+# Changed runs this close together are stored as one run
+DIFF_MAX_GAP = 8
+
+_HEADER = struct.Struct(">8sBBQI")
+_FRAME = struct.Struct(">dBI")
+_RUN = struct.Struct(">II")
+_BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+def _open(path: str | os.PathLike, mode: str) -> typing.BinaryIO:
+    if os.fspath(path).endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+class ReplayRecorder:
+    """Write save data to a recording, one frame per call to record()
+
+    A keyframe is written every keyframe_interval frames, and frames are
+    otherwise stored as the changes from the frame before.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        data_size: int,
+        byte_order: typing.Literal["big", "little"] = "little",
+        data_start: int = 0,
+        keyframe_interval: int = 100,
+    ):
+        self.path = path
+        self.data_size = data_size
+        self.keyframe_interval = keyframe_interval
+        self.frames = 0
+        self._previous: bytes | None = None
+        self._start: float | None = None
+        self._file = _open(path, "wb")
+        self._file.write(
+            _HEADER.pack(
+                MAGIC, FORMAT_VERSION, _BYTE_ORDERS[byte_order], data_start, data_size
+            )
+        )
+
+    def __enter__(self) -> "ReplayRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def record(self, data: bytes | bytearray, timestamp: float | None = None) -> None:
+        """Add a frame to the recording.
+
+        timestamp is in seconds. By default it's the time since the first frame
+        was recorded.
+        """
+        if len(data) != self.data_size:
+            raise ValueError(
+                f"Frame is {len(data)} bytes, recording is of {self.data_size} bytes"
+            )
+        if timestamp is None:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now
+            timestamp = now - self._start
+        data = bytes(data)
+        if self._previous is None or self.frames % self.keyframe_interval == 0:
+            frame_type, runs = KEYFRAME, [(0, data)]
+        else:
+            frame_type, runs = DELTA, changed_runs(self._previous, data)
+        self._file.write(_FRAME.pack(timestamp, frame_type, len(runs)))
+        for offset, run in runs:
+            self._file.write(_RUN.pack(offset, len(run)))
+            self._file.write(run)
+        self._previous = data
+        self.frames += 1
+
+
+class ReplayReader:
+    """Play back a recording made by ReplayRecorder.
+
+    With a speed, frames are played back in time with the recording: 1 is
+    real time, 10 is ten times as fast. Reads return the latest frame due at
+    the time of the read. With speed=None playback is unthrottled, and every
+    read moves on to the next frame.
+
+    Once the last frame has been read, further reads raise EOFError. Reads
+    inside a snapshot() context all see the same frame.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        speed: float | None = 1.0,
+        clock: typing.Callable[[], float] = time.perf_counter,
+    ):
+        self.path = path
+        self.speed = speed
+        self._clock = clock
+        self._file = _open(path, "rb")
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path} is not a save data recording")
+        magic, version, byte_order, self.data_start, self.data_size = (
+            _HEADER.unpack(header)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a save data recording")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording format version {version}")
+        self.byte_order = "big" if byte_order else "little"
+        self.frame = -1
+        self._data = bytearray(self.data_size)
+        self._next_frame = self._read_frame()
+        if self._next_frame is None:
+            raise ValueError(f"{path} has no frames")
+        self._start: float | None = None
+        self._pinned = 0
+
+    def __enter__(self) -> "ReplayReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def read_memory(self, offset: int, length: int) -> bytes:
+        return bytes(self.view(offset, length))
+
+    def view(self, offset: int, length: int) -> memoryview:
+        self._advance()
+        return memoryview(self._data)[offset : offset + length].toreadonly()
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        self._advance()
+        target = memoryview(buffer).cast("B")
+        target[:] = memoryview(self._data)[offset : offset + len(target)]
+        return len(target)
+
+    @contextlib.contextmanager
+    def snapshot(
+        self, ranges: typing.Iterable[range]
+    ) -> typing.Iterator["ReplayReader"]:
+        """Serve every read in the context from the same frame"""
+        self._advance()
+        self._pinned += 1
+        try:
+            yield self
+        finally:
+            self._pinned -= 1
+
+    def read_ranges(self, ranges: typing.Iterable[range]) -> list[bytes]:
+        """Read each of ranges from the same frame"""
+        ranges = list(ranges)
+        with self.snapshot(ranges):
+            return [self.read_memory(r.start, len(r)) for r in ranges]
+
+    def readinto_ranges(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        """Read into each (offset, buffer) from the same frame"""
+        with self.snapshot(()):
+            for offset, buffer in targets:
+                self.readinto(offset, buffer)
+
+    def _advance(self) -> None:
+        if self._pinned:
+            return
+        if self._next_frame is None:
+            raise EOFError(f"End of recording {self.path}")
+        if self.speed is None:
+            self._apply_next_frame()
+            return
+        now = self._clock()
+        if self._start is None:
+            # Timestamps are relative to the first frame, played at the first read
+            self._start = now - self._next_frame[0] / self.speed
+        elapsed = (now - self._start) * self.speed
+        while self._next_frame is not None and (
+            self.frame < 0 or self._next_frame[0] <= elapsed
+        ):
+            self._apply_next_frame()
+
+    def _apply_next_frame(self) -> None:
+        _, runs = self._next_frame
+        for offset, run in runs:
+            self._data[offset : offset + len(run)] = run
+        self.frame += 1
+        self._next_frame = self._read_frame()
+
+    def _read_frame(self) -> tuple[float, list[tuple[int, bytes]]] | None:
+        header = self._file.read(_FRAME.size)
+        if not header:
+            return None
+        if len(header) != _FRAME.size:
+            raise ValueError(f"Recording {self.path} is truncated")
+        timestamp, _, count = _FRAME.unpack(header)
+        runs = []
+        for _ in range(count):
+            run_header = self._file.read(_RUN.size)
+            if len(run_header) != _RUN.size:
+                raise ValueError(f"Recording {self.path} is truncated")
+            offset, length = _RUN.unpack(run_header)
+            run = self._file.read(length)
+            if len(run) != length or offset + length > self.data_size:
+                raise ValueError(f"Recording {self.path} is corrupt")
+            runs.append((offset, run))
+        return timestamp, runs
+
+
+def changed_runs(
+    before: bytes, after: bytes, max_gap: int = DIFF_MAX_GAP
+) -> list[tuple[int, bytes]]:
+    """Return (offset, data) for each run of bytes in after that differs from before.
+
+    Runs separated by max_gap or fewer unchanged bytes are merged.
+    """
+    whole = [range(len(after))]
+    offsets = changed_offsets(before, after, whole)
+    after_view = memoryview(after)
+    return [
+        (start, bytes(after_view[start:stop]))
+        for start, stop in find_runs(offsets, whole, max_gap)
+    ]
@@ -1,14 +1,27 @@
 """High-level classes for reading save file data.
 """
+import abc
+import collections
+import contextlib
+import functools
 import logging
+import mmap
 import os
 import typing
 
 from xcxtool.app import LOGGER_NAME
-from xcxtool.savefiles.encryption import decrypt_save_data, detect_byte_order
+from xcxtool.savefiles.cache import cache_key, get_decrypted_cache
+from xcxtool.savefiles.encryption import (
+    decrypt_range,
+    decrypt_save_data,
+    detect_byte_order,
+)
 
 _log = logging.getLogger(LOGGER_NAME)
 
+DEFAULT_PAGE_SIZE = 0x4000
+DEFAULT_MAX_PAGES = 16
+
 
 class SaveDataReader(typing.Protocol):
 
@@ -18,24 +31,355 @@ class SaveDataReader(typing.Protocol):
     def read_memory(self, offset: int, length: int) -> bytes:
         """Read `length` bytes from `offset`, relative to `self.data_start`"""
 
+    def view(self, offset: int, length: int) -> memoryview:
+        """Return a read-only view of `length` bytes from `offset`.
+
+        Where possible the view refers to the reader's own buffer instead of a
+        copy, so it must not be kept after the reader changes or is closed.
+        """
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        """Read len(buffer) bytes from `offset` into `buffer`.
+
+        Returns the number of bytes read.
+        """
+
+    def snapshot(
+        self, ranges: typing.Iterable[range]
+    ) -> typing.ContextManager["SaveDataReader"]:
+        """Read `ranges` together, and serve reads inside them from that copy.
+
+        Reads made inside the context that fall within `ranges` see the data
+        as it was when the context was entered, so several values can be read
+        consistently from a source that may change between reads.
+        """
+
+    def read_ranges(self, ranges: typing.Iterable[range]) -> list[bytes]:
+        """Read the data in each of `ranges`, in as few reads as possible.
+
+        The ranges are read as one snapshot, so the data is consistent
+        between them.
+        """
+
+    def readinto_ranges(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        """Read the data at each offset into the buffer paired with it.
+
+        Like read_ranges(), the data is read as consistently as possible,
+        but into the caller's buffers instead of new bytes objects.
+        """
+
+
+class SnapshotMixin(abc.ABC):
+    """snapshot() for readers of data that can change between reads.
+
+    Classes using this implement _read_blocks(), and check _snapshot_view()
+    before reading from their source.
+    """
+
+    # Ranges closer together than this are read together
+    snapshot_max_gap: int = 0
+    _snapshot: list[tuple[range, memoryview]] | None = None
+
+    @contextlib.contextmanager
+    def snapshot(
+        self, ranges: typing.Iterable[range]
+    ) -> typing.Iterator["SnapshotMixin"]:
+        """Read `ranges` from the source in as few reads as possible.
+
+        Ranges less than snapshot_max_gap bytes apart are read together.
+        Inside the context, reads that fall within one of the ranges are
+        served from the snapshot, so values read together can't change
+        between reads. If an enclosing snapshot already covers every range,
+        it is reused.
+        """
+        ranges = list(ranges)
+        if self._snapshot is not None and all(
+            self._snapshot_view(r.start, len(r)) is not None for r in ranges
+        ):
+            yield self
+            return
+
+        blocks = coalesce_ranges(ranges, self.snapshot_max_gap)
+        data = self._read_blocks(blocks)
+        previous = self._snapshot
+        self._snapshot = [(block, memoryview(d)) for block, d in zip(blocks, data)]
+        try:
+            yield self
+        finally:
+            self._snapshot = previous
+
+    def read_ranges(self, ranges: typing.Iterable[range]) -> list[bytes]:
+        ranges = list(ranges)
+        with self.snapshot(ranges):
+            return [self.read_memory(r.start, len(r)) for r in ranges]
+
+    def readinto_ranges(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        if self._snapshot is not None:
+            for offset, buffer in targets:
+                self.readinto(offset, buffer)
+            return
+        self._read_blocks_into(targets)
+
+    @abc.abstractmethod
+    def _read_blocks(self, blocks: list[range]) -> list[bytes]:
+        """Read each block of data, relative to data_start"""
+
+    def _read_blocks_into(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        """Read the data at each offset into its buffer.
+
+        This copies from _read_blocks(); readers that can read straight into
+        a buffer override it.
+        """
+        blocks = [range(offset, offset + len(buffer)) for offset, buffer in targets]
+        for (_, buffer), data in zip(targets, self._read_blocks(blocks)):
+            _copy_into(buffer, data)
+
+    def _snapshot_view(self, offset: int, length: int) -> memoryview | None:
+        """Return the snapshot data for a read, or None if it isn't covered"""
+        if self._snapshot is None:
+            return None
+        for block, data in self._snapshot:
+            if block.start <= offset and offset + length <= block.stop:
+                start = offset - block.start
+                return data[start : start + length]
+        return None
+
 
 class SaveFileReader:
-    """Read data from a XCX save file (gamedata)"""
+    """Read data from a XCX save file (gamedata)
+
+    Data is decrypted on demand: read_memory() only decrypts the requested
+    bytes until the whole of the decrypted data is requested via self.data
+
+    Decrypted data is kept in the decrypted save cache, so a file that has
+    been fully decrypted before is not decrypted again.
+    """
+
+    _save_file: str | os.PathLike | None = None
+    _cache_key: str | None = None
 
     def __init__(self, save_file: str | os.PathLike):
+        self._save_file = save_file
         with open(save_file, "rb") as f:
-            data = f.read()
-        byte_order = detect_byte_order(data)
+            stat = os.fstat(f.fileno())
+            raw_data = f.read()
+            # The key is only valid if the file didn't change while being read
+            if _same_file_version(stat, os.fstat(f.fileno())):
+                self._cache_key = cache_key(save_file, stat, raw_data)
+        cache = get_decrypted_cache()
+        cached = None
+        if cache is not None and self._cache_key is not None:
+            cached = cache.get(save_file, self._cache_key)
+        if cached is not None:
+            self._load(cached)
+            self.data = cached
+            return
+        self._load(raw_data)
+
+    def __enter__(self) -> "SaveFileReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # The file is closed once it has been read
+        pass
+
+    @classmethod
+    def from_data(cls, raw_data: bytes) -> "SaveFileReader":
+        """Create a reader for save data that has already been loaded.
+
+        raw_data may be encrypted or decrypted.
+        """
+        reader = cls.__new__(cls)
+        reader._load(raw_data)
+        return reader
+
+    def _load(self, raw_data: bytes) -> None:
+        byte_order = detect_byte_order(raw_data)
         if byte_order is None:
             raise ValueError("Could not determine save data byte order")
 
+        self.raw_data = raw_data
         self.byte_order = byte_order
-        self.data = decrypt_save_data(data, byte_order)
         self.data_start = 0
 
+    @functools.cached_property
+    def data(self) -> bytes:
+        """The whole decrypted save data"""
+        data = decrypt_save_data(self.raw_data, self.byte_order)
+        if self._cache_key is not None and data is not self.raw_data:
+            cache = get_decrypted_cache()
+            if cache is not None:
+                cache.put(self._save_file, data, self._cache_key)
+        return data
+
     def read_memory(self, offset: int, length: int) -> bytes:
         start = offset + self.data_start
-        end = start + length
-        return self.data[start:end]
+        if "data" in self.__dict__:
+            return self.data[start : start + length]
+        return decrypt_range(self.raw_data, start, length, self.byte_order)
+
+    def view(self, offset: int, length: int) -> memoryview:
+        start = offset + self.data_start
+        if "data" in self.__dict__:
+            return memoryview(self.data)[start : start + length]
+        return memoryview(self.read_memory(offset, length))
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        return _copy_into(buffer, self.view(offset, len(buffer)))
+
+    @contextlib.contextmanager
+    def snapshot(self, ranges: typing.Iterable[range]):
+        # Save files don't change while they are being read
+        yield self
+
+    def read_ranges(self, ranges: typing.Iterable[range]) -> list[bytes]:
+        return [self.read_memory(r.start, len(r)) for r in ranges]
+
+    def readinto_ranges(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        for offset, buffer in targets:
+            self.readinto(offset, buffer)
+
+
+class MappedSaveFileReader:
+    """Read data from a memory-mapped XCX save file
+
+    Nothing is read from the file until read_memory() is called. Data is then
+    decrypted a page at a time, and the most recently used pages are kept so
+    that repeated reads of nearby values don't decrypt the same data again.
+    """
+
+    def __init__(
+        self,
+        save_file: str | os.PathLike,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+    ):
+        if page_size <= 0 or max_pages <= 0:
+            raise ValueError("page_size and max_pages must be positive")
+        with open(save_file, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        byte_order = detect_byte_order(self._map[:16])
+        if byte_order is None:
+            self._map.close()
+            raise ValueError("Could not determine save data byte order")
+
+        self.byte_order = byte_order
+        self.data_start = 0
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages: collections.OrderedDict[int, bytes] = collections.OrderedDict()
+
+    def __enter__(self) -> "MappedSaveFileReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def close(self) -> None:
+        self._pages.clear()
+        self._map.close()
+
+    def read_memory(self, offset: int, length: int) -> bytes:
+        start = offset + self.data_start
+        if start < 0:
+            raise ValueError(f"offset must not be negative, got {offset}")
+        end = min(start + length, len(self._map))
+        if end <= start:
+            return b""
+        first_page, last_page = start // self.page_size, (end - 1) // self.page_size
+        if first_page == last_page:
+            page_start = first_page * self.page_size
+            return self._page(first_page)[start - page_start : end - page_start]
+        data = b"".join(self._page(n) for n in range(first_page, last_page + 1))
+        page_start = first_page * self.page_size
+        return data[start - page_start : end - page_start]
+
+    def view(self, offset: int, length: int) -> memoryview:
+        start = offset + self.data_start
+        page_number = start // self.page_size
+        page_start = page_number * self.page_size
+        if start >= 0 and start + length <= page_start + self.page_size:
+            page = self._page(page_number)
+            return memoryview(page)[start - page_start : start - page_start + length]
+        return memoryview(self.read_memory(offset, length))
+
+    def readinto(self, offset: int, buffer: bytearray | memoryview) -> int:
+        target = memoryview(buffer).cast("B")
+        start = offset + self.data_start
+        if start < 0:
+            raise ValueError(f"offset must not be negative, got {offset}")
+        written = 0
+        while written < len(target):
+            page_number, page_offset = divmod(start + written, self.page_size)
+            if (start + written) >= len(self._map):
+                break
+            page = self._page(page_number)
+            count = min(len(page) - page_offset, len(target) - written)
+            target[written : written + count] = page[page_offset : page_offset + count]
+            written += count
+        return written
+
+    @contextlib.contextmanager
+    def snapshot(self, ranges: typing.Iterable[range]):
+        yield self
+
+    def read_ranges(self, ranges: typing.Iterable[range]) -> list[bytes]:
+        return [self.read_memory(r.start, len(r)) for r in ranges]
+
+    def readinto_ranges(
+        self, targets: typing.Sequence[tuple[int, bytearray | memoryview]]
+    ) -> None:
+        for offset, buffer in targets:
+            self.readinto(offset, buffer)
+
+    def _page(self, number: int) -> bytes:
+        """Return a decrypted page, decrypting it if it is not cached"""
+        try:
+            self._pages.move_to_end(number)
+            return self._pages[number]
+        except KeyError:
+            pass
+        page = decrypt_range(
+            self._map, number * self.page_size, self.page_size, self.byte_order
+        )
+        self._pages[number] = page
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+
+def coalesce_ranges(ranges: typing.Iterable[range], max_gap: int = 0) -> list[range]:
+    """Merge overlapping ranges, and ranges separated by at most max_gap.
+
+    Empty ranges are dropped. The result is sorted by start.
+    """
+    merged = []
+    for r in sorted((r for r in ranges if r), key=lambda r: r.start):
+        if merged and r.start - merged[-1].stop <= max_gap:
+            if r.stop > merged[-1].stop:
+                merged[-1] = range(merged[-1].start, r.stop)
+        else:
+            merged.append(range(r.start, r.stop))
+    return merged
+
+
+def _copy_into(buffer: bytearray | memoryview, data: bytes | memoryview) -> int:
+    """Copy data to the start of buffer, returning the number of bytes copied"""
+    target = memoryview(buffer).cast("B")
+    target[: len(data)] = data
+    return len(data)
 
 
+def _same_file_version(before: os.stat_result, after: os.stat_result) -> bool:
+    return (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns)
@@ -0,0 +1,157 @@
+"""On-disk cache of decrypted save data.
+
+Decrypting a gamedata file is by far the most expensive part of reading it,
+and most xcxtool commands read the same, unchanged, file every time they run.
+Decrypted data is stored in the user cache directory, keyed by the path, size
+and modification time of the save file and a fingerprint of its (encrypted)
+header, which includes the checksum and encryption key position. The total
+size of the cache is capped, and the least recently used entries are removed
+when it grows past the cap.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from plumbum import LocalPath
+
+from xcxtool import config
+from xcxtool.app import LOGGER_NAME
+
+__all__ = ["DecryptedSaveCache", "cache_key", "get_decrypted_cache"]
+
+_log = logging.getLogger(LOGGER_NAME)
+
+CACHE_SUBDIRECTORY = "decrypted"
+HEADER_FINGERPRINT_SIZE = 16
+
+
+class DecryptedSaveCache:
+    """A directory of decrypted save data, limited to max_size bytes"""
+
+    def __init__(self, directory: str | os.PathLike, max_size: int):
+        self.directory = os.fspath(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, save_file: str | os.PathLike, key: str | None = None) -> bytes | None:
+        """Return the cached decrypted data for save_file, or None.
+
+        key is the cache_key() of the data being looked up. By default it is
+        worked out from the file as it is now.
+        """
+        entry = self._entry_path(save_file, key)
+        if entry is None:
+            return None
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # Record the access for LRU eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        _log.debug(f"Decrypted data for {save_file} read from cache")
+        return data
+
+    def put(
+        self, save_file: str | os.PathLike, data: bytes, key: str | None = None
+    ) -> None:
+        """Store the decrypted data for save_file.
+
+        key should be the cache_key() of the file data was decrypted from,
+        taken when it was read: by default it is worked out from the file as
+        it is now, which is only right if the file hasn't changed since.
+
+        Errors writing to the cache are logged and otherwise ignored, as the
+        cache is only an optimisation.
+        """
+        if len(data) > self.max_size:
+            return
+        entry = self._entry_path(save_file, key)
+        if entry is None:
+            return
+        try:
+            fd, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_name, entry)
+        except OSError as e:
+            _log.debug(f"Could not write to decrypted save cache: {e}")
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits max_size"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache"""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".bin", ".tmp")):
+                os.remove(entry.path)
+
+    def _entry_path(
+        self, save_file: str | os.PathLike, key: str | None = None
+    ) -> str | None:
+        if key is None:
+            key = cache_key(save_file)
+        if key is None:
+            return None
+        return os.path.join(self.directory, key + ".bin")
+
+
+def cache_key(
+    save_file: str | os.PathLike,
+    stat: os.stat_result | None = None,
+    header: bytes | None = None,
+) -> str | None:
+    """Return the cache key for save_file, or None if it can't be read.
+
+    stat and header are the file's stat and its first bytes. Pass them when
+    the file has already been read, so the key matches the data that was
+    read even if the file has been rewritten since.
+    """
+    path = os.path.abspath(save_file)
+    if stat is None or header is None:
+        try:
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                header = f.read(HEADER_FINGERPRINT_SIZE)
+        except OSError:
+            return None
+    header = header[:HEADER_FINGERPRINT_SIZE]
+    key = hashlib.sha256()
+    key.update(os.fsencode(path))
+    key.update(f"\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    key.update(header)
+    return key.hexdigest()
+
+
+def get_decrypted_cache() -> DecryptedSaveCache | None:
+    """Return the decrypted save cache, or None if it is disabled"""
+    if not config.get("cache.enabled"):
+        return None
+    max_size = int(config.get("cache.max_size_mb") * 1024 * 1024)
+    cache_dir: LocalPath = config.get_cache_dir() / CACHE_SUBDIRECTORY
+    try:
+        return DecryptedSaveCache(cache_dir, max_size)
+    except OSError as e:
+        _log.debug(f"Decrypted save cache not available: {e}")
+        return None
@@ -2,11 +2,34 @@
 
 The crc32 function and CRC table are taken from lincoln-lm's gist[1]
 
+The checksum has the shape of a table-driven CRC, but CRC_TABLE is not derived
+from a polynomial, so the usual slicing-by-4/8 tables (which depend on the
+table being linear) cannot be used. It is still true that the state after two
+bytes depends only on the low 16 bits of (state ^ next two bytes) plus the
+state shifted right by 16, so calculate_checksum() consumes the data two bytes
+at a time using a 65536 entry table derived from CRC_TABLE. The table is kept
+in a compact array so that it stays in the CPU cache.
+
+The top byte of each CRC_TABLE entry is unique (as is the top 16 bits of each
+two-byte table entry), so an update step can be reversed: given the state
+after a step and the byte(s) consumed, the previous state can be recovered.
+patch_checksum() uses this to update a checksum after editing data without
+re-reading the data before the first edit. The checksum is not linear, so
+unlike a real CRC the data after the edits still has to be processed.
+
 [1]: https://gist.github.com/lincoln-lm/aa09cd89ff338ac5ee0404942d528154
 """
 
+import array
+import functools
 import struct
-from typing import Literal
+import sys
+from typing import Iterable, Literal
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 ByteOrder = Literal["big", "little"]
 
@@ -15,26 +38,201 @@ STRUCT_BYTE_ORDER = {
     "little": "<",
 }
 
-__all__ = ["calculate_checksum", "fix_checksum", "verify_checksum", "verify_data_size"]
+__all__ = [
+    "SaveChecksum",
+    "calculate_checksum",
+    "fix_checksum",
+    "patch_checksum",
+    "patch_save_data",
+    "slice_table",
+    "verify_checksum",
+    "verify_data_size",
+]
+
+
+class SaveChecksum:
+    """Incremental save data checksum, in the style of hashlib objects.
+
+    The checksum is seeded with the total length of the data, so this must be
+    known up front (it is the fourth value of the save data header). Data can
+    then be passed to update() in chunks of any size:
+
+        >>> checksum = SaveChecksum(len(data))
+        >>> for chunk in chunks:
+        ...     checksum.update(chunk)
+        >>> checksum.digest() == calculate_checksum(data)
+        True
+    """
+
+    def __init__(self, length: int, data: bytes = b""):
+        self.length = length
+        self._hash = length
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes) -> None:
+        """Feed data into the checksum"""
+        self._hash = _update_checksum(self._hash, data)
+
+    def copy(self) -> "SaveChecksum":
+        """Return a copy of the checksum object with the same state"""
+        other = SaveChecksum(self.length)
+        other._hash = self._hash
+        return other
+
+    def digest(self) -> int:
+        """Return the checksum of the data passed to update() so far"""
+        return self._hash
+
+    def hexdigest(self) -> str:
+        return f"{self._hash:08x}"
 
 
 def calculate_checksum(data: bytes) -> int:
-    hash_ = len(data)
-    for byte in data:
-        hash_ = CRC_TABLE[(hash_ ^ byte) & 0xFF] ^ (hash_ >> 8)
+    return SaveChecksum(len(data), data).digest()
+
+
+@functools.cache
+def slice_table() -> array.array:
+    """Return the table for updating the checksum two bytes at a time.
+
+    Entry x is the result of running the byte-at-a-time update on a state
+    whose low 16 bits XOR the next two data bytes (as a little endian
+    integer) equal x, with the state's upper 16 bits set to zero.
+    """
+    if numpy is not None:
+        crc_table = numpy.array(CRC_TABLE, dtype=numpy.uint32)
+        index = numpy.arange(0x10000, dtype=numpy.uint32)
+        first = crc_table[index & 0xFF]
+        second = crc_table[(first ^ (index >> 8)) & 0xFF]
+        return array.array("I", (second ^ (first >> 8)).tobytes())
+    table = array.array("I")
+    for index in range(0x10000):
+        first = CRC_TABLE[index & 0xFF]
+        table.append(CRC_TABLE[(first ^ (index >> 8)) & 0xFF] ^ (first >> 8))
+    return table
+
+
+@functools.cache
+def _inverse_tables() -> tuple[list[int], array.array]:
+    """Map the top byte (16 bits) of CRC_TABLE (slice_table()) to its index"""
+    inverse_byte = [0] * 0x100
+    for index, value in enumerate(CRC_TABLE):
+        inverse_byte[value >> 24] = index
+    inverse_word = array.array("H", bytes(0x20000))
+    for index, value in enumerate(slice_table()):
+        inverse_word[value >> 16] = index
+    return inverse_byte, inverse_word
+
+
+def _unwind_checksum(hash_: int, data: bytes) -> int:
+    """Return the running checksum value from before data was fed into it"""
+    inverse_byte, inverse_word = _inverse_tables()
+    table = slice_table()
+    view = memoryview(data).cast("B")
+    even = len(view) & ~1
+    if even != len(view):
+        index = inverse_byte[hash_ >> 24]
+        hash_ = ((hash_ ^ CRC_TABLE[index]) << 8) | (index ^ view[even])
+    words = view[:even].cast("H")
+    if sys.byteorder == "big":
+        words = array.array("H", words)
+        words.byteswap()
+    for word in reversed(words):
+        index = inverse_word[hash_ >> 16]
+        hash_ = ((hash_ ^ table[index]) << 16) | (index ^ word)
+    return hash_
+
+
+def _update_checksum(hash_: int, data: bytes) -> int:
+    """Feed data into a running checksum value and return the new value"""
+    table = slice_table()
+    view = memoryview(data).cast("B")
+    even = len(view) & ~1
+    words = view[:even].cast("H")
+    if sys.byteorder == "big":
+        words = array.array("H", words)
+        words.byteswap()
+    for word in words:
+        hash_ = table[(hash_ ^ word) & 0xFFFF] ^ (hash_ >> 16)
+    if even != len(view):
+        hash_ = CRC_TABLE[(hash_ ^ view[even]) & 0xFF] ^ (hash_ >> 8)
     return hash_
 
 
+def patch_checksum(
+    checksum: int, body: bytes, patches: Iterable[tuple[int, bytes]]
+) -> int:
+    """Return the checksum of body after applying patches to it.
+
+    checksum must be the checksum of the unpatched body, which is the save data
+    without its 16-byte header. Each patch is an (offset, new_bytes) pair, with
+    offset relative to the start of body; patches overwrite bytes and cannot
+    change the length of the data.
+
+    The old checksum is unwound back to the first patched offset and then
+    updated with the patched data, so the work done is proportional to the
+    distance from the first patch to the end of the data. If that is more
+    than half of the data, it is cheaper to hash from the start instead.
+
+    Patches are applied in the order given, so where patches overlap the
+    later one wins, as it does in patch_save_data().
+    """
+    patches = list(patches)
+    if not patches:
+        return checksum
+    first = min(offset for offset, _ in patches)
+    tail = bytearray(memoryview(body)[first:])
+    for offset, new_bytes in patches:
+        if offset < 0 or offset + len(new_bytes) > len(body):
+            raise ValueError(
+                f"patch at {offset:#x} ({len(new_bytes)} bytes) is outside the data"
+            )
+        tail[offset - first : offset - first + len(new_bytes)] = new_bytes
+
+    hasher = SaveChecksum(len(body))
+    if 2 * len(tail) > len(body):
+        hasher.update(memoryview(body)[:first])
+    else:
+        hasher._hash = _unwind_checksum(checksum, memoryview(body)[first:])
+    hasher.update(tail)
+    return hasher.digest()
+
+
+def patch_save_data(
+    save_data: bytes, patches: Iterable[tuple[int, bytes]], endian: ByteOrder = "big"
+) -> bytes:
+    """Apply patches to decrypted save data and update the header checksum.
+
+    Each patch is an (offset, new_bytes) pair, with offset relative to the
+    start of the save file (as for SaveDataReader.read_memory()). The
+    checksum in the header must be correct before patching.
+
+    Raises ValueError if the save data is not decrypted or a patch overlaps
+    the header.
+    """
+    header = _unpack_header(save_data, endian, "patching")
+    patches = list(patches)
+    if any(offset < 16 for offset, _ in patches):
+        raise ValueError("Patches cannot modify the save data header")
+    body = memoryview(save_data)[16:]
+    new_checksum = patch_checksum(
+        header[2], body, ((offset - 16, data) for offset, data in patches)
+    )
+    patched = bytearray(save_data)
+    patched[8:12] = new_checksum.to_bytes(4, endian)
+    for offset, new_bytes in patches:
+        patched[offset : offset + len(new_bytes)] = new_bytes
+    return bytes(patched)
+
+
 def verify_checksum(save_data: bytes, endian: ByteOrder = "big") -> bool:
     """Verify if the game data checksum is correct.
 
     Raises ValueError if the save data does not appear to be decrypted.
     """
-    header = struct.unpack(f"{STRUCT_BYTE_ORDER[endian]}4I", save_data[0:16])
-    if header[1] != 1:
-        raise ValueError("Save data must be decrypted before verifying checksum")
-
-    return calculate_checksum(save_data[16:]) == header[2]
+    header = _unpack_header(save_data, endian, "verifying checksum")
+    return _body_checksum(save_data).digest() == header[2]
 
 
 def fix_checksum(save_data: bytes, endian: ByteOrder = "big") -> bytes:
@@ -42,19 +240,31 @@ def fix_checksum(save_data: bytes, endian: ByteOrder = "big") -> bytes:
 
     Raises ValueError if save date appears to be encrypted.
     """
-    if verify_checksum(save_data, endian):
+    header = _unpack_header(save_data, endian, "fixing checksum")
+    new_checksum = _body_checksum(save_data).digest()
+    if new_checksum == header[2]:
         return save_data
-    new_checksum = calculate_checksum(save_data[16:]).to_bytes(4, endian, signed=False)
-    return save_data[0:8] + new_checksum + save_data[12:]
+    return save_data[0:8] + new_checksum.to_bytes(4, endian) + save_data[12:]
 
 
 def verify_data_size(save_data: bytes, endian: ByteOrder = "big") -> bool:
     """Verify that the data size declared in the save data header is correct."""
-    header = struct.unpack(f"{STRUCT_BYTE_ORDER[endian]}4I", save_data[0:16])
+    header = _unpack_header(save_data, endian, "verifying data size")
+    return len(save_data) - 16 == header[3]
+
+
+def _unpack_header(
+    save_data: bytes, endian: ByteOrder, action: str
+) -> tuple[int, int, int, int]:
+    header = struct.unpack_from(f"{STRUCT_BYTE_ORDER[endian]}4I", save_data)
     if header[1] != 1:
-        raise ValueError("Save data must be decrypted before verifying data size")
+        raise ValueError(f"Save data must be decrypted before {action}")
+    return header
+
 
-    return len(save_data[16:]) == header[3]
+def _body_checksum(save_data: bytes) -> SaveChecksum:
+    body = memoryview(save_data)[16:]
+    return SaveChecksum(len(body), body)
 
 
 CRC_TABLE = [
@@ -2,12 +2,25 @@
 
 The decryption/encryption functions are based on lincoln-lm's gist[1]
 
+Each byte of the data following the 4-byte encryption info is XORed with the
+low byte of its index and with the key byte at the current key position. Both
+repeat every 512 bytes, so the combined keystream is also 512 bytes long.
+Transforms precompute one period of the keystream and XOR it with the data in
+bulk, using NumPy if it is installed.
+
 [1]: https://gist.github.com/lincoln-lm/aa09cd89ff338ac5ee0404942d528154
 """
 
+import functools
+import itertools
 import random
 import struct
-from typing import Literal
+from typing import Iterable, Iterator, Literal
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 ByteOrder = Literal["big", "little"]
@@ -17,12 +30,30 @@ STRUCT_BYTE_ORDER = {
     "little": "<",
 }
 
+KEYSTREAM_PERIOD = 512
+# Size of the slices used by the stdlib path of transform_into(), this bounds
+# the temporary memory needed no matter how large the save data is.
+_INTO_CHUNK_SIZE = KEYSTREAM_PERIOD * 128
+
+# The second header value is always 1, so this is how decrypted data looks
+DECRYPTED_MARKERS = frozenset({b"\x00\x00\x00\x01", b"\x01\x00\x00\x00"})
+
 __all__ = [
+    "decrypt_range",
     "decrypt_save_data",
+    "decrypt_save_data_into",
+    "decrypt_stream",
     "detect_byte_order",
     "encrypt_save_data",
+    "encrypt_save_data_into",
     "get_initial_key_position",
+    "get_key",
+    "keystream",
+    "keystream_block",
+    "save_keystream",
     "transform",
+    "transform_into",
+    "transform_with_keystream",
 ]
 
 
@@ -30,18 +61,149 @@ def get_initial_key_position(save_data: bytes, endian: ByteOrder = "big") -> int
     return int.from_bytes(save_data[0:4], endian) & 0x1FF
 
 
+@functools.cache
+def get_key(endian: ByteOrder = "big") -> bytes:
+    """Return the 512 byte encryption key for the given edition"""
+    return struct.pack(f"{STRUCT_BYTE_ORDER[endian]}256H", *XOR_KEY)
+
+
+@functools.lru_cache(maxsize=1024)
+def keystream_block(key: bytes, key_position: int) -> bytes:
+    """Return one period of the keystream starting at key_position.
+
+    Byte n of the result is XORed with byte n (modulo 512) of the save data
+    following the 4-byte encryption info.
+    """
+    return bytes(
+        (index & 0xFF) ^ key[(key_position + index) % 512] ^ 0xFF
+        for index in range(KEYSTREAM_PERIOD)
+    )
+
+
+def keystream(key: bytes, key_position: int, length: int, start: int = 0) -> bytes:
+    """Return `length` bytes of keystream, starting at data index `start`.
+
+    Data indexes do not include the 4-byte encryption info, so index 0 is
+    offset 4 of the save file.
+    """
+    return _tile_keystream(keystream_block(key, key_position % 512), length, start)
+
+
+def save_keystream(save_data: bytes, endian: ByteOrder = "big") -> bytes:
+    """Return one period of the keystream used to encrypt save_data.
+
+    All the data files saved at the same time share a key position, so the
+    result can be used to decrypt them with transform_with_keystream().
+    """
+    return keystream_block(get_key(endian), get_initial_key_position(save_data, endian))
+
+
+def _tile_keystream(block: bytes, length: int, start: int = 0) -> bytes:
+    start %= KEYSTREAM_PERIOD
+    if start:
+        block = block[start:] + block[:start]
+    repeats = -(-length // KEYSTREAM_PERIOD)
+    return (block * repeats)[:length]
+
+
 def transform(save_data: bytes, key: bytes, key_position: int) -> bytes:
     """Encrypt or decrypt save_data with key.
 
     Since encryption is symmetrical, this can encrypt and decrypt save data
     """
-    decrypted = []
-    for data_index, byte in enumerate(save_data[4:]):
-        byte ^= data_index & 0xFF
-        byte ^= key[key_position] ^ 0xFF
-        decrypted.append(byte)
-        key_position = (key_position + 1) % 512
-    return save_data[0:4] + bytes(decrypted)
+    if numpy is None:
+        # The chunked big-int XOR in transform_into() reuses a cached keystream
+        # chunk, which is faster than building a keystream as long as the data
+        out = bytearray(len(save_data))
+        transform_into(save_data, out, key, key_position)
+        return bytes(out)
+    body = save_data[4:]
+    stream = keystream(key, key_position, len(body))
+    return bytes(save_data[0:4]) + _xor_bytes(body, stream)
+
+
+def transform_with_keystream(save_data: bytes, block: bytes) -> bytes:
+    """Encrypt or decrypt save_data with a keystream from save_keystream().
+
+    The key position in the data's encryption info is ignored.
+    """
+    if len(block) != KEYSTREAM_PERIOD:
+        raise ValueError(
+            f"keystream must be {KEYSTREAM_PERIOD} bytes, got {len(block)} bytes"
+        )
+    body = save_data[4:]
+    return bytes(save_data[0:4]) + _xor_bytes(body, _tile_keystream(block, len(body)))
+
+
+def transform_into(
+    save_data: bytes, out: bytearray | memoryview, key: bytes, key_position: int
+) -> None:
+    """Encrypt or decrypt save_data with key, writing the result to out.
+
+    out can be any writable buffer at least as long as save_data (e.g. a
+    bytearray, memoryview or writable mmap) and may be save_data itself to
+    transform data in place. No copies of the data are made: with NumPy the
+    keystream is applied directly to out, otherwise the data is processed in
+    fixed-size chunks.
+    """
+    length = len(save_data)
+    if len(out) < length:
+        raise ValueError(
+            f"output buffer ({len(out)} bytes) is smaller than data ({length} bytes)"
+        )
+    src = memoryview(save_data).cast("B")
+    dst = memoryview(out).cast("B")
+    dst[0:4] = src[0:4]
+    if length <= 4:
+        return
+    if numpy is not None:
+        _xor_keystream_numpy(src[4:length], dst[4:length], key, key_position % 512)
+        return
+
+    chunk_stream = _keystream_chunk_int(key, key_position % 512)
+    for start in range(4, length, _INTO_CHUNK_SIZE):
+        end = min(start + _INTO_CHUNK_SIZE, length)
+        size = end - start
+        stream = chunk_stream
+        if size < _INTO_CHUNK_SIZE:
+            stream &= (1 << (size * 8)) - 1
+        dst[start:end] = (
+            int.from_bytes(src[start:end], "little") ^ stream
+        ).to_bytes(size, "little")
+
+
+def _xor_keystream_numpy(
+    src: memoryview, dst: memoryview, key: bytes, key_position: int
+) -> None:
+    """XOR src with the keystream into dst, broadcasting one keystream period"""
+    block = numpy.frombuffer(keystream_block(key, key_position), numpy.uint8)
+    src_array = numpy.frombuffer(src, numpy.uint8)
+    dst_array = numpy.frombuffer(dst, numpy.uint8)
+    full = len(src_array) - len(src_array) % KEYSTREAM_PERIOD
+    numpy.bitwise_xor(
+        src_array[:full].reshape(-1, KEYSTREAM_PERIOD),
+        block,
+        out=dst_array[:full].reshape(-1, KEYSTREAM_PERIOD),
+    )
+    tail = len(src_array) - full
+    numpy.bitwise_xor(src_array[full:], block[:tail], out=dst_array[full:])
+
+
+@functools.lru_cache(maxsize=16)
+def _keystream_chunk_int(key: bytes, key_position: int) -> int:
+    return int.from_bytes(keystream(key, key_position, _INTO_CHUNK_SIZE), "little")
+
+
+def _xor_bytes(data: bytes, stream: bytes) -> bytes:
+    """XOR two equal-length byte strings"""
+    if numpy is not None:
+        return numpy.bitwise_xor(
+            numpy.frombuffer(data, numpy.uint8), numpy.frombuffer(stream, numpy.uint8)
+        ).tobytes()
+    length = len(data)
+    return (
+        int.from_bytes(data, "little") ^ int.from_bytes(stream, "little")
+    ).to_bytes(length, "little")
 
 
 def decrypt_save_data(data: bytes, endian: ByteOrder = "big") -> bytes:
@@ -50,11 +212,81 @@ def decrypt_save_data(data: bytes, endian: ByteOrder = "big") -> bytes:
     If data is already decrypted, return it as-is.
     """
     # This should always work as there are no repeated null bytes in the key
-    if data[4:8] in {b"\x00\x00\x00\x01", b"\x01\x00\x00\x00"}:
+    if bytes(data[4:8]) in DECRYPTED_MARKERS:
         return data
     key_position = get_initial_key_position(data, endian)
-    key = struct.pack(f"{STRUCT_BYTE_ORDER[endian]}256H", *XOR_KEY)
-    return transform(data, key, key_position)
+    return transform(data, get_key(endian), key_position)
+
+
+def decrypt_save_data_into(
+    data: bytes, out: bytearray | memoryview, endian: ByteOrder = "big"
+) -> None:
+    """Decrypt encrypted save data into the writable buffer out.
+
+    out may be data itself to decrypt in place. If data is already decrypted,
+    it is copied to out as-is.
+    """
+    if bytes(data[4:8]) in DECRYPTED_MARKERS:
+        memoryview(out)[: len(data)] = data
+        return
+    key_position = get_initial_key_position(data, endian)
+    transform_into(data, out, get_key(endian), key_position)
+
+
+def decrypt_stream(
+    chunks: Iterable[bytes], endian: ByteOrder = "big"
+) -> Iterator[bytes]:
+    """Decrypt save data read in chunks, yielding decrypted chunks.
+
+    Chunks can be any size, so data can be decrypted as it is read from an
+    archive or socket. If the data is already decrypted, chunks are yielded
+    as-is.
+    """
+    chunks = iter(chunks)
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        if len(pending) >= 8:
+            break
+    if len(pending) < 4 or bytes(pending[4:8]) in DECRYPTED_MARKERS:
+        yield pending
+        yield from chunks
+        return
+
+    block = keystream_block(get_key(endian), get_initial_key_position(pending, endian))
+    yield pending[:4]
+    position = 0
+    for chunk in itertools.chain([pending[4:]], chunks):
+        yield _xor_bytes(chunk, _tile_keystream(block, len(chunk), position))
+        position += len(chunk)
+
+
+def decrypt_range(
+    data: bytes, offset: int, length: int, endian: ByteOrder = "big"
+) -> bytes:
+    """Decrypt `length` bytes of save data starting at `offset`.
+
+    `offset` is relative to the start of the save file, as for
+    SaveDataReader.read_memory(). Only the encryption info and the requested
+    window of data are read, so this is much cheaper than decrypting the
+    whole file when only a few values are needed.
+
+    If data is already decrypted, the window is returned as-is.
+    """
+    if offset < 0:
+        raise ValueError(f"offset must not be negative, got {offset}")
+    window = bytes(data[offset : offset + length])
+    if bytes(data[4:8]) in DECRYPTED_MARKERS:
+        return window
+    plain_bytes = max(0, 4 - offset)
+    body = window[plain_bytes:]
+    stream = keystream(
+        get_key(endian),
+        get_initial_key_position(data, endian),
+        len(body),
+        offset + plain_bytes - 4,
+    )
+    return window[:plain_bytes] + _xor_bytes(body, stream)
 
 
 def encrypt_save_data(
@@ -72,7 +304,7 @@ def encrypt_save_data(
     initial key value. If key_value is -1 (or any negative number) a random
     initial value will be used
     """
-    key = struct.pack(f"{STRUCT_BYTE_ORDER[endian]}256H", *XOR_KEY)
+    key = get_key(endian)
 
     if key_position is None:
         key_position = get_initial_key_position(data, endian)
@@ -87,6 +319,29 @@ def encrypt_save_data(
     return encryption_info.to_bytes(4, endian) + encrypted[4:]
 
 
+def encrypt_save_data_into(
+    data: bytes,
+    out: bytearray | memoryview,
+    endian: ByteOrder = "big",
+    key_position: int | None = None,
+) -> None:
+    """Encrypt save data into the writable buffer out.
+
+    out may be data itself to encrypt in place. endian and key_position have
+    the same meaning as for encrypt_save_data().
+    """
+    if key_position is None:
+        key_position = get_initial_key_position(data, endian)
+    elif key_position < 0:
+        key_position = random.randint(0, 511)
+    key_position = key_position % 512
+
+    transform_into(data, out, get_key(endian), key_position)
+    random_value = int.from_bytes(random.randbytes(4), endian)
+    encryption_info = (random_value & 0xFFFFFE00) | key_position
+    memoryview(out)[0:4] = encryption_info.to_bytes(4, endian)
+
+
 def detect_byte_order(save_data: bytes) -> ByteOrder | None:
     header = save_data[0:16]
     decrypted = decrypt_save_data(header, "big")
@@ -1,108 +1,312 @@
 """xcxtool applications for encrypting and decrypting save data files."""
 
+import concurrent.futures
+import glob
+import logging
 import os
-from typing import Literal
+from typing import Any, Callable, Iterator, Literal, NamedTuple
 
-from plumbum import cli, LocalPath
+from plumbum import cli, local, LocalPath
 
-from xcxtool.app import XCXToolApplication
+from xcxtool.app import XCXToolApplication, INFO, LOGGER_NAME, SUCCESS, WARNING
 from .encryption import (
+    DECRYPTED_MARKERS,
+    KEYSTREAM_PERIOD,
     decrypt_save_data,
     get_initial_key_position,
     encrypt_save_data,
     detect_byte_order,
+    save_keystream,
+    transform_with_keystream,
 )
 from .checksum import fix_checksum, verify_checksum, verify_data_size
 
 ByteOrder = Literal["big", "little"]
 
+_log = logging.getLogger(LOGGER_NAME)
 
-class DecryptSave(XCXToolApplication):
-    """Decrypt save data"""
 
-    def __init__(self, executable):
-        super().__init__(executable)
-        self.endian: ByteOrder = "big"
+class FileResult(NamedTuple):
+    """Result of encrypting or decrypting one file in a batch"""
 
-    @cli.positional(cli.ExistingFile)
-    def main(self, savefile: LocalPath):
-        self.success(f"Decrypting [bold]{savefile}[/bold]")
-        # noinspection PyTypeChecker
-        data: bytes = savefile.read(None, "rb")
+    source: str
+    output: str | None  # None if the file was skipped
+    messages: list[tuple[int, str]]
 
-        byte_order = detect_byte_order(data)
-        if byte_order is None:
-            self.error("Could not detect byte order of save data")
+
+class BatchSaveApplication(XCXToolApplication):
+    """Base class for applications that process batches of save files.
+
+    Targets can be files, directories (all files directly inside are
+    processed) or glob patterns. Files are processed in a process pool, and
+    an error in one file does not stop the others being processed.
+    """
+
+    # Files in directories or matching globs with these suffixes are skipped
+    skip_suffixes: tuple[str, ...] = ()
+    # If set, only files in directories or matching globs with these suffixes
+    # are processed
+    match_suffixes: tuple[str, ...] = ()
+    action: str = "Processed"
+
+    jobs: int = cli.SwitchAttr(
+        ["-j", "--jobs"],
+        argtype=int,
+        default=os.cpu_count() or 1,
+        help="Number of files to process in parallel. Defaults to the number of CPUs",
+    )
+
+    def run_batch(
+        self, worker: Callable[..., FileResult], targets: tuple[str, ...], *args
+    ) -> int:
+        """Run worker(file, *args) for every file in targets and log the results.
+
+        Returns 1 if any file failed, otherwise 0. Files the worker skipped
+        (with output None) are not failures.
+        """
+        files = expand_targets(targets, self.skip_suffixes, self.match_suffixes)
+        if not files:
+            self.error("No files found")
             return 1
-        self.success(f"Detected {'DE' if byte_order == 'little' else 'OG'} game version")
 
-        key_position = get_initial_key_position(data, byte_order)
-        self.success(f"Initial key position: [green]{key_position}[/]")
+        batch = len(files) > 1
+        failed = skipped = 0
+        for n, (source, result) in enumerate(
+            run_in_pool(worker, files, self.jobs, *args), 1
+        ):
+            progress = f"[{n}/{len(files)}] " if batch else ""
+            if isinstance(result, Exception):
+                failed += 1
+                self.error(f"{progress}[red]{source}[/red]: {result}")
+                continue
+            for level, message in result.messages:
+                if batch and level == SUCCESS:
+                    level = INFO
+                self.log(level, message)
+            if result.output is None:
+                skipped += 1
+                continue
+            self.success(f"{progress}Wrote [green]{result.output}[/green]")
 
-        decrypted = decrypt_save_data(data, byte_order)
-        of_name = savefile.name + "_decrypted"
-        of: LocalPath = savefile.parent / of_name
+        if batch:
+            self.success(
+                f"{self.action} {len(files) - failed - skipped} of {len(files)} files"
+                + (f", [yellow]{skipped} skipped[/yellow]" if skipped else "")
+                + (f", [red]{failed} failed[/red]" if failed else "")
+            )
+        return 1 if failed else 0
+
+
+class DecryptSave(BatchSaveApplication):
+    """Decrypt save data"""
+
+    DESCRIPTION_MORE = """Decrypted data is written next to each file, with
+    "_decrypted" appended to the name.
+    """
 
-        self.success(f"Writing decrypted data to [green]{of}[/green]")
-        of.write(decrypted, None, "wb")
-        copy_mtime(savefile, of)
-        return 0
+    dump_key: bool = cli.Flag(
+        ["-d", "--dump-key"],
+        help="Save the key alongside the decrypted data, with '_key' appended to the name",
+    )
+    key: LocalPath = cli.SwitchAttr(
+        ["-k", "--key"],
+        argtype=cli.ExistingFile,
+        excludes=["--dump-key"],
+        help="Decrypt with a key saved by --dump-key, instead of detecting the key",
+    )
 
+    skip_suffixes = ("_decrypted", "_key")
+    action = "Decrypted"
 
-class EncryptSave(XCXToolApplication):
+    def main(self, *savefiles: str):
+        if not savefiles:
+            self.error("No save files specified")
+            return 2
+        keystream = None
+        if self.key is not None:
+            # noinspection PyTypeChecker
+            keystream: bytes = self.key.read(None, "rb")
+            if len(keystream) != KEYSTREAM_PERIOD:
+                self.error(f"Key file must be exactly {KEYSTREAM_PERIOD} bytes")
+                return 1
+        return self.run_batch(decrypt_file, savefiles, self.dump_key, keystream)
+
+
+class EncryptSave(BatchSaveApplication):
     """Encrypt save data"""
 
+    DESCRIPTION_MORE = """Encrypted data is written next to each file, with
+    "_encrypted" appended to the name. Only files ending in "_decrypted" are
+    picked from directories and glob patterns.
+    """
+
     fix_checksum: bool = cli.Flag(["--fix-checksum"], help="Verify checksum and write new checksum if data has changed")
-    byte_order: ByteOrder
 
-    def __init__(self, executable) -> None:
-        super().__init__(executable)
+    match_suffixes = ("_decrypted",)
+    action = "Encrypted"
+
+    def main(self, *decrypted_files: str):
+        if not decrypted_files:
+            self.error("No save files specified")
+            return 2
+        return self.run_batch(encrypt_file, decrypted_files, self.fix_checksum)
+
 
-    @cli.positional(cli.ExistingFile)
-    def main(self, decrypted_data: LocalPath):
-        # noinspection PyTypeChecker
-        data: bytes = decrypted_data.read(None, "rb")
+def decrypt_file(
+    savefile: str, dump_key: bool = False, keystream: bytes | None = None
+) -> FileResult:
+    """Decrypt savefile and write the result alongside it.
 
+    If keystream is given (as saved by dump_key) it is used to decrypt the
+    data instead of the key detected from the file. Files that are already
+    decrypted are skipped with a warning.
+    """
+    path = local.path(savefile)
+    # noinspection PyTypeChecker
+    data: bytes = path.read(None, "rb")
+    if data[4:8] in DECRYPTED_MARKERS:
+        message = f"Skipping [bold]{path}[/bold], it is already decrypted"
+        return FileResult(savefile, None, [(WARNING, message)])
+    messages = [(SUCCESS, f"Decrypting [bold]{path}[/bold]")]
+
+    if keystream is not None:
+        decrypted = transform_with_keystream(data, keystream)
+        if decrypted[4:8] not in DECRYPTED_MARKERS:
+            raise ValueError("Key does not match save data")
+    else:
         byte_order = detect_byte_order(data)
         if byte_order is None:
-            self.error("Could not determine byte order (invalid header data)")
-            return 1
-        self.byte_order = byte_order
+            raise ValueError("Could not detect byte order of save data")
+        key_position = get_initial_key_position(data, byte_order)
+        messages.append(
+            (SUCCESS, f"Detected {'DE' if byte_order == 'little' else 'OG'} game version")
+        )
+        messages.append((SUCCESS, f"Initial key position: [green]{key_position}[/]"))
+        decrypted = decrypt_save_data(data, byte_order)
+        if dump_key:
+            key_file: LocalPath = path.parent / (path.name + "_key")
+            key_file.write(save_keystream(data, byte_order), None, "wb")
+            messages.append((SUCCESS, f"Key saved to [green]{key_file}[/green]"))
 
-        if self.fix_checksum:
-            try:
-                data = self.do_fix_checksum(data)
-            except ValueError:
-                self.error("Data is already encrypted or invalid header data")
-                return 1
+    of: LocalPath = path.parent / (path.name + "_decrypted")
+    of.write(decrypted, None, "wb")
+    copy_mtime(path, of)
+    return FileResult(savefile, str(of), messages)
 
-        # noinspection PyTypeChecker
-        encrypted = encrypt_save_data(data, self.byte_order)
-        of_name = decrypted_data.name + "_encrypted"
-        of = decrypted_data.parent / of_name
 
-        self.success(f"Writing encrypted data to [green]{of}[/green]")
-        of.write(encrypted, None, mode="wb")
-        copy_mtime(decrypted_data, of)
-        return 0
+def encrypt_file(decrypted_file: str, fix: bool = False) -> FileResult:
+    """Encrypt decrypted_file and write the result alongside it.
 
-    def do_fix_checksum(self, save_data: bytes) -> bytes:
-        """Check header and write new checksum value.
+    If fix is True, the checksum is verified and a new checksum written if
+    the data has changed. Files that are not decrypted are skipped with a
+    warning.
+    """
+    path = local.path(decrypted_file)
+    # noinspection PyTypeChecker
+    data: bytes = path.read(None, "rb")
+    if data[4:8] not in DECRYPTED_MARKERS:
+        message = f"Skipping [bold]{path}[/bold], it is not decrypted"
+        return FileResult(decrypted_file, None, [(WARNING, message)])
 
-        Returns data unchanged if the checksum is correct or data size does
-        not match the header value.
+    byte_order = detect_byte_order(data)
+    if byte_order is None:
+        raise ValueError("Could not determine byte order (invalid header data)")
 
-        Raises ValueError if the data is not decrypted.
-        """
-        if not verify_data_size(save_data, self.byte_order):
-            self.warning(f"Data size not correct")
-            return save_data
-        if verify_checksum(save_data, self.byte_order):
-            self.success(f"Checksum OK")
-            return save_data
-        self.success("Data has been changed, calculating new checksum")
-
-        return fix_checksum(save_data, self.byte_order)
+    messages = []
+    if fix:
+        try:
+            data = do_fix_checksum(data, byte_order, messages)
+        except ValueError:
+            raise ValueError("Data is already encrypted or invalid header data")
+
+    # noinspection PyTypeChecker
+    encrypted = encrypt_save_data(data, byte_order)
+    of = path.parent / (path.name + "_encrypted")
+    of.write(encrypted, None, mode="wb")
+    copy_mtime(path, of)
+    return FileResult(decrypted_file, str(of), messages)
+
+
+def do_fix_checksum(
+    save_data: bytes, byte_order: ByteOrder, messages: list[tuple[int, str]]
+) -> bytes:
+    """Check header and write new checksum value.
+
+    Returns data unchanged if the checksum is correct or data size does
+    not match the header value. Progress messages are appended to messages.
+
+    Raises ValueError if the data is not decrypted.
+    """
+    if not verify_data_size(save_data, byte_order):
+        messages.append((WARNING, "Data size not correct"))
+        return save_data
+    if verify_checksum(save_data, byte_order):
+        messages.append((SUCCESS, "Checksum OK"))
+        return save_data
+    messages.append((SUCCESS, "Data has been changed, calculating new checksum"))
+
+    return fix_checksum(save_data, byte_order)
+
+
+def expand_targets(
+    targets: tuple[str, ...],
+    skip_suffixes: tuple[str, ...] = (),
+    match_suffixes: tuple[str, ...] = (),
+) -> list[LocalPath]:
+    """Expand files, directories and glob patterns to a list of files.
+
+    Files found in directories or by glob patterns are skipped if their names
+    end with any of skip_suffixes or, if match_suffixes is given, don't end
+    with any of match_suffixes. Files named explicitly are always included.
+    A warning is logged for each target that matches no files.
+    """
+    files = {}
+    for target in targets:
+        path = local.path(target)
+        if path.is_file():
+            files[path] = None
+            continue
+        if path.is_dir():
+            candidates = sorted(path.list())
+        else:
+            matches = sorted(glob.glob(target, recursive=True))
+            candidates = [local.path(match) for match in matches]
+        matched = [
+            candidate
+            for candidate in candidates
+            if candidate.is_file()
+            and not candidate.name.endswith(skip_suffixes)
+            and (not match_suffixes or candidate.name.endswith(match_suffixes))
+        ]
+        if not matched:
+            # Targets are often glob patterns, so they aren't read as markup
+            _log.warning(f"No files found matching {target}", extra={"markup": False})
+        files.update(dict.fromkeys(matched))
+    return list(files)
+
+
+def run_in_pool(
+    worker: Callable[..., Any], files: list[LocalPath], jobs: int, *args
+) -> Iterator[tuple[LocalPath, Any]]:
+    """Yield (file, result) pairs as files are processed.
+
+    result is the exception raised by worker if it failed.
+    """
+    if jobs <= 1 or len(files) == 1:
+        for file in files:
+            try:
+                yield file, worker(str(file), *args)
+            except Exception as e:
+                yield file, e
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(min(jobs, len(files))) as pool:
+        futures = {pool.submit(worker, str(file), *args): file for file in files}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
 
 
 def copy_mtime(src: LocalPath, dest: LocalPath) -> None:
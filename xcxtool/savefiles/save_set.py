@@ -0,0 +1,142 @@
+"""Load all the save data files in a save folder at once.
+
+A save folder (st/game for the WiiU version) contains gamedata, its backup
+gamedata_, systemdata and several other files, all encrypted with the same
+scheme. SaveSet decrypts every file concurrently, so subcommands that need
+more than one file (or the same file more than once) can share a single load.
+At present only compare does; backup and fnav read a single file each with
+SaveFileReader. Files are only validated, in the calling thread, when their
+size_ok or checksum_ok is first used.
+"""
+
+import concurrent.futures
+import dataclasses
+import functools
+import os
+from typing import Iterator
+
+from plumbum import local, LocalPath
+
+from xcxtool.readers.save_files import SaveFileReader
+from .checksum import verify_checksum, verify_data_size
+from .encryption import ByteOrder, decrypt_save_data, detect_byte_order
+
+__all__ = ["DecodedSave", "SaveSet", "decode_save_file"]
+
+# Files in a save folder that are not encrypted save data
+_SKIP_SUFFIXES = ("_decrypted", "_encrypted", "_key", ".tmb")
+
+
+@dataclasses.dataclass(frozen=True)
+class DecodedSave:
+    """A decrypted save data file.
+
+    The data size and checksum are checked when first asked for, as
+    checksumming a file costs more than decrypting it.
+    """
+
+    name: str
+    data: bytes
+    byte_order: ByteOrder
+
+    @functools.cached_property
+    def size_ok(self) -> bool:
+        try:
+            return verify_data_size(self.data, self.byte_order)
+        except ValueError:
+            return False
+
+    @functools.cached_property
+    def checksum_ok(self) -> bool:
+        try:
+            return verify_checksum(self.data, self.byte_order)
+        except ValueError:
+            return False
+
+    @property
+    def valid(self) -> bool:
+        return self.size_ok and self.checksum_ok
+
+
+def decode_save_file(path: str | os.PathLike, byte_order: ByteOrder) -> DecodedSave:
+    """Decrypt a single save data file"""
+    with open(path, "rb") as f:
+        data = decrypt_save_data(f.read(), byte_order)
+    return DecodedSave(os.path.basename(path), data, byte_order)
+
+
+class SaveSet:
+    """All the save data files in a save folder.
+
+    Files are decrypted in the background as soon as the SaveSet is
+    created. Indexing by file name waits for that file only:
+
+        >>> save_set = SaveSet(save_folder)
+        >>> save_set["gamedata"].data
+        b"..."
+
+    The edition (byte order) is detected once, from the gamedata file, and
+    used for every file in the folder. A process pool can be passed as
+    executor for large folders; by default a thread pool is used.
+    """
+
+    def __init__(
+        self,
+        folder: str | os.PathLike,
+        executor: concurrent.futures.Executor | None = None,
+    ):
+        self.folder: LocalPath = local.path(folder)
+        self.paths = {
+            path.name: path
+            for path in sorted(self.folder.list())
+            if path.is_file() and not path.name.endswith(_SKIP_SUFFIXES)
+        }
+        self.byte_order = self._detect_byte_order()
+        if self.byte_order is None:
+            raise ValueError(f"Could not detect byte order of save data in {folder}")
+
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(len(self.paths) or 1)
+            self._owns_executor = True
+        else:
+            self._owns_executor = False
+        self._executor = executor
+        self._futures = {
+            name: executor.submit(decode_save_file, str(path), self.byte_order)
+            for name, path in self.paths.items()
+        }
+
+    def __getitem__(self, name: str) -> DecodedSave:
+        """Return the decoded file, waiting for it to be decrypted if necessary.
+
+        Raises KeyError if the file is not in the save folder, or any error
+        raised while decoding it.
+        """
+        return self._futures[name].result()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._futures
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._futures)
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def reader(self, name: str = "gamedata") -> SaveFileReader:
+        """Return a SaveFileReader over the decrypted data of a file"""
+        return SaveFileReader.from_data(self[name].data)
+
+    def close(self) -> None:
+        """Shut down the thread pool, if one was created by this SaveSet"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _detect_byte_order(self) -> ByteOrder | None:
+        gamedata = [name for name in self.paths if name.startswith("gamedata")]
+        for name in gamedata or list(self.paths):
+            with open(self.paths[name], "rb") as f:
+                byte_order = detect_byte_order(f.read(16))
+            if byte_order is not None:
+                return byte_order
+        return None